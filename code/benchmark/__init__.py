@@ -0,0 +1,169 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import copy
+import ipaddress
+import os
+import random
+import time
+import tracemalloc
+from typing import Callable, Tuple
+from ruamel import yaml
+
+IPERF_HEADER = [
+    "------------------------------------------------------------",
+    "Client connecting to 10.0.0.1, UDP port 8080 with pid 1 (1 flows)",
+    "Sending 1400 byte datagrams, IPG target: 3733.33 us (kalman adjust)",
+    "UDP buffer size:  208 KByte (default)",
+    "------------------------------------------------------------",
+    "[  1] local 10.60.0.1 port 8080 connected with 10.0.0.1 port 8080 (reverse) (trip-times)",
+    "[ ID] Interval            Transfer     Bandwidth        Jitter   Lost/Total  Latency avg/min/max/stdev PPS  NetPwr",
+    "[  1] 0.0000-0.0000 sec  0 Bytes  0 bits/sec",
+]
+
+# applications of the synthetic slices with their template data rate
+# (kbit/s for VoIP, Mbit/s otherwise) and its scale to bit/s
+APPLICATIONS = [("voip", 128, 1e3), ("web", 3, 1e6), ("streaming", 4, 1e6)]
+
+
+def iperf_sample(second: int, data_rate: float, rng: random.Random) -> str:
+    """Return a synthetic iperf2 per-second UDP report line with trip times"""
+
+    throughput = int(data_rate * rng.uniform(0.8, 1.0))
+    total = max(1, int(throughput / 8 / 1400))
+    lost = rng.randint(0, total // 20)
+    latency = rng.uniform(40, 600)
+    return (f"[  1] {second:.4f}-{second + 1:.4f} sec  {throughput // 8} Bytes  {throughput} bits/sec"
+            f"   {rng.uniform(0, 5):.3f} ms {lost}/{total} ({round(100 * lost / total)}%)"
+            f" {latency:.3f}/{latency * 0.9:.3f}/{latency * 1.1:.3f}/{rng.uniform(0, 2):.3f} ms {total} pps  {rng.uniform(1, 100):.2f}\n")
+
+
+def write_probe_file(path: str, duration: int, data_rate: float, rng: random.Random) -> None:
+    """Write a synthetic iperf2 probe file holding `duration` one second samples"""
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(IPERF_HEADER) + "\n")
+        for second in range(duration):
+            f.write(iperf_sample(second, data_rate, rng))
+            if rng.random() < 0.01:
+                f.write(
+                    f"[  1] {second:.4f}-{second + 1:.4f} sec  1 datagrams received out-of-order\n")
+        f.write(
+            f"[  1] 0.0000-{duration:.4f} sec  0 Bytes  0 bits/sec   0.000 ms 0/1 (0%) 0.000/0.000/0.000/0.000 ms 0 pps  0.00\n")
+
+
+def measure(function: Callable, *args, **kwargs) -> Tuple[object, float, int]:
+    """
+    Run `function` and return its result, the wall time in seconds and the peak memory in bytes,
+    the peak memory is traced on a second run so the tracing overhead does not skew the timing
+    """
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def write_receipes(folder: str, name: str, scenario_type: str, ues: int, slices: int, apps: int,
+                   duration: int, iterations: int, rng: random.Random) -> None:
+    """
+    Write the synthetic results of scenario `name` in the receipes folder `folder` as a run
+    would: its manifest, the iteration count and the probe files of every UE, slice and
+    application of each iteration. Slice `k` runs the `apps` applications following
+    the k-th one of APPLICATIONS
+    """
+
+    receipes = os.path.join(folder, name)
+    manifest = {"name": name, "type": scenario_type, "duration": duration,
+                "users": ues, "slices": [], "networks": {}}
+    for k in range(slices):
+        network = ipaddress.IPv4Network(f"10.{k // 256}.{k % 256}.0/24")
+        manifest["slices"].append({
+            "sst": "1",
+            "sd": f"{k:06x}",
+            "data_network": f"internet{k}",
+            "start": 0,
+            "end": duration,
+            "ue_network": str(network),
+            "applications": [{"name": APPLICATIONS[(k + a) % len(APPLICATIONS)][0],
+                              "data_rate": APPLICATIONS[(k + a) % len(APPLICATIONS)][1]}
+                             for a in range(apps)]
+        })
+        manifest["networks"][f"ue-network-slice-{k}"] = str(network)
+
+    yam = yaml.YAML()
+    yam.indent(sequence=4, offset=2)
+    os.makedirs(receipes, exist_ok=True)
+    with codecs.open(os.path.join(receipes, "manifest.yaml"), "w", encoding="utf-8") as manifest_file:
+        yam.dump(manifest, manifest_file)
+    with codecs.open(os.path.join(receipes, "iterations.yaml"), "w", encoding="utf-8") as iterations_file:
+        yam.dump({"iterations": iterations}, iterations_file)
+
+    for i in range(iterations):
+        path = os.path.join(receipes, f"iteration-{i}")
+        os.makedirs(path, exist_ok=True)
+        for k in range(slices):
+            for j in range(ues):
+                for a in range(apps):
+                    application, data_rate, scale = APPLICATIONS[(
+                        k + a) % len(APPLICATIONS)]
+                    write_probe_file(os.path.join(path, f"ue-{j}_{application}_{k}_probes.txt"),
+                                     duration, data_rate * scale, rng)
+
+
+def synthetic_definition(template_file: str, scenario: str, ues: int, links: int, slices: int) -> dict:
+    """
+    Return a definition of `ues` UEs, `links` links and `slices` slices built from scenario `scenario`
+    of the template file `template_file`: link `i` copies the link `i` of the scenario and slice `k`
+    copies the slice `k` of the scenario, both cycling over the scenario ones, the slices being spread
+    in order over the links. The default link of the scenario stays the default one, or the last link when it is cut
+    """
+
+    with codecs.open(template_file, "r", encoding="utf-8") as template:
+        definition = copy.deepcopy(yaml.YAML(typ="safe").load(template)[scenario])
+    if slices < links:
+        raise ValueError(f"{slices} slices cannot be spread over {links} links")
+
+    templates = definition["links"]
+    template_slices = [s for link in templates for s in link["slices"]]
+    default = min([i for i in range(len(templates)) if templates[i]["default"]] + [len(templates) - 1])
+    definition["user"] = ues
+    definition["links"] = []
+    for i in range(links):
+        link = copy.deepcopy(templates[i % len(templates)])
+        link["default"] = i == min(default, links - 1)
+        link["slices"] = []
+        definition["links"].append(link)
+    for k in range(slices):
+        definition["links"][k * links // slices]["slices"].append(
+            copy.deepcopy(template_slices[k % len(template_slices)]))
+    return definition
@@ -0,0 +1,163 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import codecs
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from ruamel import yaml
+from . import write_receipes, measure
+from source.testbed.testbed import Testbed
+from source.evaluator.saw_suaw_evaluator import SSEvaluator, use_agg
+from source.evaluator.statistics import Statistics
+from source.evaluator.fairness import Fairness
+
+logging.basicConfig(level=logging.INFO,
+                    format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
+
+SCENARIO = "benchmark-scenario"
+
+
+def load(receipes_folder: str) -> Testbed:
+    testbed = Testbed.from_manifest(receipes_folder, SCENARIO)
+    testbed.read_iterations(receipes_folder)
+    return testbed
+
+
+def cold_parse(evaluator: SSEvaluator, testbed: Testbed):
+    """Parse the probe files into an empty probe cache"""
+
+    shutil.rmtree(f"{testbed.receipes}/cache", ignore_errors=True)
+    return evaluator.parse_store(testbed)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the evaluation pipeline on synthetic receipes")
+    parser.add_argument("--ues", type=int, default=9,
+                        help="number of UEs")
+    parser.add_argument("--slices", type=int, default=3,
+                        help="number of slices")
+    parser.add_argument("--apps", type=int, default=2, choices=[1, 2, 3],
+                        help="number of applications of each slice")
+    parser.add_argument("--duration", type=int, default=240,
+                        help="duration of the slices in seconds")
+    parser.add_argument("--iterations", type=int, default=3,
+                        help="number of iterations")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes parsing the probe files and rendering the figures, the memory of the workers is not traced")
+    parser.add_argument("--points", type=int, default=None,
+                        help="downsample each plotted series to at most this number of points")
+    parser.add_argument("--receipes", type=str, default=None,
+                        help="keep the synthetic receipes in this folder and reuse them on the next runs")
+    parser.add_argument("--output", type=str, default=None,
+                        help="write the measures to this YAML file to compare them between revisions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.ues < 1 or args.slices < 1 or args.duration < 1 or args.iterations < 1:
+        logging.error(
+            "UEs, slices, duration and iterations must be positive, I QUIT !")
+        sys.exit(1)
+
+    use_agg()
+    folder = args.receipes if args.receipes != None else tempfile.mkdtemp()
+    files = args.ues * args.slices * args.apps * args.iterations
+    measures = {}
+
+    def report(stage: str, elapsed: float, peak: int = None) -> None:
+        measures[stage] = {"seconds": round(elapsed, 6),
+                           "peak_mb": None if peak == None else round(peak / 1e6, 3)}
+        memory = "" if peak == None else f", peak {peak / 1e6:.1f} MB"
+        logging.info(f"{stage:>12}: {elapsed:.3f} s{memory}")
+
+    try:
+        logging.info(
+            f"{args.ues} UEs, {args.slices} slices, {args.apps} applications per slice, {args.duration} s, {args.iterations} iterations: {files} probe files")
+
+        if os.path.isfile(os.path.join(folder, SCENARIO, "manifest.yaml")):
+            logging.info(f"Reusing the synthetic receipes of {folder}")
+        else:
+            start = time.perf_counter()
+            write_receipes(folder, SCENARIO, "slice-aware", args.ues, args.slices, args.apps,
+                           args.duration, args.iterations, random.Random(args.seed))
+            report("receipes", time.perf_counter() - start)
+
+        testbed, elapsed, peak = measure(load, folder)
+        report("load", elapsed, peak)
+
+        evaluator = SSEvaluator([testbed], [(0, 0)], args.jobs,
+                                cache=False, points=args.points)
+        store, elapsed, peak = measure(evaluator.parse_store, testbed)
+        report("parse", elapsed, peak)
+        measures["parse"]["samples_per_second"] = round(
+            files * args.duration / elapsed)
+
+        cached = SSEvaluator([testbed], [(0, 0)], args.jobs, cache=True)
+        _, elapsed, peak = measure(cold_parse, cached, testbed)
+        report("cache write", elapsed, peak)
+        _, elapsed, peak = measure(cached.parse_store, testbed)
+        report("cache read", elapsed, peak)
+
+        slices, elapsed, peak = measure(evaluator.build_slices, store, True)
+        report("aggregate", elapsed, peak)
+
+        statistics, elapsed, peak = measure(Statistics.from_slices, slices)
+        report("statistics", elapsed, peak)
+
+        fairness, elapsed, peak = measure(Fairness.from_store, store, slices)
+        report("fairness", elapsed, peak)
+
+        # mean_slices reduces the slices in place, each run needs its own copy
+        copies = [slices, evaluator.build_slices(store, True)]
+        slices, elapsed, peak = measure(
+            lambda: evaluator.mean_slices(copies.pop(), testbed))
+        report("mean", elapsed, peak)
+
+        output_path = os.path.join(folder, "eval")
+        os.makedirs(output_path, exist_ok=True)
+        evaluated = {0: (slices, statistics, fairness)}
+        figures, elapsed, peak = measure(
+            evaluator.pair_figures, 0, 0, evaluated, output_path, False)
+        report("figures", elapsed, peak)
+
+        _, elapsed, peak = measure(evaluator.render, figures)
+        report("render", elapsed, peak)
+
+        if args.output != None:
+            yam = yaml.YAML()
+            yam.indent(sequence=4, offset=2)
+            with codecs.open(args.output, "w", encoding="utf-8") as output_file:
+                yam.dump({"ues": args.ues, "slices": args.slices, "apps": args.apps,
+                          "duration": args.duration, "iterations": args.iterations,
+                          "jobs": args.jobs, "points": args.points, "stages": measures}, output_file)
+    finally:
+        if args.receipes == None:
+            shutil.rmtree(folder, ignore_errors=True)
@@ -0,0 +1,211 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import codecs
+import copy
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from ruamel import yaml
+from . import synthetic_definition
+from source.testbed import Selector
+from source.testbed.testbed import Testbed
+from source.utils.writer import Writer
+from source.utils.emitter import dump, round_trip, Unsupported
+
+logging.basicConfig(level=logging.INFO,
+                    format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
+
+SCENARIO = "benchmark-scenario"
+
+# wall time of each Writer.commit, the files are serialized and written there
+COMMITS = []
+
+
+def timed_commit(commit):
+    def wrapper(self):
+        start = time.perf_counter()
+        affected = commit(self)
+        COMMITS.append(time.perf_counter() - start)
+        return affected
+    return wrapper
+
+
+def generate(definition: dict, scenario_folder: str, configuration_folder: str, jobs: int, phase=None) -> Testbed:
+    """Generate the testbed of `definition` in `scenario_folder` as nt.py generate does, `phase` runs each phase"""
+
+    # the scenario completes its definition in place
+    scenario = Selector.get_scenario(copy.deepcopy(definition), SCENARIO)
+    testbed = Testbed(scenario)
+    r, cont, conf = testbed.make_scenario_folders(SCENARIO, scenario_folder)
+    scenario.set_path(r, cont, configuration_folder, conf, scenario_folder)
+    testbed.generate(jobs, phase)
+    return testbed
+
+
+def check(folder: str) -> int:
+    """
+    Emit the plain content of every YAML file of `folder` with the plain emitter and
+    with the ruamel round-trip emitter, return the number of documents differing
+    """
+
+    differing = 0
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if not name.endswith(".yaml"):
+                continue
+            with codecs.open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                document = yaml.YAML(typ="safe").load(f)
+            try:
+                plain = dump(document)
+            except Unsupported:
+                continue
+            stream = io.StringIO()
+            round_trip().dump(document, stream)
+            if plain != stream.getvalue():
+                logging.error(f"{name} differs with the plain emitter")
+                differing += 1
+    return differing
+
+
+def digest(folder: str) -> str:
+    """Return a digest of the path, permissions and content of every file of `folder`"""
+
+    sha = hashlib.sha256()
+    for root, folders, files in os.walk(folder):
+        folders.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            sha.update(os.path.relpath(path, folder).encode())
+            sha.update(oct(os.stat(path).st_mode).encode())
+            with open(path, "rb") as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the testbed generation with sequential and parallel file writing")
+    parser.add_argument("--scenario", type=str, default="saw-ntn",
+                        help="scenario of the template file to scale")
+    parser.add_argument("--ues", type=int, default=96,
+                        help="number of UEs, the default saw-ntn testbed holds 500 containers")
+    parser.add_argument("--links", type=int, default=2,
+                        help="number of links")
+    parser.add_argument("--slices", type=int, default=3,
+                        help="number of slices spread over the links")
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help="number of worker processes writing the files, compared with a single process")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of generations of each configuration, the best one is reported")
+    parser.add_argument("--template", type=str, default="template/scenario.yaml",
+                        help="template file holding the scenario")
+    parser.add_argument("--configuration", type=str, default="config/services",
+                        help="folder of the service configuration templates")
+    parser.add_argument("--output", type=str, default=None,
+                        help="write the measures to this YAML file to compare them between revisions")
+    parser.add_argument("--check", action="store_true", default=False,
+                        help="check that the plain emitter writes every YAML file of the testbed as the ruamel round-trip emitter")
+    args = parser.parse_args()
+
+    if args.ues < 1 or args.links < 1 or args.slices < args.links or args.jobs < 1 or args.repeat < 1:
+        logging.error(
+            "UEs, links, jobs and repeat must be positive and each link needs a slice, I QUIT !")
+        sys.exit(1)
+
+    definition = synthetic_definition(
+        args.template, args.scenario, args.ues, args.links, args.slices)
+    configuration_folder = os.path.abspath(args.configuration)
+    folder = tempfile.mkdtemp()
+    Writer.commit = timed_commit(Writer.commit)
+    measures = {}
+    digests = {}
+
+    try:
+        for jobs in sorted(set([1, args.jobs])):
+            totals = []
+            del COMMITS[:]
+            for _ in range(args.repeat):
+                # without the previous generation every file is written
+                shutil.rmtree(os.path.join(folder, SCENARIO),
+                              ignore_errors=True)
+                # the generation logs would dominate the measures
+                logging.disable(logging.INFO)
+                start = time.perf_counter()
+                testbed = generate(definition, folder,
+                                   configuration_folder, jobs)
+                totals.append(time.perf_counter() - start)
+                logging.disable(logging.NOTSET)
+            containers = len(testbed.scenario.repository.services)
+            files = sum([len(f) for _, _, f in os.walk(
+                os.path.join(folder, SCENARIO))])
+            # the testbeds embed their absolute path, they are all generated in the same folder
+            digests[jobs] = digest(os.path.join(folder, SCENARIO))
+            write = min(COMMITS)
+
+            # the same generation again only hashes the files
+            logging.disable(logging.INFO)
+            start = time.perf_counter()
+            testbed = generate(definition, folder, configuration_folder, jobs)
+            unchanged = time.perf_counter() - start
+            logging.disable(logging.NOTSET)
+            if len(testbed.scenario.repository.writer.affected) > 0:
+                logging.error(
+                    "The unchanged generation affected some services, I QUIT !")
+                sys.exit(1)
+
+            measures[jobs] = {"generate_seconds": round(min(totals), 6),
+                              "write_seconds": round(write, 6),
+                              "unchanged_seconds": round(unchanged, 6)}
+            logging.info(
+                f"{jobs:>3} jobs: {containers} containers, {files} files, generate {min(totals):.3f} s, write {write:.3f} s, unchanged generate {unchanged:.3f} s")
+
+        if args.check and check(os.path.join(folder, SCENARIO)) > 0:
+            logging.error(
+                "The plain emitter differs from the round-trip emitter, I QUIT !")
+            sys.exit(1)
+        if len(set(digests.values())) != 1:
+            logging.error(
+                "The testbeds written with different numbers of jobs differ, I QUIT !")
+            sys.exit(1)
+        if args.jobs > 1:
+            logging.info(
+                f"Writing speedup with {args.jobs} jobs: {measures[1]['write_seconds'] / measures[args.jobs]['write_seconds']:.2f}x")
+
+        if args.output != None:
+            yam = yaml.YAML()
+            yam.indent(sequence=4, offset=2)
+            with codecs.open(args.output, "w", encoding="utf-8") as output_file:
+                yam.dump({"scenario": args.scenario, "ues": args.ues, "links": args.links, "slices": args.slices,
+                          "containers": containers, "files": files, "jobs": measures}, output_file)
+    finally:
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(folder, ignore_errors=True)
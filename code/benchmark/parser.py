@@ -0,0 +1,164 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import codecs
+import logging
+import os
+import random
+import re
+import tempfile
+import numpy as np
+from . import write_probe_file, measure
+from source.evaluator.parser import Parser
+
+logging.basicConfig(level=logging.INFO,
+                    format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
+
+
+class Probe(object):
+
+    def __init__(self, throughput, trip_time, loss, jitter):
+        self.throughput = throughput
+        self.trip_time = trip_time
+        self.loss = loss
+        self.jitter = jitter
+
+
+class Dataset(object):
+
+    def __init__(self):
+        self.slice = None
+        self.probes = []
+        self.application = None
+        self.legend = None
+        self.legend_pdb = None
+
+    def order(self, start: int, end: int, max_duration: int):
+        if len(self.probes) == 0:
+            self.probes = [Probe(0, 100, 100, 0) for i in range(max_duration)]
+            return
+        k = 0
+        y = np.zeros(max_duration, dtype=Probe)
+        for i in range(start, end):
+            y[i] = self.probes[k]
+            k += 1
+        self.probes = y
+
+
+class LegacyParser(object):
+    """
+    The parser of the evaluator before the streaming one, kept verbatim: the three parse_*_application
+    methods were identical, parse_web_application stands for them
+    """
+
+    @classmethod
+    def parse_throughput(cls, thpt):
+        return float(thpt) / 1000 / 1000
+
+    @classmethod
+    def parse_jitter(cls, jitter):
+        return float(jitter)
+
+    @classmethod
+    def parse_trip_time(cls, tt):
+        return float(tt)
+
+    @classmethod
+    def parse_loss(cls, loss):
+        regex = r"([0-9]+)"
+        rate = re.findall(regex, loss)[0]
+        return float(rate)
+
+    @classmethod
+    def parse_web_application(cls, lines, duration):
+        k = 0
+        dataset = Dataset()
+        for line in lines:
+            if "received" not in line and k < duration:
+                l = line.strip().split()
+                thpt, jitter, error_rate, rt = l[6], l[8], l[11], l[12].split(
+                    "/")[0]
+                dataset.probes.append(
+                    Probe(cls.parse_throughput(thpt),
+                          cls.parse_trip_time(rt),
+                          cls.parse_loss(error_rate),
+                          cls.parse_jitter(jitter),
+                          )
+                )
+                k += 1
+        return dataset
+
+
+def legacy_parse(path: str, duration: int) -> Dataset:
+    """Parse a probe file as the evaluator did before the streaming parser, Probe objects placed in the slice window"""
+
+    lines = None
+    with codecs.open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    dataset = LegacyParser.parse_web_application(lines[8::], duration)
+    dataset.order(0, duration, duration)
+    return dataset
+
+
+def streaming_parse(path: str, duration: int) -> int:
+    return Parser.parse_file(path, duration, Parser.allocate(duration))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark of the iperf2 probe parser")
+    parser.add_argument("--hours", type=float, default=4,
+                        help="duration of each synthetic log in hours")
+    parser.add_argument("--files", type=int, default=4,
+                        help="number of synthetic logs to parse")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    duration = int(args.hours * 3600)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, f"ue-{i}_web_0_probes.txt")
+                 for i in range(args.files)]
+        for path in paths:
+            write_probe_file(path, duration, 3e6, rng)
+        size = sum(os.path.getsize(path) for path in paths)
+        logging.info(
+            f"{args.files} synthetic logs of {duration} samples ({size / 1e6:.1f} MB)")
+
+        totals = {}
+        for name, function in [("legacy", legacy_parse), ("streaming", streaming_parse)]:
+            total = 0
+            peak = 0
+            for path in paths:
+                _, elapsed, p = measure(function, path, duration)
+                total += elapsed
+                peak = max(peak, p)
+            logging.info(
+                f"{name:>10}: {total:.3f} s, {args.files * duration / total / 1e6:.2f} M samples/s, peak {peak / 1e6:.1f} MB")
+            totals[name] = total
+        logging.info(
+            f"streaming parser {totals['legacy'] / totals['streaming']:.1f}x faster than the former one")
@@ -0,0 +1,197 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+from . import synthetic_definition
+from .generate import generate, SCENARIO
+from source.testbed.testbed import Testbed
+
+logging.basicConfig(level=logging.INFO,
+                    format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
+
+
+def points(ues: List[int], links: List[int], slices: List[int]) -> List[Tuple[int, int, int]]:
+    """
+    Return the (UEs, links, slices) points sweeping each axis from the first point, the
+    links axis keeps the number of slices per link, every link carries at least a slice
+    """
+
+    base_ues, base_links, base_slices = ues[0], links[0], slices[0]
+    sweep = [(u, base_links, base_slices) for u in ues]
+    sweep += [(base_ues, l, max(l, l * base_slices // base_links))
+              for l in links]
+    sweep += [(base_ues, base_links, max(s, base_links)) for s in slices]
+    return sorted(set(sweep), key=sweep.index)
+
+
+def timed(seconds: Dict[str, float]):
+    """Return a phase runner summing in `seconds` the wall time of the tasks of each phase"""
+
+    def phase(name: str, function):
+        start = time.perf_counter()
+        result = function()
+        seconds[name] = seconds.get(name, 0) + time.perf_counter() - start
+        return result
+    return phase
+
+
+def traced(peaks: Dict[str, int]):
+    """Return a phase runner recording in `peaks` the largest peak memory allocated by a task of each phase"""
+
+    def phase(name: str, function):
+        tracemalloc.start()
+        try:
+            result = function()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[name] = max(peaks.get(name, 0), peak)
+        finally:
+            tracemalloc.stop()
+        return result
+    return phase
+
+
+def measure(definition: dict, folder: str, configuration_folder: str, jobs: int) -> Dict:
+    """
+    Generate the testbed of `definition` from scratch in `folder` twice, timing each phase on
+    the first generation and tracing its peak memory on the second one so the tracing overhead
+    does not skew the timing. The tasks run concurrently with `jobs` above 1, their memory is
+    then not traced
+    """
+
+    seconds, peaks = {}, {}
+    runners = [timed(seconds)] if jobs > 1 else [timed(seconds), traced(peaks)]
+    for phase in runners:
+        shutil.rmtree(os.path.join(folder, SCENARIO), ignore_errors=True)
+        # the generation logs would dominate the measures
+        logging.disable(logging.INFO)
+        try:
+            testbed: Testbed = generate(
+                definition, folder, configuration_folder, jobs, phase)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    files = sum([len(f) for _, _, f in os.walk(
+        os.path.join(folder, SCENARIO))])
+    return {
+        "services": len(testbed.scenario.repository.services),
+        "files": files,
+        "seconds": round(sum(seconds.values()), 6),
+        "phases": {name: {"seconds": round(seconds[name], 6),
+                          "peak_mb": round(peaks[name] / 1e6, 3) if name in peaks else None}
+                   for name in seconds}
+    }
+
+
+def compare(point: Dict, baseline: Dict) -> None:
+    """Log the time of each phase of `point` relative to the same point of `baseline`"""
+
+    key = (point["ues"], point["links"], point["slices"])
+    for previous in baseline["points"]:
+        if (previous["ues"], previous["links"], previous["slices"]) != key:
+            continue
+        ratios = [f"total {point['seconds'] / previous['seconds']:.2f}x"]
+        for name, measures in point["phases"].items():
+            before = previous["phases"].get(name)
+            if before != None and before["seconds"] > 0:
+                ratios.append(
+                    f"{name} {measures['seconds'] / before['seconds']:.2f}x")
+        logging.info(f"    versus baseline: {', '.join(ratios)}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the time and peak memory of each phase of the testbed generation")
+    parser.add_argument("--scenario", type=str, default="saw-ntn",
+                        help="scenario of the template file the definitions are synthesized from")
+    parser.add_argument("--ues", type=int, nargs="+", default=[9, 90, 450],
+                        help="numbers of UEs swept, the first one is used on the other axes")
+    parser.add_argument("--links", type=int, nargs="+", default=[2, 8, 32],
+                        help="numbers of links swept, the first one is used on the other axes")
+    parser.add_argument("--slices", type=int, nargs="+", default=[3, 12, 48],
+                        help="numbers of slices swept, the first one is used on the other axes")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of threads running the service tasks and of worker processes writing the files, the memory is not traced above 1")
+    parser.add_argument("--template", type=str, default="template/scenario.yaml",
+                        help="template file holding the scenario")
+    parser.add_argument("--configuration", type=str, default="config/services",
+                        help="folder of the service configuration templates")
+    parser.add_argument("--output", type=str, default="generation-phases.json",
+                        help="JSON file the measures are written to")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="JSON file written by a previous revision to compare the phase times with")
+    args = parser.parse_args()
+
+    if min(args.ues + args.links + args.slices) < 1 or args.jobs < 1:
+        logging.error(
+            "UEs, links, slices and jobs must be positive, I QUIT !")
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline != None:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    configuration_folder = os.path.abspath(args.configuration)
+    folder = tempfile.mkdtemp()
+    results = {"scenario": args.scenario, "jobs": args.jobs,
+               "python": platform.python_version(), "points": []}
+
+    try:
+        # the service templates are parsed once per process, by a generation left out of the measures
+        measure(synthetic_definition(args.template, args.scenario, args.ues[0], args.links[0], args.slices[0]),
+                folder, configuration_folder, args.jobs)
+
+        for ues, links, slices in points(args.ues, args.links, args.slices):
+            definition = synthetic_definition(
+                args.template, args.scenario, ues, links, slices)
+            point = {"ues": ues, "links": links, "slices": slices}
+            point.update(measure(definition, folder,
+                                 configuration_folder, args.jobs))
+            results["points"].append(point)
+
+            logging.info(
+                f"{ues} UEs, {links} links, {slices} slices: {point['services']} services, {point['files']} files, {point['seconds']:.3f} s")
+            for name, measures in point["phases"].items():
+                memory = "" if measures["peak_mb"] == None else f", peak {measures['peak_mb']:.1f} MB"
+                logging.info(
+                    f"    {name:>20}: {measures['seconds']:.3f} s{memory}")
+            if baseline != None:
+                compare(point, baseline)
+
+            # written after every point so an interrupted sweep keeps its measures
+            with open(args.output, "w", encoding="utf-8") as output_file:
+                json.dump(results, output_file, indent=2)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
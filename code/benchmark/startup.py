@@ -0,0 +1,118 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+logging.basicConfig(level=logging.INFO,
+                    format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
+
+# command line of each subcommand stopping right after its imports and the budget of the
+# imports it adds to the interpreter startup, unknown scenarios make the subcommands exit
+# before any real work. The budgets are ratios of the import time of the interpreter startup
+# measured on the same machine, about 50% above the measured ratios so they hold on noisy runs.
+# A budget is never below FLOOR, the few milliseconds of the lightest subcommands being mostly noise
+FLOOR = 50
+COMMANDS = [
+    ("help", ["--help"], 0.75),
+    ("images", ["images", "--build", "benchmark-unknown-image"], 6),
+    ("generate", ["generate", "-s", "benchmark-unknown-scenario"], 2.5),
+    ("run", ["run", "-s", "benchmark-unknown-scenario"], 2.5),
+    ("evaluate", ["evaluate", "-s1", "benchmark-unknown-scenario",
+                  "-s2", "benchmark-unknown-scenario"], 22),
+    ("analyze", ["analyze", "-s", "benchmark-unknown-scenario"], 10),
+]
+
+
+def import_time(stderr: str) -> float:
+    """Return the cumulative time in milliseconds of the top level imports reported by -X importtime"""
+
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        # nested imports are indented below their parent
+        if len(fields) == 3 and fields[2].startswith(" ") and not fields[2].startswith("  "):
+            try:
+                total += int(fields[1])
+            except ValueError:
+                continue
+    return total / 1000
+
+
+def startup(arguments: list) -> tuple:
+    """Run python with `arguments` and return its wall time and import time in milliseconds"""
+
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime"] + arguments,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, import_time(process.stderr)
+
+
+def median(arguments: list, repeat: int) -> tuple:
+    runs = [startup(arguments) for _ in range(repeat)]
+    return statistics.median([r[0] for r in runs]), statistics.median([r[1] for r in runs])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Startup time benchmark of the nt.py subcommands, run from the code folder")
+    parser.add_argument("--repeat", type=int, default=7,
+                        help="number of runs of each subcommand, their median is kept")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the import budgets, for slower machines")
+    args = parser.parse_args()
+
+    if not os.path.isfile("nt.py"):
+        logging.error("nt.py not found, run the benchmark from the code folder, I QUIT !")
+        sys.exit(1)
+
+    # the interpreter startup (site, encodings...) is measured once and left out of the budgets
+    base_elapsed, base_imports = median(["-c", "pass"], args.repeat)
+    logging.info(
+        f"{'python':>10}: {base_elapsed:7.1f} ms wall, {base_imports:7.1f} ms imports")
+
+    over = []
+    for name, arguments, budget in COMMANDS:
+        elapsed, imports = median(["nt.py"] + arguments, args.repeat)
+        elapsed -= base_elapsed
+        imports -= base_imports
+        limit = max(budget * base_imports, FLOOR) * args.scale
+        status = "ok" if imports <= limit else "OVER BUDGET"
+        logging.info(
+            f"{name:>10}: {elapsed:7.1f} ms wall, {imports:7.1f} ms imports ({imports / base_imports:.1f}x python), budget {limit:.0f} ms {status}")
+        if imports > limit:
+            over.append(name)
+
+    if len(over) > 0:
+        logging.error(f"Import budget exceeded for {', '.join(over)}")
+        sys.exit(1)
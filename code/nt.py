@@ -28,11 +28,7 @@ import configparser
 import os
 import sys
 import codecs
-from ruamel.yaml import YAML
-from source.builder.builder import Builder
-from source.testbed import Selector
-from source.testbed.testbed import Testbed
-from source.evaluator.saw_suaw_evaluator import SSEvaluator
+import itertools
 
 logging.basicConfig(level=logging.INFO,
                     format='[%(asctime)s-%(name)s] - [%(levelname)s] - %(message)s')
@@ -69,6 +65,10 @@ if __name__ == "__main__":
         "generate", help="generate the testbed corresponding to a scenario")
     generate_parser.add_argument(
         "-s", "--scenario", nargs="*", help="Specify scenarios for the testbed generation", metavar=('<scenarios name>'), required=True)
+    generate_parser.add_argument("-j", "--jobs", help="Number of threads running the generation tasks and of worker processes writing the testbed files",
+                                 type=int, default=1, metavar=('<workers>'), required=False)
+    generate_parser.add_argument("--restart", help="Recreate the containers affected since the previous generation of a running testbed",
+                                 action="store_true", default=False, required=False)
 
     # Run a specific scenario
     run_parser = subparsers.add_parser(
@@ -79,22 +79,60 @@ if __name__ == "__main__":
                             type=int, default=1, metavar=('<iteration number>'), required=False)
     run_parser.add_argument("--pcap", help="Generate a .pcap file for the testbed", action="store_true",
                             default=False, required=False)
+    run_parser.add_argument("--monitor", help="Follow the probe files while the scenario runs, log live KPIs and write them to monitor.json in the receipes folder",
+                            action="store_true", default=False, required=False)
+    run_parser.add_argument("--window", help="Number of seconds of the live KPI rolling windows (default 10)",
+                            type=int, default=10, metavar=('<seconds>'), required=False)
+    run_parser.add_argument("-j", "--jobs", help="Number of threads running the generation tasks and of worker processes writing the testbed files",
+                            type=int, default=1, metavar=('<workers>'), required=False)
 
     # Evaluate a specific scenario
     evaluate_parser = subparsers.add_parser(
-        "evaluate", help="evalute the performances of two scenarios and plot results")
+        "evaluate", help="evalute the performances of scenarios by pair and plot results")
     evaluate_parser.add_argument("-s1", "--scenario-1", help="Specify the first scenario",
-                                 type=str, default=None, metavar=('<scenario name>'), required=True)
+                                 type=str, default=None, metavar=('<scenario name>'), required=False)
     evaluate_parser.add_argument("-s2", "--scenario-2", help="Specify the second scenario",
-                                 type=str, default=None, metavar=('<scenario name>'), required=True)
+                                 type=str, default=None, metavar=('<scenario name>'), required=False)
+    evaluate_parser.add_argument("-s", "--scenarios", help="Specify the scenarios to compare, every pair is evaluated unless --pair is given",
+                                 nargs="*", type=str, default=[], metavar=('<scenario name>'), required=False)
+    evaluate_parser.add_argument("-p", "--pair", help="Specify a pair of scenarios to compare, can be repeated",
+                                 nargs=2, action="append", type=str, default=None, metavar=('<scenario name>'), required=False)
     evaluate_parser.add_argument(
         "--contribution", help="generate figure tikz code for a contribution (use tikzplotlib)", action="store_true", default=False)
     evaluate_parser.add_argument(
         "--plot", help="plot figures", action="store_true", default=False)
+    evaluate_parser.add_argument("-j", "--jobs", help="Number of worker processes parsing the probe files",
+                                 type=int, default=1, metavar=('<workers>'), required=False)
+    evaluate_parser.add_argument("--no-cache", help="do not use the parsed probe cache stored in the receipes folder",
+                                 action="store_true", default=False)
+    evaluate_parser.add_argument("--incremental", help="only merge the newly completed iterations into the aggregate stored in the receipes folder",
+                                 action="store_true", default=False)
+    evaluate_parser.add_argument("--confidence", help="shade the 95%% confidence interval across iterations around each curve",
+                                 action="store_true", default=False)
+    evaluate_parser.add_argument("--points", help="Downsample each plotted series to at most this number of points, keeping its extremes",
+                                 type=int, default=None, metavar=('<points>'), required=False)
+    evaluate_parser.add_argument("--downsampling", help="Downsampling method used with --points (default lttb)",
+                                 type=str, default="lttb", choices=["lttb", "minmax"], required=False)
+    evaluate_parser.add_argument("--fairness", help="compute the fairness between the UEs of each QFI (Jain's index, best to worst UE spread and worst UE percentiles)",
+                                 action="store_true", default=False)
+
+    # Analyze the captures of a specific scenario
+    analyze_parser = subparsers.add_parser(
+        "analyze", help="analyze the .pcap files captured with run --pcap and compute per flow metrics")
+    analyze_parser.add_argument("-s", "--scenario", help="Specify the scenarios to analyze", nargs="*",
+                                type=str, default=None, metavar=('<scenario name>'), required=True)
+    analyze_parser.add_argument("-j", "--jobs", help="Number of worker processes analyzing chunks of each capture",
+                                type=int, default=1, metavar=('<workers>'), required=False)
+    analyze_parser.add_argument("--window", help="Seconds during which a packet is followed across capture points before being considered lost (default 5)",
+                                type=float, default=5.0, metavar=('<seconds>'), required=False)
 
     args = parser.parse_args()
 
+    # each subcommand only imports the modules it uses to keep the startup fast
+
     if args.subparser_name == "images":
+        from source.builder.builder import Builder
+
         path = os.path.abspath(config.get("images", "dockerfile"))
         b = Builder(path)
 
@@ -116,6 +154,13 @@ if __name__ == "__main__":
             sys.exit(0)
 
     elif args.subparser_name == "generate":
+        from ruamel.yaml import YAML
+        from source.testbed import Selector
+        from source.testbed.testbed import Testbed
+
+        if args.jobs < 1:
+            logging.error(f"Invalid number of workers {args.jobs}, I QUIT !")
+            sys.exit(1)
 
         template_folder = os.path.abspath(config.get("scenario", "template"))
         template_file = f"{template_folder}/scenario.yaml"
@@ -139,7 +184,11 @@ if __name__ == "__main__":
                     s, scenario_folder)
                 scenario.set_path(
                     r, cont, configuration_folder, conf, scenario_folder)
-                testbed.generate()
+                affected = testbed.generate(args.jobs)
+                if args.restart and len(affected) > 0:
+                    from source.utils.utils import restart_services
+                    restart_services(
+                        f"{scenario_folder}/{s}/docker-compose.yaml", affected)
             else:
                 logging.error(
                     f"No scenario corresponding to {s} in the template file, moving to next scenario")
@@ -147,6 +196,13 @@ if __name__ == "__main__":
         sys.exit(0)
 
     elif args.subparser_name == "run":
+        from ruamel.yaml import YAML
+        from source.testbed import Selector
+        from source.testbed.testbed import Testbed
+
+        if args.jobs < 1:
+            logging.error(f"Invalid number of workers {args.jobs}, I QUIT !")
+            sys.exit(1)
 
         template_folder = os.path.abspath(config.get("scenario", "template"))
         template_file = f"{template_folder}/scenario.yaml"
@@ -171,9 +227,17 @@ if __name__ == "__main__":
                     s, scenario_folder)
                 scenario.set_path(
                     r, cont, configuration_folder, conf, scenario_folder)
-                testbed.generate()
+                testbed.generate(args.jobs)
                 testbed.make_receipes_folders(receipes_folder, args.iterations)
-                testbed.run(args.iterations, args.pcap)
+                testbed.write_manifest()
+                monitor = None
+                if args.monitor or scenario.definition.get("abort", None) != None:
+                    from source.evaluator.monitor import ProbeMonitor, AbortRules
+                    rules = AbortRules.from_definition(
+                        scenario.definition.get("abort", None))
+                    monitor = ProbeMonitor(scenario.repository.get_misc("slices"), len(scenario.repository.get_misc("users")),
+                                           f"{testbed.receipes}/monitor.json" if args.monitor else None, args.window, rules=rules)
+                testbed.run(args.iterations, args.pcap, monitor)
             else:
                 logging.error(
                     f"No scenario corresponding to {s} in the template file, moving to next scenario")
@@ -181,6 +245,18 @@ if __name__ == "__main__":
         sys.exit(0)
 
     elif args.subparser_name == "evaluate":
+        from ruamel.yaml import YAML
+        from source.testbed.testbed import Testbed
+        from source.evaluator.saw_suaw_evaluator import SSEvaluator
+
+        if args.jobs < 1:
+            logging.error(f"Invalid number of workers {args.jobs}, I QUIT !")
+            sys.exit(1)
+
+        if args.points != None and args.points < 4:
+            logging.error(
+                f"Invalid number of points {args.points}, at least 4 points are required, I QUIT !")
+            sys.exit(1)
 
         template_folder = os.path.abspath(config.get("scenario", "template"))
         template_file = f"{template_folder}/scenario.yaml"
@@ -188,37 +264,138 @@ if __name__ == "__main__":
         configuration_folder = os.path.abspath(
             config.get("services", "configuration"))
         receipes_folder = os.path.abspath(config.get("scenario", "receipes"))
-        yaml = YAML()
-        if not os.path.isfile(template_file):
-            logging.error(f"No file {template_file} found, exiting...")
+
+        if (args.scenario_1 == None) != (args.scenario_2 == None):
+            logging.error(
+                f"-s1 and -s2 must be given together, I QUIT !")
             sys.exit(1)
 
-        with codecs.open(template_file) as file:
-            scenarios = yaml.load(file.read())
+        pairs = []
+        if args.scenario_1 != None:
+            pairs.append((args.scenario_1, args.scenario_2))
+        if args.pair != None:
+            pairs.extend([tuple(p) for p in args.pair])
+        elif args.scenario_1 == None:
+            pairs.extend(itertools.combinations(args.scenarios, 2))
+
+        scenarios_to_evaluate = list(args.scenarios)
+        for pair in pairs:
+            for s in pair:
+                if s not in scenarios_to_evaluate:
+                    scenarios_to_evaluate.append(s)
+
+        if len(pairs) == 0:
+            logging.error(
+                f"No pair of scenarios to evaluate, I QUIT !")
+            sys.exit(1)
 
-        scenarios_to_evaluate = [args.scenario_1, args.scenario_2]
         testbeds = []
+        scenarios = None
 
         for s in scenarios_to_evaluate:
-            scenario_conf = scenarios.get(s, None)
-            if scenario_conf != None:
+            testbed = Testbed.from_manifest(receipes_folder, s)
+            if testbed == None:
+                # results of a run predating the manifests, the testbed is generated again to describe them
+                logging.info(
+                    f"No run manifest for scenario {s}, generating the testbed")
+                if scenarios == None:
+                    if not os.path.isfile(template_file):
+                        logging.error(
+                            f"No file {template_file} found, exiting...")
+                        sys.exit(1)
+                    with codecs.open(template_file) as file:
+                        scenarios = YAML().load(file.read())
+                scenario_conf = scenarios.get(s, None)
+                if scenario_conf == None:
+                    logging.error(
+                        f"No scenario corresponding to {s} in the template file, I QUIT !")
+                    sys.exit(1)
+                # the scenarios and their schemas are only needed to generate the testbed again
+                from source.testbed import Selector
                 scenario = Selector.get_scenario(scenario_conf, s)
                 testbed = Testbed(scenario)
                 r, cont, conf = testbed.make_scenario_folders(
                     s, scenario_folder)
                 scenario.set_path(
                     r, cont, configuration_folder, conf, scenario_folder)
+                # -j sizes the pool parsing the probe files, not the generation
                 testbed.generate()
+            testbed.read_iterations(receipes_folder)
+            testbeds.append(testbed)
+
+        pairs = [(scenarios_to_evaluate.index(p[0]), scenarios_to_evaluate.index(p[1]))
+                 for p in pairs]
+        evaluator = SSEvaluator(
+            testbeds, pairs, args.jobs, not args.no_cache, args.incremental, args.confidence, args.points, args.downsampling, args.fairness)
+        evaluator.init_folder(receipes_folder)
+        evaluator.evaluate(args.contribution, args.plot)
+
+        sys.exit(0)
+
+    elif args.subparser_name == "analyze":
+        from ruamel.yaml import YAML
+        from source.testbed.testbed import Testbed
+        from source.evaluator.pcap import analyze_capture, write_report
+
+        if args.jobs < 1:
+            logging.error(f"Invalid number of workers {args.jobs}, I QUIT !")
+            sys.exit(1)
+
+        template_folder = os.path.abspath(config.get("scenario", "template"))
+        template_file = f"{template_folder}/scenario.yaml"
+        scenario_folder = os.path.abspath(config.get("scenario", "scenario"))
+        configuration_folder = os.path.abspath(
+            config.get("services", "configuration"))
+        receipes_folder = os.path.abspath(config.get("scenario", "receipes"))
+        scenarios = None
+
+        for s in args.scenario:
+            testbed = Testbed.from_manifest(receipes_folder, s)
+            if testbed == None:
+                logging.info(
+                    f"No run manifest for scenario {s}, generating the testbed")
+                if scenarios == None:
+                    if not os.path.isfile(template_file):
+                        logging.error(
+                            f"No file {template_file} found, exiting...")
+                        sys.exit(1)
+                    with codecs.open(template_file) as file:
+                        scenarios = YAML().load(file.read())
+                scenario_conf = scenarios.get(s, None)
+                if scenario_conf != None:
+                    # the scenarios and their schemas are only needed to generate the testbed again
+                    from source.testbed import Selector
+                    scenario = Selector.get_scenario(scenario_conf, s)
+                    testbed = Testbed(scenario)
+                    r, cont, conf = testbed.make_scenario_folders(
+                        s, scenario_folder)
+                    scenario.set_path(
+                        r, cont, configuration_folder, conf, scenario_folder)
+                    # -j sizes the pool analyzing the captures, not the generation
+                    testbed.generate()
+            if testbed != None:
+                scenario = testbed.scenario
                 testbed.read_iterations(receipes_folder)
-                testbeds.append(testbed)
+                networks = [str(sl.ue_network)
+                            for sl in scenario.repository.get_misc("slices")]
+                # reports are kept out of the iteration folders so their fingerprints stay untouched
+                reports = f"{testbed.receipes}/capture"
+                if not os.path.exists(reports):
+                    os.makedirs(reports)
+                for i in range(testbed.completed_iterations()):
+                    capture = f"{testbed.receipes}/iteration-{i}/capture.pcap"
+                    if not os.path.isfile(capture):
+                        logging.error(
+                            f"No capture for iteration {i} of scenario {s}, run the scenario with --pcap")
+                        continue
+                    analysis = analyze_capture(
+                        capture, networks, args.window, args.jobs)
+                    write_report(analysis, f"{reports}/iteration-{i}")
+                    logging.info(
+                        f"Capture of iteration {i} of scenario {s} analyzed")
             else:
                 logging.error(
                     f"No scenario corresponding to {s} in the template file, moving to next scenario")
-                sys.exit(1)
-
-        evaluator = SSEvaluator(testbeds[0], testbeds[1])
-        evaluator.init_folder(receipes_folder)
-        evaluator.evaluate(args.contribution, args.plot)
 
         sys.exit(0)
 
@@ -22,16 +22,24 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+from typing import List, Tuple
 from ..testbed.testbed import Testbed
 
 
 class Evaluator(object):
     """Generic Evaluator Class"""
 
-    def __init__(self, t1: Testbed, t2: Testbed) -> None:
-        self.t1 = t1
-        self.t2 = t2
-        self.output_path = None
+    def __init__(self, testbeds: List[Testbed], pairs: List[Tuple[int, int]], jobs: int = 1, cache: bool = True, incremental: bool = False, confidence: bool = False, points: int = None, downsampling: str = "lttb", fairness: bool = False) -> None:
+        self.testbeds = testbeds
+        self.pairs = pairs
+        self.jobs = jobs
+        self.cache = cache
+        self.incremental = incremental
+        self.confidence = confidence
+        self.points = points
+        self.downsampling = downsampling
+        self.fairness = fairness
+        self.receipes_folder = None
 
     def evaluate(self, contribution: bool, plot: bool) -> None:
         """generic evaluate function"""
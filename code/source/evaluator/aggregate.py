@@ -0,0 +1,152 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import logging
+import os
+import numpy as np
+from typing import List
+from .cache import write_npz
+from .store import METRICS
+from .statistics import pdu_windows
+
+
+def folder_fingerprint(path: str) -> str:
+    """Return a fingerprint of the names, sizes and modification times of the files in `path`"""
+
+    digest = hashlib.sha1()
+    for entry in sorted(os.scandir(path), key=lambda e: e.name):
+        if entry.is_file():
+            stat = entry.stat()
+            digest.update(
+                f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RunningAggregate(object):
+    """
+    Running cross-iteration aggregate of the PDU series of a testbed. For each metric it keeps
+    the sum, the mean and the sum of squared deviations (M2) per PDU and per second, new
+    iterations are merged with the parallel variant of Welford's algorithm. The whole-run
+    mean of each iteration and PDU is kept as well for the whole-run statistics
+    """
+
+    def __init__(self, legends: List[str], duration: int) -> None:
+        self.legends = legends
+        self.duration = duration
+        self.count = 0
+        self.fingerprints: List[str] = []
+        shape = (len(legends), duration)
+        self.sum = {name: np.zeros(shape, dtype=np.float64) for name in METRICS}
+        self.mean = {name: np.zeros(shape, dtype=np.float64) for name in METRICS}
+        self.m2 = {name: np.zeros(shape, dtype=np.float64) for name in METRICS}
+        self.runs = {name: np.zeros((0, len(legends)), dtype=np.float64)
+                     for name in METRICS}
+
+    def update(self, slices: List, fingerprints: List[str]) -> None:
+        """Merge the per-iteration PDU series of `slices`, one fingerprint per merged iteration"""
+
+        pdus = [pdu for s in slices for pdu in s.pdu]
+        b = len(fingerprints)
+        if b == 0:
+            return
+        n = self.count + b
+        windows = pdu_windows(slices, self.duration)
+        for name in METRICS:
+            values = np.stack([pdu.columns[name] for pdu in pdus], axis=1)
+            self.runs[name] = np.concatenate(
+                [self.runs[name], (values * windows).sum(axis=-1) / windows.sum(axis=-1)])
+            mean = values.mean(axis=0)
+            delta = mean - self.mean[name]
+            self.sum[name] += values.sum(axis=0)
+            self.m2[name] += ((values - mean) ** 2).sum(axis=0) + \
+                delta ** 2 * self.count * b / n
+            self.mean[name] += delta * b / n
+        self.count = n
+        self.fingerprints.extend(fingerprints)
+
+    def variance(self, name: str) -> np.ndarray:
+        """Return the unbiased cross-iteration variance of metric `name`"""
+
+        if self.count < 2:
+            return np.zeros_like(self.m2[name])
+        return self.m2[name] / (self.count - 1)
+
+    def apply(self, slices: List) -> List:
+        """Replace the PDU series of `slices` by the cross-iteration mean"""
+
+        p = 0
+        for s in slices:
+            for pdu in s.pdu:
+                pdu.columns = {name: self.mean[name][p].copy()
+                               for name in METRICS}
+                p += 1
+        return slices
+
+    def save(self, path: str) -> None:
+        arrays = {"legends": np.array(self.legends, dtype=str),
+                  "duration": np.array(self.duration, dtype=np.int64),
+                  "count": np.array(self.count, dtype=np.int64),
+                  "fingerprints": np.array(self.fingerprints, dtype=str)}
+        for name in METRICS:
+            arrays[f"sum_{name}"] = self.sum[name]
+            arrays[f"mean_{name}"] = self.mean[name]
+            arrays[f"m2_{name}"] = self.m2[name]
+            arrays[f"runs_{name}"] = self.runs[name]
+        write_npz(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str, legends: List[str], duration: int, folders: List[str]):
+        """
+        Load the aggregate stored in `path`, a fresh aggregate is returned when the file is
+        missing, when the PDU layout changed or when a merged iteration folder was modified
+        """
+
+        aggregate = RunningAggregate(legends, duration)
+        if not os.path.exists(path):
+            return aggregate
+        try:
+            with np.load(path) as data:
+                count = int(data["count"])
+                fingerprints = [str(f) for f in data["fingerprints"]]
+                if [str(l) for l in data["legends"]] != legends or int(data["duration"]) != duration:
+                    logging.info(
+                        f"PDU layout of {path} changed, aggregating all iterations again")
+                    return aggregate
+                if count > len(folders) or fingerprints != [folder_fingerprint(f) for f in folders[:count]]:
+                    logging.info(
+                        f"Iterations merged in {path} changed, aggregating all iterations again")
+                    return aggregate
+                for name in METRICS:
+                    aggregate.sum[name] = data[f"sum_{name}"]
+                    aggregate.mean[name] = data[f"mean_{name}"]
+                    aggregate.m2[name] = data[f"m2_{name}"]
+                    aggregate.runs[name] = data[f"runs_{name}"]
+                aggregate.count = count
+                aggregate.fingerprints = fingerprints
+        except Exception as e:
+            logging.warning(
+                f"Invalid aggregate {path} ({e}), aggregating all iterations again")
+            return RunningAggregate(legends, duration)
+        return aggregate
@@ -0,0 +1,145 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import logging
+import os
+import numpy as np
+from typing import Dict, Tuple
+from .store import METRICS
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-1 digest of the content of `path`"""
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_npz(path: str, **arrays) -> None:
+    """Atomically write `arrays` in the .npz file `path`"""
+
+    folder = os.path.dirname(path)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+class ProbeCache(object):
+    """
+    On-disk cache of the parsed probe files of an iteration folder, stored in a single .npz file.
+    An entry is valid when the size of the probe file and the parsed duration match, and either
+    the modification time or the content hash of the file is unchanged. The entries of the probe
+    files no longer in `folder` are evicted when the cache is saved
+    """
+
+    def __init__(self, path: str, folder: str) -> None:
+        self.path = path
+        self.folder = folder
+        self.entries: Dict[str, Tuple[int, int, str, int, np.ndarray]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        """Load the cache entries, a corrupted cache file is discarded and rebuilt"""
+
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                offsets = data["offsets"]
+                probes = data["probes"]
+                for e, name in enumerate(data["names"]):
+                    self.entries[str(name)] = (int(data["sizes"][e]),
+                                               int(data["mtimes"][e]),
+                                               str(data["digests"][e]),
+                                               int(data["durations"][e]),
+                                               probes[:, offsets[e]:offsets[e + 1]])
+        except Exception as e:
+            logging.warning(
+                f"Invalid probe cache {self.path} ({e}), rebuilding it")
+            self.entries = {}
+            self.dirty = True
+
+    def get(self, path: str, stat: os.stat_result, duration: int) -> np.ndarray:
+        """Return the cached (metric, second) array of `path` or None if the entry is missing or stale"""
+
+        name = os.path.basename(path)
+        entry = self.entries.get(name)
+        if entry == None:
+            return None
+        size, mtime, digest, d, probes = entry
+        if size != stat.st_size or d != duration:
+            return None
+        if mtime != stat.st_mtime_ns:
+            if digest != file_digest(path):
+                return None
+            self.entries[name] = (size, stat.st_mtime_ns, digest, d, probes)
+            self.dirty = True
+        return probes
+
+    def put(self, path: str, stat: os.stat_result, duration: int, probes: np.ndarray, digest: str) -> None:
+        """Add the parsed (metric, second) array of `path` and the digest of its content to the cache"""
+
+        self.entries[os.path.basename(path)] = (
+            stat.st_size, stat.st_mtime_ns, digest, duration, probes)
+        self.dirty = True
+
+    def evict(self) -> None:
+        """Remove the entries of the probe files deleted or renamed since they were cached"""
+
+        for name in list(self.entries):
+            if not os.path.exists(os.path.join(self.folder, name)):
+                del self.entries[name]
+                self.dirty = True
+
+    def save(self) -> None:
+        """Atomically write the cache file if an entry changed or was evicted"""
+
+        self.evict()
+        if not self.dirty:
+            return
+
+        names = sorted(self.entries)
+        entries = [self.entries[name] for name in names]
+        lengths = [entry[4].shape[1] for entry in entries]
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+
+        write_npz(self.path,
+                  names=np.array(names, dtype=str),
+                  sizes=np.array([entry[0] for entry in entries], dtype=np.int64),
+                  mtimes=np.array([entry[1] for entry in entries], dtype=np.int64),
+                  digests=np.array([entry[2] for entry in entries], dtype=str),
+                  durations=np.array([entry[3] for entry in entries], dtype=np.int64),
+                  offsets=offsets,
+                  probes=np.concatenate([entry[4] for entry in entries], axis=1) if len(entries) > 0 else np.zeros((len(METRICS), 0)))
+        self.dirty = False
@@ -0,0 +1,87 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Return the indexes of the `threshold` points kept by the Largest-Triangle-Three-Buckets
+    algorithm, the first and last points are always kept
+    """
+
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # the inner points are split in threshold - 2 buckets
+    every = (n - 2) / (threshold - 2)
+    edges = np.append(
+        (np.arange(threshold - 1) * every).astype(np.int64) + 1, n)
+
+    indexes = np.zeros(threshold, dtype=np.int64)
+    a = 0
+    for b in range(threshold - 2):
+        start, end = edges[b], edges[b + 1]
+        # average point of the next bucket, the last point for the last bucket
+        avg_x = x[end:edges[b + 2]].mean()
+        avg_y = y[end:edges[b + 2]].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) -
+                      (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indexes[b + 1] = a
+    indexes[-1] = n - 1
+    return indexes
+
+
+def minmax(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Return the indexes of the minimum and maximum of `threshold` / 2 buckets,
+    the first and last points are always kept
+    """
+
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = (threshold - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    indexes = [0, n - 1]
+    for b in range(buckets):
+        start, end = edges[b], edges[b + 1]
+        if end > start:
+            indexes.append(start + int(np.argmin(y[start:end])))
+            indexes.append(start + int(np.argmax(y[start:end])))
+    return np.unique(indexes)
+
+
+def downsample(method: str, x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Return the indexes of the points of (x, y) kept by `method` for a budget of `threshold` points"""
+
+    if method == "minmax":
+        return minmax(x, y, threshold)
+    return lttb(x, y, threshold)
@@ -0,0 +1,159 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import numpy as np
+from typing import Dict, List
+from ruamel import yaml
+from .cache import write_npz
+from .store import ProbeStore, METRICS
+
+# percentiles of the per UE values, taken on the low tail for the throughput
+# and on the high tail for the other metrics so they always describe the worst UEs
+TAILS = {"throughput": [50, 5, 1]}
+DEFAULT_TAIL = [50, 95, 99]
+
+
+def tail(name: str) -> List[int]:
+    return TAILS.get(name, DEFAULT_TAIL)
+
+
+def jain(x: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Return Jain's fairness index (sum x)^2 / (n * sum x^2) of `x` along `axis`, NaN values
+    are left out of the n UEs. UEs that all received nothing are considered fairly treated,
+    the index is NaN when every value is NaN
+    """
+
+    n = (~np.isnan(x)).sum(axis=axis)
+    num = np.nansum(x, axis=axis) ** 2
+    den = n * np.nansum(x ** 2, axis=axis)
+    return np.divide(num, den, out=np.where(n > 0, 1.0, np.nan), where=den > 0)
+
+
+class Fairness(object):
+    """
+    Per UE fairness of the PDUs of a testbed. Per second arrays are shaped (PDU, second)
+    and hold the mean over the iterations, NaN outside of the PDU slice time window.
+    `ue` holds the per UE drill-down series shaped (PDU, UE, second)
+    """
+
+    def __init__(self, legends: List[str], count: int, n_ue: int, duration: int) -> None:
+        self.legends = legends
+        self.count = count
+        self.n_ue = n_ue
+        self.windows = []
+        shape = (len(legends), duration)
+        self.jain = np.full(shape, np.nan)
+        self.minimum = {name: np.full(shape, np.nan) for name in METRICS}
+        self.maximum = {name: np.full(shape, np.nan) for name in METRICS}
+        self.ue = {name: np.full((len(legends), n_ue, duration), np.nan)
+                   for name in METRICS}
+        self.run: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_store(cls, store: ProbeStore, slices: List):
+        """Compute the fairness of every PDU of `slices` from the per UE series of `store`"""
+
+        pdus = [(s, pdu) for s in slices for pdu in s.pdu]
+        fairness = Fairness([pdu.legend for s, pdu in pdus],
+                            store.iterations, store.n_ue, store.duration)
+
+        for p, (s, pdu) in enumerate(pdus):
+            start, end = s.s.start, s.s.end
+            fairness.windows.append((start, end))
+            run = {}
+            for name in METRICS:
+                # (iteration, UE, application, second) restricted to the slice window
+                values = store.metric(name)[:, pdu.slice][:, :, pdu.apps, start:end]
+                if name == "throughput":
+                    values = values.sum(axis=2)
+                else:
+                    values = values.mean(axis=2)
+
+                fairness.ue[name][p, :, start:end] = values.mean(axis=0)
+                fairness.minimum[name][p, start:end] = values.min(axis=1).mean(axis=0)
+                fairness.maximum[name][p, start:end] = values.max(axis=1).mean(axis=0)
+                if name == "throughput":
+                    fairness.jain[p, start:end] = jain(values, 1).mean(axis=0)
+
+                # whole-run mean of each UE, the worst UE has the lowest throughput
+                # or the highest value of the other metrics
+                means = values.mean(axis=(0, 2))
+                worst = int(means.argmin() if name == "throughput" else means.argmax())
+                best = means.max() if name == "throughput" else means.min()
+                samples = values[:, worst].reshape(-1)
+                summary = {"worst_ue": worst,
+                           "worst": means[worst],
+                           "best": best,
+                           "spread": means.max() - means.min()}
+                for q, v in zip(tail(name), np.percentile(means, tail(name))):
+                    summary[f"p{q}"] = v
+                for q, v in zip(tail(name), np.percentile(samples, tail(name))):
+                    summary[f"worst_p{q}"] = v
+                if name == "throughput":
+                    summary["jain"] = float(jain(means, 0))
+                run[name] = summary
+            fairness.run[pdu.legend] = run
+
+        return fairness
+
+    def series(self, name: str, p: int) -> tuple:
+        """Return the seconds and values of the per second fairness series `name` of PDU `p`"""
+
+        start, end = self.windows[p]
+        if name == "jain":
+            y = self.jain[p]
+        else:
+            # spread between the best and the worst UE of a metric
+            y = self.maximum[name][p] - self.minimum[name][p]
+        return np.arange(start, end), y[start:end]
+
+    def summary(self) -> Dict:
+        """Return the whole-run fairness of each PDU as a plain dictionary"""
+
+        summary = {}
+        for legend, run in self.run.items():
+            summary[legend] = {
+                name: {key: value if key == "worst_ue" else round(float(value), 6)
+                       for key, value in values.items()}
+                for name, values in run.items()
+            }
+        return {"iterations": self.count, "users": self.n_ue, "pdu": summary}
+
+    def write(self, path: str) -> None:
+        """Write the whole-run summary to the YAML file `path` and the per second arrays next to it"""
+
+        yam = yaml.YAML()
+        yam.indent(sequence=4, offset=2)
+        with codecs.open(f"{path}.yaml", "w", encoding="utf-8") as summary_file:
+            yam.dump(self.summary(), summary_file)
+
+        arrays = {"legends": np.array(self.legends, dtype=str),
+                  "jain": self.jain}
+        for name in METRICS:
+            arrays[f"{name}_min"] = self.minimum[name]
+            arrays[f"{name}_max"] = self.maximum[name]
+            arrays[f"{name}_ue"] = self.ue[name]
+        write_npz(f"{path}.npz", **arrays)
@@ -0,0 +1,320 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+from .store import METRICS
+from .parser import Parser
+
+# sample standing for a second without any report, counted as lost like a missing PDU in ProbeStore.fill
+SILENT = (0.0, 100.0, 100.0, 0.0)
+
+
+class ProbeTail(object):
+    """
+    Incremental reader of a probe file being written, only the complete
+    lines appended since the previous read are returned. The application is
+    considered started once the file is created (or grows when it was left
+    by a previous iteration)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.offset = 0
+        self.lines = 0
+        self.samples = 0
+        self.buffer = b""
+        self.updated = None
+        self.stale = False
+        self.started = None
+        self.quiet = None
+
+    def skip(self) -> None:
+        """Ignore the content already present, left by a previous iteration"""
+
+        if os.path.exists(self.path):
+            self.offset = os.path.getsize(self.path)
+            self.lines = Parser.header
+            self.stale = True
+
+    def silence(self, now: float, duration: int) -> int:
+        """
+        Return the number of whole seconds without new samples since the previous call, only
+        the first `duration` seconds after the application started are accounted for
+        """
+
+        if self.started == None:
+            return 0
+        n = int(min(now, self.started + duration) - self.quiet)
+        if n <= 0:
+            return 0
+        self.quiet += n
+        return n
+
+    def read(self) -> List[List[str]]:
+        """Return the split fields of the samples appended since the previous read"""
+
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        now = time.time()
+        if self.started == None and (not self.stale or size != self.offset):
+            self.started = now
+            self.quiet = now
+        if size < self.offset:
+            # the file has been truncated by a new run
+            self.offset = 0
+            self.lines = 0
+            self.samples = 0
+            self.buffer = b""
+        if size == self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = self.buffer + f.read(size - self.offset)
+        self.offset = size
+        self.updated = now
+
+        lines = data.split(b"\n")
+        self.buffer = lines.pop()
+        samples = []
+        for line in lines:
+            self.lines += 1
+            if self.lines <= Parser.header:
+                continue
+            line = line.decode("utf-8", errors="replace")
+            if "received" in line:
+                continue
+            fields = line.split(None, Parser.fields)
+            if len(fields) > Parser.fields - 1:
+                samples.append(fields)
+        self.samples += len(samples)
+        if len(samples) > 0:
+            self.quiet = now
+        return samples
+
+
+class ProbeMonitor(object):
+    """
+    Live monitor of a running scenario: a thread tails every probe file of the
+    results folder, keeps the last `window` samples of each of them and
+    periodically logs a status table of the rolling KPIs of each slice and QFI
+    and writes them to a JSON snapshot (unless `snapshot` is None). As in the
+    evaluation, the throughput is summed over the UEs while the other metrics
+    are averaged. Every second a running application goes without writing a
+    sample counts as a silent sample. When abort `rules` are given, they are
+    checked at each poll and the first violation is reported by `aborted`
+    """
+
+    def __init__(self, slices: List, n_ue: int, snapshot: str = None, window: int = 10, interval: int = 5, rules=None) -> None:
+        self.slices = slices
+        self.n_ue = n_ue
+        self.snapshot = snapshot
+        self.window = window
+        self.interval = interval
+        self.rules = rules
+        self.tails: Dict[tuple, ProbeTail] = {}
+        self.windows: Dict[tuple, deque] = {}
+        self.applications: Dict[tuple, object] = {}
+        self.reason = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self, results: str) -> None:
+        """Start monitoring the probe files written in `results`"""
+
+        self.tails = {}
+        self.windows = {}
+        self.applications = {}
+        self.reason = None
+        length = self.window if self.rules == None else max(
+            self.window, self.rules.period)
+        for k in range(len(self.slices)):
+            for a in self.slices[k].applications:
+                self.applications[(k, a.name, a.qi)] = a
+                for j in range(self.n_ue):
+                    key = (k, a.name, a.qi, j)
+                    self.tails[key] = ProbeTail(
+                        Parser.probe_path(a, j, k, results))
+                    self.tails[key].skip()
+                    self.windows[key] = deque(maxlen=length)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the monitoring thread after a last poll"""
+
+        if self.thread == None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+    def aborted(self) -> str:
+        """Return the first abort rule violation of the running iteration, None if there is none"""
+        return self.reason
+
+    def loop(self) -> None:
+        while True:
+            stopping = self.stopped.wait(self.interval)
+            try:
+                self.poll()
+                if self.rules != None and self.reason == None:
+                    self.reason = self.rules.check(self.groups(), self.applications)
+                if self.snapshot != None:
+                    kpis = self.kpis()
+                    self.log(kpis)
+                    self.write(kpis)
+            except Exception as e:
+                logging.warning(f"Monitor poll failed: {e}")
+            if stopping:
+                return
+
+    def groups(self) -> Dict[tuple, List[deque]]:
+        """Return the sample windows of the UEs of each slice and QFI"""
+
+        groups: Dict[tuple, List[deque]] = {}
+        for key, samples in self.windows.items():
+            groups.setdefault(key[:3], []).append(samples)
+        return groups
+
+    def poll(self) -> None:
+        """Read the samples appended to every probe file and account for the silent ones"""
+
+        for key, tail in self.tails.items():
+            for fields in tail.read():
+                try:
+                    self.windows[key].append(Parser.parse_sample(fields))
+                except (ValueError, AttributeError, IndexError):
+                    continue
+            sl = self.slices[key[0]]
+            silent = tail.silence(time.time(), sl.end - sl.start)
+            self.windows[key].extend([SILENT] * silent)
+
+    def kpis(self) -> List[Dict]:
+        """Return the rolling KPIs of each slice and QFI"""
+
+        now = time.time()
+        groups: Dict[tuple, List[tuple]] = {}
+        for key in self.tails:
+            groups.setdefault(key[:3], []).append(key)
+
+        kpis = []
+        for (k, name, qi), keys in groups.items():
+            means = []
+            for key in keys:
+                samples = list(self.windows[key])[-self.window:]
+                if len(samples) > 0:
+                    means.append([sum(m) / len(samples)
+                                  for m in zip(*samples)])
+            updates = [self.tails[key].updated for key in keys
+                       if self.tails[key].updated != None]
+            kpi = {"slice": k, "application": name, "qfi": qi,
+                   "ues": len(means), "samples": sum([self.tails[key].samples for key in keys]),
+                   "idle": round(now - max(updates), 1) if len(updates) > 0 else None}
+            for m in range(len(METRICS)):
+                if len(means) == 0:
+                    kpi[METRICS[m]] = None
+                elif METRICS[m] == "throughput":
+                    kpi[METRICS[m]] = round(sum([v[m] for v in means]), 3)
+                else:
+                    kpi[METRICS[m]] = round(
+                        sum([v[m] for v in means]) / len(means), 3)
+            kpis.append(kpi)
+        return kpis
+
+    def log(self, kpis: List[Dict]) -> None:
+        lines = [f"{'slice':>5} {'application':<12} {'qfi':>3} {'ues':>3} {'Mbit/s':>9} {'trip ms':>9} {'loss %':>7} {'jitter ms':>9} {'idle s':>6}"]
+        for kpi in kpis:
+            values = ["-" if kpi[name] == None else kpi[name]
+                      for name in METRICS + ["idle"]]
+            lines.append(
+                f"{kpi['slice']:>5} {kpi['application']:<12} {kpi['qfi']:>3} {kpi['ues']:>3} {values[0]:>9} {values[1]:>9} {values[2]:>7} {values[3]:>9} {values[4]:>6}")
+        logging.info("Live KPIs over the last %d s\n%s",
+                     self.window, "\n".join(lines))
+
+    def write(self, kpis: List[Dict]) -> None:
+        """Atomically replace the JSON snapshot so readers never see a partial file"""
+
+        tmp = f"{self.snapshot}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"time": time.time(), "window": self.window,
+                       "kpis": kpis}, f, indent=2)
+        os.replace(tmp, self.snapshot)
+
+
+class AbortRules(object):
+    """
+    Sanity rules of a scenario checked on the live probe samples. A rule fires when every
+    sample of the last `period` seconds of every UE of a slice application violates it,
+    a second without any sample counting as no throughput and a 100 % loss:
+    a throughput below the `throughput` ratio of the application data rate, a loss above
+    `loss` percent or a trip time above the `trip_time` ratio of the application packet
+    delay budget
+    """
+
+    def __init__(self, period: int = 30, throughput: float = None, loss: float = None, trip_time: float = None) -> None:
+        self.period = period
+        self.throughput = throughput
+        self.loss = loss
+        self.trip_time = trip_time
+
+    @classmethod
+    def from_definition(cls, definition: Dict):
+        """Return the rules of the `abort` section of a scenario definition, None if there is none"""
+
+        if definition == None:
+            return None
+        return cls(definition.get("period", 30), definition.get("throughput", None),
+                   definition.get("loss", None), definition.get("trip_time", None))
+
+    def check(self, groups: Dict[tuple, List[deque]], applications: Dict[tuple, object]) -> str:
+        """Return a description of the first rule violated, None if every rule holds"""
+
+        for (k, name, qi), windows in groups.items():
+            if len(windows) == 0 or min([len(w) for w in windows]) < self.period:
+                continue
+            periods = [list(w)[-self.period:] for w in windows]
+            application = applications[(k, name, qi)]
+
+            if self.throughput != None:
+                limit = self.throughput * application.get_throughput()
+                if all([s[0] < limit for p in periods for s in p]):
+                    return f"{name} throughput of slice {k} below {limit:.3f} Mbit/s for {self.period} s on every UE"
+            if self.loss != None:
+                if all([s[2] > self.loss for p in periods for s in p]):
+                    return f"{name} loss of slice {k} above {self.loss} % for {self.period} s on every UE"
+            if self.trip_time != None:
+                limit = self.trip_time * application.pdb
+                if all([s[1] > limit for p in periods for s in p]):
+                    return f"{name} trip time of slice {k} above {limit} ms for {self.period} s on every UE"
+        return None
@@ -0,0 +1,118 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import io
+import itertools
+import re
+import numpy as np
+from typing import Dict, List, Tuple
+from .store import METRICS
+
+
+class Parser(object):
+    """
+    Streaming parser of the iperf2 probe files, the samples are
+    written straight into preallocated metric arrays
+    """
+
+    header = 8
+    fields = 13
+    rate = re.compile(r"[0-9]+")
+
+    @classmethod
+    def probe_path(cls, application, ue_index, slice_index, file_path) -> str:
+        return f"{file_path}/ue-{ue_index}_{application.name.lower()}_{slice_index}_probes.txt"
+
+    @classmethod
+    def allocate(cls, duration: int) -> Dict[str, np.ndarray]:
+        """Allocate the metric arrays for `duration` samples"""
+        return {name: np.zeros(duration, dtype=np.float64) for name in METRICS}
+
+    @classmethod
+    def samples(cls, f, duration: int):
+        """Lazily yield the split fields of the first `duration` samples of an opened probe file"""
+
+        k = 0
+        for line in itertools.islice(f, cls.header, None):
+            if k >= duration:
+                return
+            if "received" in line:
+                continue
+            yield line.split(None, cls.fields)
+            k += 1
+
+    @classmethod
+    def parse_sample(cls, l: List[str]) -> Tuple[float, float, float, float]:
+        """Return the throughput, trip time, loss and jitter of the split fields of a sample"""
+        return float(l[6]) / 1000 / 1000, float(l[12].partition("/")[0]), float(cls.rate.search(l[11]).group()), float(l[8])
+
+    @classmethod
+    def parse_file(cls, path: str, duration: int, columns: Dict[str, np.ndarray]) -> int:
+        """Parse the probe file `path` into `columns` and return the number of samples"""
+
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.parse_lines(f, duration, columns)
+
+    @classmethod
+    def parse_lines(cls, f, duration: int, columns: Dict[str, np.ndarray]) -> int:
+        """Parse the lines of an opened probe file into `columns` and return the number of samples"""
+
+        throughput = columns["throughput"]
+        trip_time = columns["trip_time"]
+        loss = columns["loss"]
+        jitter = columns["jitter"]
+
+        rate = cls.rate.search
+
+        n = 0
+        for l in cls.samples(f, duration):
+            throughput[n] = float(l[6]) / 1000 / 1000
+            jitter[n] = float(l[8])
+            loss[n] = float(rate(l[11]).group())
+            trip_time[n] = float(l[12].partition("/")[0])
+            n += 1
+        return n
+
+    @classmethod
+    def parse_application(cls, application, ue_index, slice_index, file_path, duration, columns=None) -> int:
+        """Parse the probes of `application` for a UE into `columns` and return the number of samples"""
+
+        if columns == None:
+            columns = cls.allocate(duration)
+        return cls.parse_file(cls.probe_path(application, ue_index, slice_index, file_path), duration, columns)
+
+
+def parse_probes(path: str, duration: int) -> Tuple[np.ndarray, str]:
+    """
+    Parse a probe file in a worker process and return its samples as a (metric, second) array
+    and the SHA-1 digest of its content, the file is read once for both
+    """
+
+    with open(path, "rb") as f:
+        data = f.read()
+    columns = Parser.allocate(duration)
+    n = Parser.parse_lines(io.StringIO(
+        data.decode("utf-8"), newline=None), duration, columns)
+    return np.stack([columns[name][:n] for name in METRICS]), hashlib.sha1(data).hexdigest()
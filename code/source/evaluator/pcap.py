@@ -0,0 +1,467 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import ipaddress
+import logging
+import struct
+from collections import OrderedDict
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from ruamel import yaml
+from source.evaluator.cache import write_npz
+from scapy.utils import RawPcapReader, RawPcapNgReader
+
+GTPU_PORT = 2152
+GTPU_G_PDU = 0xff
+PDU_SESSION_CONTAINER = 0x85
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = 0x8100
+PCAP_HEADER = 24
+PROTOCOLS = {1: "ICMP", 6: "TCP", 17: "UDP"}
+
+# link layer header length of the supported pcap link types
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_IPV4 = 228
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+
+def link_payload(linktype: int, data: bytes) -> Tuple[int, bytes]:
+    """Return the interface index (0 when unknown) and the IPv4 packet carried by a captured frame"""
+
+    if linktype == LINKTYPE_LINUX_SLL:
+        if struct.unpack_from("!H", data, 14)[0] == ETHERTYPE_IPV4:
+            return 0, data[16:]
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        protocol, _, ifindex = struct.unpack_from("!HHI", data, 0)
+        if protocol == ETHERTYPE_IPV4:
+            return ifindex, data[20:]
+    elif linktype == LINKTYPE_ETHERNET:
+        ethertype = struct.unpack_from("!H", data, 12)[0]
+        offset = 14
+        while ethertype == ETHERTYPE_VLAN:
+            ethertype = struct.unpack_from("!H", data, offset + 2)[0]
+            offset += 4
+        if ethertype == ETHERTYPE_IPV4:
+            return 0, data[offset:]
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+        if len(data) > 0 and data[0] >> 4 == 4:
+            return 0, data
+    return 0, None
+
+
+def gtpu_payload(gtp: bytes) -> Tuple[int, bytes]:
+    """
+    Return the QFI (-1 when absent) and the inner packet of a GTP-U G-PDU, None for other messages
+    and for frames truncated within the GTP-U header
+    """
+
+    if len(gtp) < 8 or gtp[1] != GTPU_G_PDU:
+        return -1, None
+    flags = gtp[0]
+    offset = 8
+    qfi = -1
+    if flags & 0x07:
+        if len(gtp) < 12:
+            return -1, None
+        next_type = gtp[11]
+        offset = 12
+        # walk the extension headers, their length is given in 4 bytes units
+        while flags & 0x04 and next_type != 0:
+            if offset >= len(gtp):
+                return -1, None
+            length = gtp[offset] * 4
+            if length == 0 or offset + length > len(gtp):
+                return -1, None
+            if next_type == PDU_SESSION_CONTAINER:
+                qfi = gtp[offset + 2] & 0x3f
+            next_type = gtp[offset + length - 1]
+            offset += length
+    return qfi, gtp[offset:]
+
+
+def decode(linktype: int, data: bytes):
+    """
+    Decode a captured frame into an observation: the capture point (interface, tunnel, TTL),
+    the DSCP and QFI, the inner flow, the inner packet identity and its length.
+    Return None for frames other than IPv4 packets
+    """
+
+    ifindex, ip = link_payload(linktype, data)
+    if ip == None or len(ip) < 20:
+        return None
+
+    tunnel = "-"
+    qfi = -1
+    ttl = ip[8]
+    dscp = ip[1] >> 2
+    ihl = (ip[0] & 0x0f) * 4
+    if ip[9] == 17 and len(ip) >= ihl + 16:
+        sport, dport = struct.unpack_from("!HH", ip, ihl)
+        if sport == GTPU_PORT or dport == GTPU_PORT:
+            qfi, inner = gtpu_payload(ip[ihl + 8:])
+            if inner == None or len(inner) < 20 or inner[0] >> 4 != 4:
+                return None
+            tunnel = f"{ipaddress.IPv4Address(ip[12:16])}>{ipaddress.IPv4Address(ip[16:20])}"
+            ip = inner
+            ihl = (ip[0] & 0x0f) * 4
+
+    proto = ip[9]
+    sport = dport = 0
+    if proto in (6, 17) and len(ip) >= ihl + 4:
+        sport, dport = struct.unpack_from("!HH", ip, ihl)
+    flow = (ip[12:16], ip[16:20], proto, sport, dport)
+    # the fields left untouched by routers identify a packet along its path
+    ident = ip[4:6] + ip[9:10] + ip[12:20] + ip[ihl:ihl + 8]
+    length = struct.unpack_from("!H", ip, 2)[0]
+    return (ifindex, tunnel, ttl), dscp, qfi, flow, ident, length
+
+
+def timestamp(reader, metadata) -> float:
+    """Return the capture time of a record in seconds"""
+
+    if hasattr(metadata, "tshigh"):
+        return ((metadata.tshigh << 32) | metadata.tslow) / metadata.tsresol
+    return metadata.sec + metadata.usec * (1e-9 if reader.nano else 1e-6)
+
+
+def point_label(point: Tuple[int, str, int]) -> str:
+    ifindex, tunnel, ttl = point
+    label = f"{tunnel} ttl {ttl}"
+    return label if ifindex == 0 else f"{label} if {ifindex}"
+
+
+def flow_label(flow: Tuple) -> str:
+    src, dst, proto, sport, dport = flow
+    return f"{ipaddress.IPv4Address(src)}:{sport} > {ipaddress.IPv4Address(dst)}:{dport} {PROTOCOLS.get(proto, proto)}"
+
+
+class PcapAnalysis(object):
+    """
+    Per flow accumulator of a capture. A packet is followed along the capture points it crosses
+    until `window` seconds have elapsed since its first observation, it is then folded into the
+    per second throughput of each point and the delay and loss of each hop between two points
+    """
+
+    def __init__(self, networks: List[str], origin: float, window: float) -> None:
+        self.networks = [ipaddress.IPv4Network(n) for n in networks]
+        self.origin = origin
+        self.window = window
+        self.throughput: Dict[Tuple, int] = {}
+        self.packets: Dict[Tuple, int] = {}
+        self.dscp: Dict[Tuple, set] = {}
+        self.qfi: Dict[Tuple, set] = {}
+        self.delay: Dict[Tuple, List[float]] = {}
+        self.first: Dict[Tuple, float] = {}
+        self.patterns: Dict[Tuple, int] = {}
+        self.pending: Dict[bytes, List] = OrderedDict()
+        self.slice_cache: Dict[bytes, int] = {}
+
+    def slice_of(self, flow: Tuple) -> int:
+        """Return the index of the slice whose UE network holds an end of `flow`, -1 if none"""
+
+        for address in flow[:2]:
+            index = self.slice_cache.get(address, None)
+            if index == None:
+                ip = ipaddress.IPv4Address(address)
+                index = -1
+                for k in range(len(self.networks)):
+                    if ip in self.networks[k]:
+                        index = k
+                self.slice_cache[address] = index
+            if index != -1:
+                return index
+        return -1
+
+    def observe(self, ts: float, observation: Tuple) -> None:
+        """Record the observation of a packet at a capture point"""
+
+        point, dscp, qfi, flow, ident, length = observation
+        entry = self.pending.get(ident, None)
+        if entry == None:
+            entry = [(self.slice_of(flow), flow), ts, length, qfi, {}]
+            self.pending[ident] = entry
+        elif qfi != -1:
+            entry[3] = qfi
+        # the same packet copied on several interfaces of a segment is only counted once
+        if point not in entry[4]:
+            entry[4][point] = (ts, dscp)
+
+    def expire(self, now: float) -> List[Tuple[bytes, List]]:
+        """Remove and return the packets first seen more than `window` seconds before `now`"""
+
+        expired = []
+        while len(self.pending) > 0:
+            ident = next(iter(self.pending))
+            if self.pending[ident][1] >= now - self.window:
+                break
+            expired.append(self.pending.popitem(last=False))
+        return expired
+
+    def fold(self, entry: List) -> None:
+        """Fold the observations of a packet into the per second statistics"""
+
+        group, first, length, qfi, points = entry
+        second = int(first - self.origin)
+        if qfi != -1:
+            self.qfi.setdefault(group, set()).add(qfi)
+        for point, (ts, dscp) in points.items():
+            key = (group, point, int(ts - self.origin))
+            self.throughput[key] = self.throughput.get(key, 0) + length
+            self.packets[(group, point)] = self.packets.get(
+                (group, point), 0) + 1
+            self.dscp.setdefault((group, point), set()).add(dscp)
+            if ts < self.first.get((group, point), ts + 1):
+                self.first[(group, point)] = ts
+        key = (group, second, frozenset(points))
+        self.patterns[key] = self.patterns.get(key, 0) + 1
+        ordered = sorted(points.items(), key=lambda p: p[1][0])
+        for u in range(len(ordered)):
+            for v in range(u + 1, len(ordered)):
+                key = (group, ordered[u][0], ordered[v][0], second)
+                delay = self.delay.setdefault(key, [0.0, 0])
+                delay[0] += ordered[v][1][0] - ordered[u][1][0]
+                delay[1] += 1
+
+    def merge(self, other) -> None:
+        """Merge the statistics folded by another analysis of the same capture"""
+
+        for key, value in other.throughput.items():
+            self.throughput[key] = self.throughput.get(key, 0) + value
+        for key, value in other.packets.items():
+            self.packets[key] = self.packets.get(key, 0) + value
+        for key, value in other.patterns.items():
+            self.patterns[key] = self.patterns.get(key, 0) + value
+        for key, value in other.dscp.items():
+            self.dscp.setdefault(key, set()).update(value)
+        for key, value in other.first.items():
+            if value < self.first.get(key, value + 1):
+                self.first[key] = value
+        for key, value in other.qfi.items():
+            self.qfi.setdefault(key, set()).update(value)
+        for key, value in other.delay.items():
+            delay = self.delay.setdefault(key, [0.0, 0])
+            delay[0] += value[0]
+            delay[1] += value[1]
+
+    def join(self, entries: List[List]) -> None:
+        """Join the observations of packets split across chunks and fold them"""
+
+        joined: Dict[bytes, List] = {}
+        for ident, entry in entries:
+            current = joined.get(ident, None)
+            if current == None:
+                joined[ident] = entry
+                continue
+            if entry[1] < current[1]:
+                current[1] = entry[1]
+            if entry[3] != -1:
+                current[3] = entry[3]
+            for point, observation in entry[4].items():
+                if point not in current[4] or observation[0] < current[4][point][0]:
+                    current[4][point] = observation
+        for entry in joined.values():
+            self.fold(entry)
+
+    def report(self) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """
+        Return the summary of every flow and the per second arrays: the throughput (Mbit/s) at each
+        capture point and the mean delay (ms) and loss (%) of each hop between consecutive points,
+        points being ordered by the time the flow was first seen crossing them
+        """
+
+        duration = max([key[2] for key in self.throughput] + [-1]) + 1
+        groups = sorted(set([key[0] for key in self.packets]))
+        summary = {"duration": duration, "flows": []}
+        arrays = {}
+        for n in range(len(groups)):
+            group = groups[n]
+            points = sorted([key[1] for key in self.packets if key[0] == group],
+                            key=lambda p: (self.first[(group, p)], -p[2], p[0]))
+            flow = {"slice": group[0], "flow": flow_label(group[1]),
+                    "qfi": sorted(self.qfi.get(group, [])), "points": [], "hops": []}
+
+            for p in range(len(points)):
+                throughput = np.zeros(duration, dtype=np.float64)
+                for second in range(duration):
+                    throughput[second] = self.throughput.get(
+                        (group, points[p], second), 0) * 8 / 1000 / 1000
+                arrays[f"flow{n}_throughput_{p}"] = throughput
+                flow["points"].append({"point": point_label(points[p]),
+                                       "dscp": sorted(self.dscp[(group, points[p])]),
+                                       "packets": self.packets[(group, points[p])],
+                                       "throughput": float(throughput.mean())})
+
+            for h in range(len(points) - 1):
+                u, v = points[h], points[h + 1]
+                delay = np.full(duration, np.nan)
+                sent = np.zeros(duration, dtype=np.float64)
+                lost = np.zeros(duration, dtype=np.float64)
+                for (g, second, pattern), count in self.patterns.items():
+                    if g == group and u in pattern:
+                        sent[second] += count
+                        if v not in pattern:
+                            lost[second] += count
+                total = [0.0, 0]
+                for second in range(duration):
+                    value = self.delay.get((group, u, v, second), None)
+                    if value != None:
+                        delay[second] = value[0] / value[1] * 1000
+                        total[0] += value[0]
+                        total[1] += value[1]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    loss = np.where(sent > 0, lost / sent * 100, np.nan)
+                arrays[f"flow{n}_delay_{h}"] = delay
+                arrays[f"flow{n}_loss_{h}"] = loss
+                flow["hops"].append({"from": point_label(u), "to": point_label(v),
+                                     "delay": total[0] / total[1] * 1000 if total[1] > 0 else None,
+                                     "loss": float(lost.sum() / sent.sum() * 100) if sent.sum() > 0 else None})
+            summary["flows"].append(flow)
+        return summary, arrays
+
+
+def capture_origin(path: str) -> float:
+    """Return the timestamp of the first record of a capture"""
+
+    reader = RawPcapReader(path)
+    try:
+        for data, metadata in reader:
+            return timestamp(reader, metadata)
+    finally:
+        reader.close()
+    return 0.0
+
+
+def chunk_offsets(path: str, chunks: int) -> List[Tuple[int, int]]:
+    """Split a pcap file into `chunks` byte ranges aligned on records by walking the record headers"""
+
+    reader = RawPcapReader(path)
+    endian = reader.endian
+    reader.close()
+
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        step = max(1, (size - PCAP_HEADER) // chunks)
+        offsets = [PCAP_HEADER]
+        offset = PCAP_HEADER
+        f.seek(offset)
+        while True:
+            header = f.read(16)
+            if len(header) < 16:
+                break
+            offset += 16 + struct.unpack(endian + "IIII", header)[2]
+            f.seek(offset)
+            if offset - offsets[-1] >= step and offset < size:
+                offsets.append(offset)
+    return list(zip(offsets, offsets[1:] + [None]))
+
+
+def analyze_chunk(path: str, start: int, end: int, networks: List[str], origin: float, window: float):
+    """
+    Analyze the records of a capture between the byte offsets `start` and `end` (until the end
+    of the file for None). Return the analysis and the packets that may have been observed in
+    the neighbouring chunks, left to the caller to join
+    """
+
+    analysis = PcapAnalysis(networks, origin, window)
+    edges = []
+    f = open(path, "rb")
+    reader = RawPcapReader(f)
+    chunked = start != None and not isinstance(reader, RawPcapNgReader)
+    if chunked:
+        f.seek(start)
+    first = None
+    ts = origin
+    try:
+        while end == None or f.tell() < end:
+            record = next(reader, None)
+            if record == None:
+                break
+            data, metadata = record
+            ts = timestamp(reader, metadata)
+            if first == None:
+                first = ts
+            linktype = getattr(metadata, "linktype", None)
+            observation = decode(
+                reader.linktype if linktype == None else linktype, data)
+            if observation == None:
+                continue
+            analysis.observe(ts, observation)
+            for ident, entry in analysis.expire(ts):
+                if chunked and entry[1] < first + window:
+                    edges.append((ident, entry))
+                else:
+                    analysis.fold(entry)
+    finally:
+        reader.close()
+        f.close()
+
+    # the packets still pending may be seen again in the next chunk
+    edges.extend(analysis.pending.items())
+    analysis.pending = OrderedDict()
+    return analysis, edges
+
+
+def analyze_capture(path: str, networks: List[str], window: float = 5.0, jobs: int = 1) -> PcapAnalysis:
+    """
+    Analyze a capture in bounded memory, the capture is split in chunks analyzed by `jobs`
+    worker processes when several jobs are allowed
+    """
+
+    origin = capture_origin(path)
+    reader = RawPcapReader(path)
+    chunkable = not isinstance(reader, RawPcapNgReader)
+    reader.close()
+
+    if jobs > 1 and chunkable:
+        chunks = chunk_offsets(path, jobs * 4)
+        logging.info(
+            f"Analyzing {path} in {len(chunks)} chunks with {jobs} workers")
+        analysis = PcapAnalysis(networks, origin, window)
+        edges = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(analyze_chunk, [path] * len(chunks), [c[0] for c in chunks], [c[1] for c in chunks],
+                                   [networks] * len(chunks), [origin] * len(chunks), [window] * len(chunks))
+            for partial, partial_edges in results:
+                analysis.merge(partial)
+                edges.extend(partial_edges)
+    else:
+        analysis, edges = analyze_chunk(
+            path, None, None, networks, origin, window)
+    analysis.join(edges)
+    return analysis
+
+
+def write_report(analysis: PcapAnalysis, path: str) -> None:
+    """Write the flow summary to the YAML file `path` and the per second arrays next to it"""
+
+    summary, arrays = analysis.report()
+    yam = yaml.YAML()
+    yam.indent(sequence=4, offset=2)
+    with codecs.open(f"{path}.yaml", "w", encoding="utf-8") as summary_file:
+        yam.dump(summary, summary_file)
+    write_npz(f"{path}.npz", **arrays)
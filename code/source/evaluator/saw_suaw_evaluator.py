@@ -22,14 +22,21 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import codecs
+import logging
 import os
-import re
-import tikzplotlib
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
 from . import Evaluator
+from .store import ProbeStore, METRICS
+from .cache import ProbeCache
+from .aggregate import RunningAggregate, folder_fingerprint
+from .statistics import Statistics
+from .fairness import Fairness
+from .parser import Parser, parse_probes
+from .downsample import downsample
 from ..testbed.testbed import Testbed
 
 
@@ -38,18 +45,57 @@ APPLICATION_STREAMING = 0x02
 APPLICATION_VOIP = 0x03
 
 
+COLORS = ["red", "blue", "orange", "green", "purple"]
+# line style of the first and second scenario of a pair
+STYLES = [{"linestyle": "-", "marker": None},
+          {"linestyle": "dashed", "marker": None}]
+
+
+class FigureSpec(object):
+    """
+    Declarative description of a figure plotting one metric of every PDU of a pair of scenarios
+    """
+
+    def __init__(self, metric, ylabel, title, name, xlabel="Time (s)"):
+        self.metric = metric
+        self.ylabel = ylabel
+        self.title = title
+        self.name = name
+        self.xlabel = xlabel
+
+
+FIGURES = [
+    FigureSpec("throughput", "Throughput (Mbit/s)",
+               "Throughput of each QFI", "throughput"),
+    FigureSpec("trip_time", "Trip Time (ms)",
+               "Packet Delay Budget of each QFI", "packet_delay_budget"),
+    FigureSpec("loss", "Packet Error Rate (%)",
+               "Packet Error Rate of each QFI", "packet_error_rate"),
+    FigureSpec("jitter", "Jitter (ms)", "Jitter of each QFI", "jitter"),
+]
+
+# figures of the per UE fairness, drawn with --fairness
+FAIRNESS_FIGURES = [
+    FigureSpec("jain", "Jain's fairness index",
+               "Throughput fairness between the UEs of each QFI", "jain_fairness"),
+    FigureSpec("throughput", "Throughput spread (Mbit/s)",
+               "Throughput spread between the best and worst UE of each QFI", "throughput_spread"),
+]
+
+
 class Plot(object):
     """
     Plot class helper
     """
 
-    def __init__(self, x, y, legend, linestyle="-", marker=None, color=None):
+    def __init__(self, x, y, legend, linestyle="-", marker=None, color=None, band=None):
         self.x = x
         self.y = y
         self.legend = legend
         self.linestyle = linestyle
         self.marker = marker
         self.color = color
+        self.band = band
 
     def reset_color(self):
         self.color_index = 0
@@ -58,24 +104,66 @@ class Plot(object):
     def plot_fig(cls, xlabel, ylabel, title, *plots, savefig=False):
         px = 1/plt.rcParams['figure.dpi']
         i = 0
-        colors = ["red", "blue", "orange", "green", "purple"]
 
         if savefig != False:
-            plt.figure(figsize=(2000*px, 1000*px))
+            fig = plt.figure(figsize=(2000*px, 1000*px))
         else:
-            plt.figure()
+            fig = plt.figure()
+        ax = fig.gca()
         for plot in plots:
             if plot.color == None:
-                plot.color = colors[i % len(colors)]
-            plt.plot(plot.x, plot.y, label=plot.legend,
-                     marker=plot.marker, color=plot.color, linestyle=plot.linestyle, linewidth=2)
-
-        plt.ylabel(ylabel)
-        plt.xlabel(xlabel)
-        plt.title(title)
-        plt.legend(loc='upper right')
+                plot.color = COLORS[i % len(COLORS)]
+            ax.plot(plot.x, plot.y, label=plot.legend,
+                    marker=plot.marker, color=plot.color, linestyle=plot.linestyle, linewidth=2)
+            if plot.band != None:
+                ax.fill_between(plot.x, plot.band[0], plot.band[1],
+                                color=plot.color, alpha=0.2, linewidth=0)
+
+        ax.set_ylabel(ylabel)
+        ax.set_xlabel(xlabel)
+        ax.set_title(title)
+        ax.legend(loc='upper right')
         if savefig != False:
-            plt.savefig(fname=f"{savefig}.pdf")
+            fig.savefig(fname=f"{savefig}.pdf")
+        return fig
+
+
+class Figure(object):
+    """
+    Figure description, picklable so it can be rendered in a worker process
+    """
+
+    def __init__(self, xlabel, ylabel, title, plots, path, tikz=False):
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.title = title
+        self.plots = plots
+        self.path = path
+        self.tikz = tikz
+
+    def draw(self, savefig=False):
+        return Plot.plot_fig(self.xlabel, self.ylabel, self.title, *self.plots, savefig=savefig)
+
+
+def use_agg() -> None:
+    """Select the non interactive Agg backend in rendering worker processes"""
+    plt.switch_backend("Agg")
+
+
+def render_figure(figure: Figure) -> str:
+    """Render `figure` to PDF, and to TikZ code if requested, then close it"""
+
+    fig = figure.draw(savefig=figure.path)
+    try:
+        if figure.tikz:
+            # tikzplotlib is slow to import and only needed for contributions
+            import tikzplotlib
+            tikzplotlib.clean_figure(fig)
+            tikzplotlib.save(f"{figure.path}.tex", figure=fig, textsize=5,
+                             axis_width="\\textwidth")
+    finally:
+        plt.close(fig)
+    return figure.path
 
 
 class Slice(object):
@@ -90,483 +178,338 @@ class Slice(object):
         self.qfi = {}
         self.aware = aware
 
-    def order(self, max_duration: int):
-        for pdu in self.pdu:
-            pdu.order(self.s.start, self.s.end, max_duration)
+    def aggregate(self, store: ProbeStore):
+        """Build one Dataset per application of the slice from the probe store"""
 
-    def aggregate(self):
+        names = {APPLICATION_VOIP: "VoIP QFI 7",
+                 APPLICATION_STREAMING: "Streaming QFI 6",
+                 APPLICATION_WEB: "Web QFI 9"}
 
         pdus = []
-
-        voip = [Probe(0, 0, 0, 0) for i in range(len(self.pdu[0].probes))]
-        streaming = [Probe(0, 0, 0, 0) for i in range(len(self.pdu[0].probes))]
-        web = [Probe(0, 0, 0, 0) for i in range(len(self.pdu[0].probes))]
-        vi = 0
-        si = 0
-        wi = 0
-
-        probes = None
-        for pdu in self.pdu:
-            if pdu.application.code == APPLICATION_VOIP:
-                probes = voip
-                vi += 1
-            elif pdu.application.code == APPLICATION_STREAMING:
-                probes = streaming
-                si += 1
-            else:
-                probes = web
-                wi += 1
-            for i in range(len(probes)):
-                if type(pdu.probes[i]) != int:
-                    probes[i].jitter += pdu.probes[i].jitter
-                    probes[i].trip_time += pdu.probes[i].trip_time
-                    probes[i].loss += pdu.probes[i].loss
-                    probes[i].throughput += pdu.probes[i].throughput
-
-        if vi > 0:
-            for i in range(len(voip)):
-                if type(voip[i]) != int:
-                    voip[i].jitter /= vi
-                    voip[i].trip_time /= vi
-                    voip[i].loss /= vi
+        for code, apps in store.groups(self.index, [APPLICATION_VOIP, APPLICATION_STREAMING, APPLICATION_WEB]):
             vdata = Dataset()
-            vdata.legend = f"{'SAW' if self.aware else 'SUAW'} {self.index} - VoIP QFI 7"
-            vdata.legend_pdb = f"{'SAW' if self.aware else 'SUAW'} {self.index} - VoIP QFI 7"
-            vdata.probes = voip
-            pdus.append(vdata)
-
-        if si > 0:
-            for i in range(len(streaming)):
-                if type(streaming[i]) != int:
-                    streaming[i].jitter /= si
-                    streaming[i].trip_time /= si
-                    streaming[i].loss /= si
-            vdata = Dataset()
-            vdata.legend = f"{'SAW' if self.aware else 'SUAW'} {self.index} - Streaming QFI 6"
-            vdata.legend_pdb = f"{'SAW' if self.aware else 'SUAW'} {self.index} - Streaming QFI 6"
-            vdata.probes = streaming
-            pdus.append(vdata)
-
-        if wi > 0:
-            for i in range(len(web)):
-                if type(web[i]) != int:
-                    web[i].jitter /= wi
-                    web[i].trip_time /= wi
-                    web[i].loss /= wi
-            vdata = Dataset()
-            vdata.legend = f"{'SAW' if self.aware else 'SUAW'} {self.index} - Web QFI 9"
-            vdata.legend_pdb = f"{'SAW' if self.aware else 'SUAW'} {self.index} - Web QFI 9"
-            vdata.probes = web
+            vdata.slice = self.index
+            vdata.application = names[code]
+            vdata.apps = apps
+            vdata.columns = store.aggregate(self.index, apps)
+            vdata.legend = f"{'SAW' if self.aware else 'SUAW'} {self.index} - {names[code]}"
+            vdata.legend_pdb = f"{'SAW' if self.aware else 'SUAW'} {self.index} - {names[code]}"
             pdus.append(vdata)
 
         self.pdu = pdus
 
 
-class Probe(object):
-
-    def __init__(self, throughput, trip_time, loss, jitter):
-        self.throughput = throughput
-        self.trip_time = trip_time
-        self.loss = loss
-        self.jitter = jitter
-
-
 class Dataset(object):
 
     def __init__(self):
         self.slice = None
-        self.probes = []
+        self.columns = {}
         self.application = None
+        self.apps = []
         self.legend = None
         self.legend_pdb = None
 
-    def order(self, start: int, end: int, max_duration: int):
-        if len(self.probes) == 0:
-            self.probes = [Probe(0, 100, 100, 0) for i in range(max_duration)]
-            return
-        k = 0
-        y = np.zeros(max_duration, dtype=Probe)
-        for i in range(start, end):
-            y[i] = self.probes[k]
-            k += 1
-        self.probes = y
-
     def get_throughput(self):
-        return [probe.throughput if probe != 0 else 0 for probe in self.probes]
+        return self.columns["throughput"]
 
     def get_trip_time(self):
-        return [probe.trip_time if probe != 0 else 0 for probe in self.probes]
+        return self.columns["trip_time"]
 
     def get_loss(self):
-        return [probe.loss if probe != 0 else 0 for probe in self.probes]
+        return self.columns["loss"]
 
     def get_jitter(self):
-        return [probe.jitter if probe != 0 else 0 for probe in self.probes]
-
-
-class Parser(object):
-
-    @classmethod
-    def parse_throughput(cls, thpt):
-        return float(thpt) / 1000 / 1000
-
-    @classmethod
-    def parse_jitter(cls, jitter):
-        return float(jitter)
-
-    @classmethod
-    def parse_trip_time(cls, tt):
-        return float(tt)
-
-    @classmethod
-    def parse_loss(cls, loss):
-        regex = r"([0-9]+)"
-        rate = re.findall(regex, loss)[0]
-        return float(rate)
-
-    @classmethod
-    def parse_web_application(cls, lines, duration):
-        k = 0
-        dataset = Dataset()
-        for line in lines:
-            if "received" not in line and k < duration:
-                l = line.strip().split()
-                thpt, jitter, error_rate, rt = l[6], l[8], l[11], l[12].split(
-                    "/")[0]
-                dataset.probes.append(
-                    Probe(cls.parse_throughput(thpt),
-                          cls.parse_trip_time(rt),
-                          cls.parse_loss(error_rate),
-                          cls.parse_jitter(jitter),
-                          )
-                )
-                k += 1
-        return dataset
-
-    @classmethod
-    def parse_voip_application(cls, lines, duration):
-        k = 0
-        dataset = Dataset()
-        for line in lines:
-            if "received" not in line and k < duration:
-                l = line.strip().split()
-                thpt, jitter, error_rate, rt = l[6], l[8], l[11], l[12].split(
-                    "/")[0]
-                dataset.probes.append(
-                    Probe(cls.parse_throughput(thpt),
-                          cls.parse_trip_time(rt),
-                          cls.parse_loss(error_rate),
-                          cls.parse_jitter(jitter),
-                          )
-                )
-                k += 1
-        return dataset
-
-    @classmethod
-    def parse_streaming_application(cls, lines, duration):
-        k = 0
-        dataset = Dataset()
-        for line in lines:
-            if "received" not in line and k < duration:
-                l = line.strip().split()
-                thpt, jitter, error_rate, rt = l[6], l[8], l[11], l[12].split(
-                    "/")[0]
-                dataset.probes.append(
-                    Probe(cls.parse_throughput(thpt),
-                          cls.parse_trip_time(rt),
-                          cls.parse_loss(error_rate),
-                          cls.parse_jitter(jitter),
-                          )
-                )
-                k += 1
-        return dataset
-
-    @classmethod
-    def parse_application(cls, application, ue_index, slice_index, file_path, duration):
-        pth = f"{file_path}/ue-{ue_index}_{application.name.lower()}_{slice_index}_probes.txt"
-        lines = None
-        with codecs.open(pth, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        dataset = None
-        if application.code == APPLICATION_WEB:
-            dataset = cls.parse_web_application(lines[8::], duration)
-        elif application.code == APPLICATION_STREAMING:
-            dataset = cls.parse_streaming_application(lines[8::], duration)
-        else:
-            dataset = cls.parse_voip_application(lines[8::], duration)
-
-        dataset.application = application
-        dataset.slice = slice_index
-        dataset.legend = f"UE-{ue_index} - Slice {slice_index} - {application.name} QFI {application.qi} - {application.get_data_rate()}"
-        dataset.legend_pdb = f"UE-{ue_index} - Slice {slice_index} - {application.name} QFI {application.qi} - {application.pdb} ms"
-        return dataset
+        return self.columns["jitter"]
 
 
 class SSEvaluator(Evaluator):
     """SAW and SUAW evaluator"""
 
     def init_folder(self, receipes_folder: str):
-        pth = f"{receipes_folder}/eval_{self.t1.scenario.name}_{self.t2.scenario.name}"
-        self.output_path = pth
-        if not os.path.exists(pth):
-            os.makedirs(pth)
+        self.receipes_folder = receipes_folder
+        for first, second in self.pairs:
+            pth = self.output_folder(first, second)
+            if not os.path.exists(pth):
+                os.makedirs(pth)
 
-    def parse_slices(self, testbed: Testbed, aware: bool) -> List:
+    def output_folder(self, first: int, second: int) -> str:
+        return f"{self.receipes_folder}/eval_{self.testbeds[first].scenario.name}_{self.testbeds[second].scenario.name}"
+
+    def parse_store(self, testbed: Testbed, first: int = 0, last: int = None) -> ProbeStore:
+        """
+        Parse the probe files of the iterations `first` to `last` (excluded, all iterations by default)
+        of `testbed` into a ProbeStore, reusing the probe cache when enabled
+        """
 
-        parsed = []
         slices = testbed.scenario.repository.get_misc("slices")
-        n_slice = len(slices)
         n_ue = len(testbed.scenario.repository.get_misc("users"))
-        iterations = testbed.iterations
+        iterations = (testbed.iterations if last == None else last) - first
         base_path = testbed.receipes
+        max_duration = testbed.scenario.get_max_duration(slices)
 
-        for i in range(iterations):
-            pth: str = f"{base_path}/iteration-{i}"
-
-            max_duration = testbed.scenario.get_max_duration(slices)
+        store = ProbeStore(iterations, slices, n_ue, max_duration)
+        caches = [ProbeCache(f"{base_path}/cache/iteration-{first + i}.npz", f"{base_path}/iteration-{first + i}")
+                  for i in range(iterations)] if self.cache else None
 
-            slices_probes: List[Slice] = [Slice(i, slices[i], aware)
-                                          for i in range(n_slice)]
+        indexes = []
+        paths = []
+        durations = []
+        stats = []
+        hits = 0
+        for i in range(iterations):
+            pth: str = f"{base_path}/iteration-{first + i}"
 
             for k in range(len(slices)):
                 for j in range(n_ue):
-                    for app in slices[k].applications:
-                        slices_probes[k].pdu.append(Parser.parse_application(
-                            app, j, k, pth, (slices[k].end - slices[k].start)))
-
-            for s in slices_probes:
-                s.order(max_duration)
-
-            for s in slices_probes:
-                s.aggregate()
-
-            parsed.append(slices_probes)
-
-        return parsed
-
-    def mean_slices(self, probes: List, testbed: Testbed) -> List:
-
-        tmp = probes[::][0]
-        iterations = testbed.iterations
-        for i in range(1, iterations):
-            for k in range(len(tmp)):
-                for p in range(len(probes[i][k].pdu)):
-                    for j in range(len(probes[i][k].pdu[p].probes)):
-                        if type(probes[i][k].pdu[p].probes[j]) != int:
-                            tmp[k].pdu[p].probes[j].jitter += probes[i][k].pdu[p].probes[j].jitter
-                            tmp[k].pdu[p].probes[j].trip_time += probes[i][k].pdu[p].probes[j].trip_time
-                            tmp[k].pdu[p].probes[j].loss += probes[i][k].pdu[p].probes[j].loss
-                            tmp[k].pdu[p].probes[j].throughput += probes[i][k].pdu[p].probes[j].throughput
-
-        for k in range(len(tmp)):
-            for p in range(len(tmp[k].pdu)):
-                for j in range(len(tmp[k].pdu[p].probes)):
-                    if type(tmp[k].pdu[p].probes[j]) != int:
-                        tmp[k].pdu[p].probes[j].jitter /= iterations
-                        tmp[k].pdu[p].probes[j].trip_time /= iterations
-                        tmp[k].pdu[p].probes[j].loss /= iterations
-                        tmp[k].pdu[p].probes[j].throughput /= iterations
-
-        return tmp
+                    for a in range(len(slices[k].applications)):
+                        path = Parser.probe_path(
+                            slices[k].applications[a], j, k, pth)
+                        duration = slices[k].end - slices[k].start
+                        if self.cache:
+                            stat = os.stat(path)
+                            probes = caches[i].get(path, stat, duration)
+                            if probes is not None:
+                                store.insert(
+                                    i, k, j, a, dict(zip(METRICS, probes)))
+                                hits += 1
+                                continue
+                            stats.append(stat)
+                        indexes.append((i, k, j, a))
+                        paths.append(path)
+                        durations.append(duration)
+
+        if self.cache:
+            logging.info(
+                f"{hits} probe files of {testbed.scenario.name} loaded from cache, {len(paths)} to parse")
+
+        if self.jobs > 1:
+            logging.info(
+                f"Parsing {len(paths)} probe files of {testbed.scenario.name} with {self.jobs} workers")
+            chunksize = max(1, len(paths) // (self.jobs * 4))
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                parsed = executor.map(parse_probes, paths,
+                                      durations, chunksize=chunksize)
+                for e, (probes, digest) in enumerate(parsed):
+                    store.insert(*indexes[e], dict(zip(METRICS, probes)))
+                    if self.cache:
+                        caches[indexes[e][0]].put(
+                            paths[e], stats[e], durations[e], probes, digest)
+        elif self.cache:
+            for e in range(len(paths)):
+                probes, digest = parse_probes(paths[e], durations[e])
+                store.insert(*indexes[e], dict(zip(METRICS, probes)))
+                caches[indexes[e][0]].put(
+                    paths[e], stats[e], durations[e], probes, digest)
+        else:
+            for index, path, duration in zip(indexes, paths, durations):
+                n = Parser.parse_file(path, duration, store.view(*index))
+                store.fill(*index, n)
 
-    def evaluate(self, contribution: bool, plot: bool) -> None:
+        if self.cache:
+            for cache in caches:
+                cache.save()
 
-        sl_saw = self.parse_slices(self.t1, True)
-        sl_suaw = self.parse_slices(self.t2, False)
+        return store
 
-        slices_sa = self.mean_slices(sl_saw, self.t1)
-        slices_non_sa = self.mean_slices(sl_suaw, self.t2)
+    def parse_slices(self, testbed: Testbed, aware: bool, first: int = 0, last: int = None) -> List:
 
-        max_duration = self.t1.scenario.get_max_duration(
-            self.t1.scenario.repository.get_misc("slices"))
-        x = np.arange(max_duration)
+        return self.build_slices(self.parse_store(testbed, first, last), aware)
 
-        i = 0
-        colors = ["red", "blue", "orange", "green", "purple"]
-
-        if contribution:
-            markers = [None, None, "*"]
-            p = []
-            k = 0
-            for s in slices_non_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_throughput(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                    i += 1
-            k += 1
-            i = 0
-            for s in slices_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_throughput(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                    i += 1
-            Plot.plot_fig("Time (s)", "Throughput (Mbit/s)",
-                          "Throughput of each QFI", *p, savefig=f"{self.output_path}/throughput")
-
-            tikzplotlib.clean_figure()
-            tikzplotlib.save(f"{self.output_path}/throughput.tex", textsize=5,
-                             axis_width="\\textwidth")
-            plt.clf()
-            plt.cla()
-            plt.close()
-
-            p = []
-            k = 0
-            i = 0
-            for s in slices_non_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_trip_time(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                    i += 1
-            k += 1
-            i = 0
-            for s in slices_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_trip_time(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                    i += 1
-
-            Plot.plot_fig("Time (s)", "Trip Time (ms)",
-                          "Packet Delay Budget of each QFI", *p)
-
-            tikzplotlib.clean_figure()
-            tikzplotlib.save(f"{self.output_path}/packet_delay_budget.tex", textsize=5,
-                             axis_width="\\textwidth")
-            plt.clf()
-            plt.cla()
-            plt.close()
-
-            p = []
-            k = 0
-            i = 0
-
-            for s in slices_non_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_loss(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                    i += 1
-            k += 1
-            i = 0
-            for s in slices_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_loss(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                    i += 1
-
-            Plot.plot_fig("Time (s)", "Packet Error Rate (%)",
-                          "Packet Error Rate of each QFI", *p)
-
-            tikzplotlib.clean_figure()
-            tikzplotlib.save(f"{self.output_path}/packet_error_rate.tex", textsize=5,
-                             axis_width="\\textwidth")
-            plt.clf()
-            plt.cla()
-            plt.close()
-
-            p = []
-            k = 0
-            i = 0
-            for s in slices_non_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_jitter(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                    i += 1
-            k += 1
-            i = 0
-            for s in slices_sa:
-                for a in s.pdu:
-                    p.append(Plot(x, a.get_jitter(),
-                                  legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                    i += 1
-
-            Plot.plot_fig("Time (s)", "Jitter (ms)",
-                          "Jitter of each QFI", *p)
-
-            tikzplotlib.clean_figure()
-            tikzplotlib.save(f"{self.output_path}/jitter.tex", textsize=5,
-                             axis_width="\\textwidth")
-            plt.clf()
-            plt.cla()
-            plt.close()
+    def build_slices(self, store: ProbeStore, aware: bool) -> List:
 
-        ###########################
-        markers = [None, None, "*"]
-        i = 0
-        p = []
-        k = 0
-        for s in slices_non_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_throughput(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                i += 1
-        k += 1
-        i = 0
-        for s in slices_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_throughput(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                i += 1
-        Plot.plot_fig("Time (s)", "Throughput (Mbit/s)",
-                      "Throughput of each QFI", *p, savefig=f"{self.output_path}/throughput")
-
-        p = []
-        k = 0
-        i = 0
-        for s in slices_non_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_trip_time(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                i += 1
-        k += 1
-        i = 0
-        for s in slices_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_trip_time(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                i += 1
+        slices = store.slices
 
-        Plot.plot_fig("Time (s)", "Trip Time (ms)",
-                      "Packet Delay Budget of each QFI", *p, savefig=f"{self.output_path}/packet_delay_budget")
+        slices_probes: List[Slice] = [Slice(k, slices[k], aware)
+                                      for k in range(len(slices))]
+        for s in slices_probes:
+            s.aggregate(store)
 
-        p = []
-        k = 0
-        i = 0
+        return slices_probes
 
-        for s in slices_non_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_loss(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                i += 1
-        k += 1
-        i = 0
-        for s in slices_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_loss(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                i += 1
+    def mean_slices(self, probes: List, testbed: Testbed) -> List:
 
-        Plot.plot_fig("Time (s)", "Packet Error Rate (%)",
-                      "Packet Error Rate of each QFI", *p, savefig=f"{self.output_path}/packet_error_rate")
+        for s in probes:
+            for pdu in s.pdu:
+                pdu.columns = {name: values.mean(axis=0)
+                               for name, values in pdu.columns.items()}
+
+        return probes
+
+    def aggregate_slices(self, testbed: Testbed, aware: bool) -> Tuple[List, Statistics]:
+        """
+        Fold the newly completed iterations of `testbed` into the running aggregate
+        persisted in its receipes folder and return the cross-iteration mean slices
+        with their statistics
+        """
+
+        completed = testbed.completed_iterations()
+        if completed == 0:
+            logging.error(
+                f"No completed iteration for scenario {testbed.scenario.name}, I QUIT !")
+            sys.exit(1)
+
+        path = f"{testbed.receipes}/aggregate.npz"
+        folders = [f"{testbed.receipes}/iteration-{i}" for i in range(completed)]
+        scenario_slices = testbed.scenario.repository.get_misc("slices")
+        duration = testbed.scenario.get_max_duration(scenario_slices)
+        # the PDUs and their legends only depend on the scenario, an empty store holds no iteration to parse
+        slices = self.build_slices(ProbeStore(0, scenario_slices, len(
+            testbed.scenario.repository.get_misc("users")), duration), aware)
+        legends = [pdu.legend for s in slices for pdu in s.pdu]
+        aggregate = RunningAggregate.load(path, legends, duration, folders)
+
+        if aggregate.count < completed:
+            logging.info(
+                f"Merging iterations {aggregate.count} to {completed - 1} of {testbed.scenario.name}")
+            fingerprints = [folder_fingerprint(f)
+                            for f in folders[aggregate.count:]]
+            aggregate.update(self.parse_slices(
+                testbed, aware, aggregate.count, completed), fingerprints)
+            aggregate.save(path)
+        else:
+            logging.info(
+                f"No new iteration of {testbed.scenario.name} to merge")
+
+        return aggregate.apply(slices), Statistics.from_aggregate(aggregate)
+
+    def evaluate_scenario(self, testbed: Testbed) -> Tuple[List, Statistics, Fairness]:
+        """
+        Return the cross-iteration mean slices of `testbed` with their statistics
+        and, with --fairness, the fairness between its UEs
+        """
+
+        aware = testbed.scenario.scenario_type == "slice-aware"
+        fairness = None
+        if self.incremental:
+            slices, statistics = self.aggregate_slices(testbed, aware)
+            if self.fairness:
+                # fairness needs the per UE series of every iteration, read back from the probe cache
+                store = self.parse_store(
+                    testbed, 0, testbed.completed_iterations())
+                fairness = Fairness.from_store(
+                    store, self.build_slices(store, aware))
+            return slices, statistics, fairness
+
+        store = self.parse_store(testbed)
+        slices = self.build_slices(store, aware)
+        statistics = Statistics.from_slices(slices)
+        if self.fairness:
+            fairness = Fairness.from_store(store, slices)
+        return self.mean_slices(slices, testbed), statistics, fairness
 
-        p = []
-        k = 0
-        i = 0
-        for s in slices_non_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_jitter(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)], linestyle="dashed"))
-                i += 1
-        k += 1
-        i = 0
-        for s in slices_sa:
-            for a in s.pdu:
-                p.append(Plot(x, a.get_jitter(),
-                              legend=a.legend, marker=markers[k], color=colors[i % len(colors)]))
-                i += 1
+    def evaluate(self, contribution: bool, plot: bool) -> None:
 
-        Plot.plot_fig("Time (s)", "Jitter (ms)",
-                      "Jitter of each QFI", *p, savefig=f"{self.output_path}/jitter")
+        # every scenario is parsed once and shared by all the pairs it belongs to
+        evaluated = {}
+        for first, second in self.pairs:
+            for t in (first, second):
+                if t not in evaluated:
+                    evaluated[t] = self.evaluate_scenario(self.testbeds[t])
+
+        figures = []
+        for first, second in self.pairs:
+            output_path = self.output_folder(first, second)
+            for t in (first, second):
+                evaluated[t][1].write(
+                    f"{output_path}/statistics_{self.testbeds[t].scenario.name}")
+                if self.fairness:
+                    evaluated[t][2].write(
+                        f"{output_path}/fairness_{self.testbeds[t].scenario.name}")
+            figures.extend(self.pair_figures(
+                first, second, evaluated, output_path, contribution))
+            if self.fairness:
+                figures.extend(self.fairness_figures(
+                    first, second, evaluated, output_path, contribution))
+
+        self.render(figures)
 
         if plot:
+            for figure in figures:
+                figure.draw()
             plt.show()
+            plt.close("all")
+
+    def pair_series(self, first: int, second: int, evaluated: Dict) -> List[Tuple]:
+        """
+        Return the (position, PDU index, Dataset, legend, evaluation) of every PDU of the pair,
+        the second scenario comes first so it is drawn below the first one
+        """
+
+        pair = (first, second)
+        # scenarios of the same type are told apart by their name
+        same = self.testbeds[first].scenario.scenario_type == self.testbeds[second].scenario.scenario_type
+
+        series = []
+        for position in (1, 0):
+            testbed = self.testbeds[pair[position]]
+            evaluation = evaluated[pair[position]]
+            pdus = [a for s in evaluation[0] for a in s.pdu]
+            for i in range(len(pdus)):
+                a = pdus[i]
+                legend = f"{testbed.scenario.name} {a.slice} - {a.application}" if same else a.legend
+                series.append((position, i, a, legend, evaluation))
+        return series
+
+    def reduce_points(self, x: np.ndarray, y: np.ndarray, band: tuple = None) -> tuple:
+        """Downsample a series to the --points budget, keeping its extremes"""
+
+        if self.points == None:
+            return x, y, band
+        kept = downsample(self.downsampling, x, y, self.points)
+        if band != None:
+            band = (band[0][kept], band[1][kept])
+        return x[kept], y[kept], band
+
+    def pair_figures(self, first: int, second: int, evaluated: Dict, output_path: str, contribution: bool) -> List[Figure]:
+        """Build the figures of FIGURES comparing the scenarios `first` (solid) and `second` (dashed)"""
+
+        # collect the series of each PDU once
+        series = self.pair_series(first, second, evaluated)
+
+        figures = []
+        for spec in FIGURES:
+            plots = []
+            for position, i, a, legend, evaluation in series:
+                y = a.columns[spec.metric]
+                x = np.arange(len(y))
+                band = evaluation[1].band(
+                    spec.metric, i) if self.confidence else None
+                x, y, band = self.reduce_points(x, y, band)
+                plots.append(Plot(x, y, legend=legend, color=COLORS[i % len(COLORS)],
+                                  band=band, **STYLES[position]))
+            figures.append(Figure(spec.xlabel, spec.ylabel, spec.title,
+                                  plots, f"{output_path}/{spec.name}", contribution))
+
+        return figures
+
+    def fairness_figures(self, first: int, second: int, evaluated: Dict, output_path: str, contribution: bool) -> List[Figure]:
+        """Build the figures of FAIRNESS_FIGURES comparing the UEs fairness of the scenarios `first` and `second`"""
+
+        series = self.pair_series(first, second, evaluated)
+
+        figures = []
+        for spec in FAIRNESS_FIGURES:
+            plots = []
+            for position, i, a, legend, evaluation in series:
+                x, y = evaluation[2].series(spec.metric, i)
+                x, y, band = self.reduce_points(x, y)
+                plots.append(Plot(x, y, legend=legend, color=COLORS[i % len(COLORS)],
+                                  **STYLES[position]))
+            figures.append(Figure(spec.xlabel, spec.ylabel, spec.title,
+                                  plots, f"{output_path}/{spec.name}", contribution))
+
+        return figures
+
+    def render(self, figures: List[Figure]) -> None:
+        """Render the figures to files, concurrently in Agg worker processes when several jobs are allowed"""
+
+        workers = min(self.jobs, len(figures))
+        if workers > 1:
+            logging.info(
+                f"Rendering {len(figures)} figures with {workers} workers")
+            with ProcessPoolExecutor(max_workers=workers, initializer=use_agg) as executor:
+                for path in executor.map(render_figure, figures):
+                    logging.info(f"Figure {path} rendered")
+        else:
+            for figure in figures:
+                logging.info(f"Figure {render_figure(figure)} rendered")
@@ -0,0 +1,172 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import numpy as np
+from typing import Dict, List
+from ruamel import yaml
+from .cache import write_npz
+from .store import METRICS
+
+# two-sided 95% Student t critical values for 1 to 30 degrees of freedom
+T_CRITICAL = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+              2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+              2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+PERCENTILES = [50, 95, 99]
+
+
+def t_critical(df: int) -> float:
+    """Return the two-sided 95% Student t critical value for `df` degrees of freedom"""
+
+    if df < 1:
+        return np.nan
+    if df <= len(T_CRITICAL):
+        return T_CRITICAL[df - 1]
+    # Cornish-Fisher expansion around the normal quantile
+    return 1.96 + (1.96 ** 3 + 1.96) / (4 * df)
+
+
+def pdu_windows(slices: List, duration: int) -> np.ndarray:
+    """Return the (PDU, second) mask of the active time window of each PDU of `slices`"""
+
+    windows = []
+    for s in slices:
+        for pdu in s.pdu:
+            window = np.zeros(duration, dtype=np.bool_)
+            window[s.s.start:s.s.end] = True
+            windows.append(window)
+    return np.array(windows, dtype=np.bool_).reshape(len(windows), duration)
+
+
+class Statistics(object):
+    """
+    Cross-iteration statistics of the PDU series of a testbed. Per second arrays are
+    shaped (PDU, second) and whole-run arrays (PDU,), the whole-run values are computed
+    over the active time window of the PDU slice
+    """
+
+    def __init__(self, legends: List[str], count: int) -> None:
+        self.legends = legends
+        self.count = count
+        self.second: Dict[str, Dict[str, np.ndarray]] = {}
+        self.run: Dict[str, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def from_slices(cls, slices: List):
+        """Compute the statistics from slices holding (iteration, second) PDU series"""
+
+        pdus = [pdu for s in slices for pdu in s.pdu]
+        count, duration = pdus[0].columns[METRICS[0]].shape
+        windows = pdu_windows(slices, duration)
+        statistics = Statistics([pdu.legend for pdu in pdus], count)
+        k = t_critical(count - 1)
+
+        for name in METRICS:
+            values = np.stack([pdu.columns[name] for pdu in pdus], axis=1)
+            std = values.std(axis=0, ddof=1) if count > 1 else np.full(
+                values.shape[1:], np.nan)
+            second = {"mean": values.mean(axis=0),
+                      "std": std,
+                      "ci95": k * std / np.sqrt(count)}
+            for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES, axis=0)):
+                second[f"p{q}"] = v
+            statistics.second[name] = second
+
+            runs = (values * windows).sum(axis=-1) / windows.sum(axis=-1)
+            samples = np.where(windows, values, np.nan).transpose(
+                1, 0, 2).reshape(len(pdus), -1)
+            run_std = runs.std(axis=0, ddof=1) if count > 1 else np.full(
+                len(pdus), np.nan)
+            run = {"mean": runs.mean(axis=0),
+                   "std": run_std,
+                   "ci95": k * run_std / np.sqrt(count)}
+            for q, v in zip(PERCENTILES, np.nanpercentile(samples, PERCENTILES, axis=1)):
+                run[f"p{q}"] = v
+            statistics.run[name] = run
+
+        return statistics
+
+    @classmethod
+    def from_aggregate(cls, aggregate):
+        """
+        Compute the statistics from a RunningAggregate, the percentiles need every
+        iteration series and are not available (NaN) in this case
+        """
+
+        statistics = Statistics(aggregate.legends, aggregate.count)
+        k = t_critical(aggregate.count - 1)
+        n = len(aggregate.legends)
+
+        for name in METRICS:
+            std = np.sqrt(aggregate.variance(name)) if aggregate.count > 1 else np.full(
+                aggregate.mean[name].shape, np.nan)
+            second = {"mean": aggregate.mean[name].copy(),
+                      "std": std,
+                      "ci95": k * std / np.sqrt(aggregate.count)}
+            runs = aggregate.runs[name]
+            run_std = runs.std(axis=0, ddof=1) if aggregate.count > 1 else np.full(
+                n, np.nan)
+            run = {"mean": runs.mean(axis=0),
+                   "std": run_std,
+                   "ci95": k * run_std / np.sqrt(aggregate.count)}
+            for q in PERCENTILES:
+                second[f"p{q}"] = np.full(aggregate.mean[name].shape, np.nan)
+                run[f"p{q}"] = np.full(n, np.nan)
+            statistics.second[name] = second
+            statistics.run[name] = run
+
+        return statistics
+
+    def band(self, name: str, p: int) -> tuple:
+        """Return the lower and upper bounds of the 95% confidence interval of PDU `p` for metric `name`"""
+
+        mean = self.second[name]["mean"][p]
+        ci = np.nan_to_num(self.second[name]["ci95"][p])
+        return mean - ci, mean + ci
+
+    def summary(self) -> Dict:
+        """Return the whole-run statistics of each PDU as a plain dictionary"""
+
+        summary = {}
+        for p, legend in enumerate(self.legends):
+            summary[legend] = {
+                name: {key: None if np.isnan(values[p]) else round(float(values[p]), 6)
+                       for key, values in self.run[name].items()}
+                for name in METRICS
+            }
+        return {"iterations": self.count, "pdu": summary}
+
+    def write(self, path: str) -> None:
+        """Write the whole-run summary to the YAML file `path` and the per second arrays next to it"""
+
+        yam = yaml.YAML()
+        yam.indent(sequence=4, offset=2)
+        with codecs.open(f"{path}.yaml", "w", encoding="utf-8") as summary_file:
+            yam.dump(self.summary(), summary_file)
+
+        arrays = {"legends": np.array(self.legends, dtype=str)}
+        for name in METRICS:
+            for key, values in self.second[name].items():
+                arrays[f"{name}_{key}"] = values
+        write_npz(f"{path}.npz", **arrays)
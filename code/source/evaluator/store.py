@@ -0,0 +1,108 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+METRICS = ["throughput", "trip_time", "loss", "jitter"]
+
+
+class ProbeStore(object):
+    """
+    Columnar probe store, each metric is a float array indexed by
+    (iteration, slice, UE, application, second) and `mask` flags the
+    seconds holding a parsed sample
+    """
+
+    def __init__(self, iterations: int, slices: List, n_ue: int, duration: int) -> None:
+        self.slices = slices
+        self.iterations = iterations
+        self.n_ue = n_ue
+        self.duration = duration
+        n_app = max([len(s.applications) for s in slices])
+        shape = (iterations, len(slices), n_ue, n_app, duration)
+        self.throughput = np.zeros(shape, dtype=np.float64)
+        self.trip_time = np.zeros(shape, dtype=np.float64)
+        self.loss = np.zeros(shape, dtype=np.float64)
+        self.jitter = np.zeros(shape, dtype=np.float64)
+        self.mask = np.zeros(shape, dtype=np.bool_)
+
+    def metric(self, name: str) -> np.ndarray:
+        return getattr(self, name)
+
+    def view(self, iteration: int, slice_index: int, ue_index: int, app_index: int) -> Dict[str, np.ndarray]:
+        """Return writable views on the slice time window of a PDU"""
+
+        index = (iteration, slice_index, ue_index, app_index)
+        s = self.slices[slice_index]
+        return {name: self.metric(name)[index][s.start:s.end] for name in METRICS}
+
+    def fill(self, iteration: int, slice_index: int, ue_index: int, app_index: int, n: int) -> None:
+        """Flag the `n` first samples written through `view` as present"""
+
+        index = (iteration, slice_index, ue_index, app_index)
+        if n == 0:
+            # no sample at all, the PDU is considered lost for the whole run
+            self.trip_time[index] = 100
+            self.loss[index] = 100
+            return
+
+        start = self.slices[slice_index].start
+        self.mask[index][start:start + n] = True
+
+    def insert(self, iteration: int, slice_index: int, ue_index: int, app_index: int, columns: Dict[str, np.ndarray]) -> None:
+        """Place the samples of a PDU in the store starting at the slice start time"""
+
+        n = len(columns["throughput"])
+        view = self.view(iteration, slice_index, ue_index, app_index)
+        for name in METRICS:
+            view[name][:n] = columns[name]
+        self.fill(iteration, slice_index, ue_index, app_index, n)
+
+    def groups(self, slice_index: int, codes: List[int]) -> List[Tuple[int, List[int]]]:
+        """Return the application indexes of a slice grouped by application code following `codes` order"""
+
+        applications = self.slices[slice_index].applications
+        groups = []
+        for code in codes:
+            apps = [a for a in range(len(applications))
+                    if applications[a].code == code]
+            if len(apps) > 0:
+                groups.append((code, apps))
+        return groups
+
+    def aggregate(self, slice_index: int, apps: List[int]) -> Dict[str, np.ndarray]:
+        """
+        Reduce the UEs and the applications `apps` of a slice for every iteration,
+        the throughput is summed while the other metrics are averaged
+        """
+
+        columns = {}
+        for name in METRICS:
+            values = self.metric(name)[:, slice_index][:, :, apps]
+            if name == "throughput":
+                columns[name] = values.sum(axis=(1, 2))
+            else:
+                columns[name] = values.mean(axis=(1, 2))
+        return columns
@@ -22,10 +22,10 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from ..utils.utils import HexInt, representer
 from typing import Dict, List
 from ruamel import yaml
 import codecs
+import copy
 import ipaddress
 import os
 import logging
@@ -43,6 +43,7 @@ class Repository(object):
         self.configurations_folder = None
         self.output_configuration_folder = None
         self.scenario_folder = None
+        self.writer = None
 
     def add_service(self, name: str, service: object) -> object:
         self.services[name] = service
@@ -64,6 +65,28 @@ class Repository(object):
         return o
 
 
+class Templates(object):
+    """
+    Process-wide cache of the parsed configuration templates, a template is parsed once
+    and each service receives its own deep copy, comments and formatting included
+    """
+
+    parsed: Dict[str, tuple] = {}
+
+    @classmethod
+    def load(cls, path: str) -> object:
+        """Return a copy of the round-trip parsed template `path`, parsed again if the file changed"""
+
+        mtime = os.stat(path).st_mtime_ns
+        cached = cls.parsed.get(path)
+        if cached == None or cached[0] != mtime:
+            with codecs.open(path, mode="r", encoding="utf8") as f:
+                cached = (mtime, yaml.load(
+                    f.read(), Loader=yaml.RoundTripLoader))
+            cls.parsed[path] = cached
+        return copy.deepcopy(cached[1])
+
+
 class Service(object):
     """Service class"""
 
@@ -77,27 +100,21 @@ class Service(object):
         self.entrypoint = None
 
         if self.configuration_file != None:
-            path = f"{repository.configurations_folder}/{self.configuration_file}"
-            with codecs.open(path, mode="r", encoding="utf8") as f:
-                self.configuration = yaml.load(
-                    f.read(), Loader=yaml.RoundTripLoader)
+            self.configuration = Templates.load(
+                f"{repository.configurations_folder}/{self.configuration_file}")
 
     def attach_network(self, name: str, address: ipaddress.IPv4Address):
         """Add a network address to the service"""
         self.networks[name] = address
 
-    def write_configuration(self, folder_path: str) -> None:
+    def write_configuration(self, folder_path: str, writer) -> None:
         """
-        Write the configuration file of the service
+        Queue the configuration file of the service in `writer`
         """
 
         if self.configuration_file != None:
-            path = f"{folder_path}/{self.name}.yaml"
-            yam = yaml.YAML()
-            yam.indent(sequence=4, offset=2)
-            with codecs.open(path, "w", encoding="utf-8") as configuration:
-                yam.representer.add_representer(HexInt, representer)
-                yam.dump(self.configuration, configuration)
+            writer.yaml(f"{folder_path}/{self.name}.yaml",
+                        self.configuration, [self.name])
 
     def configure(self, repository: Repository) -> None:
         """Configure the service"""
@@ -121,53 +138,143 @@ class Service(object):
     def write_entrypoint(self, repository: Repository) -> None:
         """Write the entrypoint if necessarily"""
         if self.entrypoint != None:
-            self.entrypoint.write(repository.containers_folder, self.name)
+            self.entrypoint.write(
+                repository.containers_folder, self.name, repository.writer)
 
 
 class Networker(object):
-    """Networker generates networks corresponding to RFC 1918 or custom networks"""
+    """
+    Networker generates networks corresponding to RFC 1918 or custom networks. Networks are
+    carved out of a pool with a cursor and the addresses of a network are allocated with
+    a per network cursor, the first host address is left to the docker gateway
+    """
 
     def __init__(self, custom: List[str] = None) -> None:
         if custom != None and len(custom) > 0:
-            self.pools: List[List[ipaddress.IPv4Network]] = [list(ipaddress.ip_interface(
-                a).network.subnets(new_prefix=24)) for a in custom]
-            self.pool_index: List[int] = [0 for j in range(self.pools)]
-            return
-        self.pools: List[List[ipaddress.IPv4Network]] = [list(ipaddress.ip_interface(
-            a).network.subnets(new_prefix=24)) for a in ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]]
-        self.pool_index: List[int] = [0, 0, 0]
+            try:
+                self.pools: List[ipaddress.IPv4Network] = [
+                    ipaddress.IPv4Interface(a).network for a in custom]
+            except ValueError as e:
+                logging.error(f"Invalid network pool: {e}, I QUIT !")
+                sys.exit(1)
+            self.default_pool = 0
+        else:
+            self.pools: List[ipaddress.IPv4Network] = [ipaddress.ip_network(
+                a) for a in ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]]
+            # the scenarios are generated in 172.16.0.0/12
+            self.default_pool = 1
+        # next free address of each pool as an integer
+        self.pool_cursor: List[int] = [
+            int(pool.network_address) for pool in self.pools]
+        # number of addresses allocated by cursor in each network
         self.networks: Dict[ipaddress.IPv4Network, int] = {}
         self.networks_name: Dict[str, ipaddress.IPv4Network] = {}
+        # host indexes reserved explicitly in each network
+        self.reserved: Dict[ipaddress.IPv4Network, Dict[int, str]] = {}
+
+    def add_network(self, name: str, network: ipaddress.IPv4Network) -> ipaddress.IPv4Network:
+        """Register `network` under `name`, it must not overlap an already registered network"""
 
-    def new_network(self, name: str = None, pool: int = 0) -> ipaddress.IPv4Network:
-        """Return the first available network belonging to `pool`"""
-        network = self.pools[pool][self.pool_index[pool]]
-        self.pool_index[pool] += 1
-        self.networks[network] = 0
-        if name == None:
-            name = str(len(self.networks_name))
         if name in self.networks_name:
             logging.error(f"Network name {name} already defined, I QUIT !")
             sys.exit(1)
+        for other, known in self.networks_name.items():
+            if network.overlaps(known):
+                logging.error(
+                    f"Network {name} ({network}) overlaps network {other} ({known}), I QUIT !")
+                sys.exit(1)
+        self.networks[network] = 0
+        self.reserved[network] = {}
         self.networks_name[name] = network
         return network
 
-    def get_address(self, name: str, index=None) -> ipaddress.IPv4Address:
-        """Return the first available network address of network `name`"""
+    def new_network(self, name: str = None, pool: int = None, prefix: int = 24) -> ipaddress.IPv4Network:
+        """Return the first available network of size `prefix` belonging to `pool`"""
+
+        if pool == None:
+            pool = self.default_pool
+        if pool >= len(self.pools):
+            logging.error(
+                f"Network pool {pool} undefined, only {len(self.pools)} pools available, I QUIT !")
+            sys.exit(1)
+        if prefix < self.pools[pool].prefixlen or prefix > 30:
+            logging.error(
+                f"Network prefix /{prefix} does not fit in pool {self.pools[pool]}, I QUIT !")
+            sys.exit(1)
+        if name == None:
+            name = str(len(self.networks_name))
+
+        # align the cursor on the network size
+        size = 2 ** (32 - prefix)
+        start = -(-self.pool_cursor[pool] // size) * size
+        if start + size > int(self.pools[pool].broadcast_address) + 1:
+            logging.error(
+                f"Network pool {self.pools[pool]} exhausted, cannot allocate a /{prefix} for network {name}, I QUIT !")
+            sys.exit(1)
+        network = ipaddress.IPv4Network((start, prefix))
+        self.add_network(name, network)
+        self.pool_cursor[pool] = start + size
+        return network
+
+    def fit_prefix(self, hosts: int, prefix: int = 24) -> int:
+        """Return `prefix`, or the longest shorter prefix holding `hosts` host addresses besides the gateway"""
+
+        while prefix > 0 and 2 ** (32 - prefix) < hosts + 3:
+            prefix -= 1
+        return prefix
+
+    def host(self, network: ipaddress.IPv4Network, index: int) -> ipaddress.IPv4Address:
+        """Return the host address `index` of `network`, counted from the first host address"""
+
+        if index < 0 or index >= network.num_addresses - 2:
+            logging.error(
+                f"Network {network} has no host address {index}, I QUIT !")
+            sys.exit(1)
+        return network.network_address + 1 + index
+
+    def reserve(self, name: str, index: int, owner: str = None) -> ipaddress.IPv4Address:
+        """Reserve the host address `index` of network `name`, the allocation cursor skips it"""
+
         network = self.networks_name[name]
-        self.networks[network] += 1
-        hosts = list(network.hosts())
-        if index != None:
-            return hosts[index]
-        address = hosts[self.networks[network]]
+        if index == 0:
+            logging.error(
+                f"Address {self.host(network, 0)} of network {name} is the gateway, I QUIT !")
+            sys.exit(1)
+        address = self.host(network, index)
+        if index in self.reserved[network] or 0 < index <= self.networks[network]:
+            logging.error(
+                f"Address {address} of network {name} already allocated, I QUIT !")
+            sys.exit(1)
+        self.reserved[network][index] = owner
         return address
 
+    def get_address(self, name: str, index=None) -> ipaddress.IPv4Address:
+        """Return the first available network address of network `name`, or reserve its host address `index`"""
+
+        if index != None:
+            return self.reserve(name, index)
+        return self.get_address_from_network(self.networks_name[name])
+
     def get_address_from_network(self, network: ipaddress.IPv4Network) -> ipaddress.IPv4Address:
         """Return the first available network address of `network`"""
+
         self.networks[network] += 1
-        hosts = list(network.hosts())
-        address = hosts[self.networks[network]]
-        return address
+        while self.networks[network] in self.reserved[network]:
+            self.networks[network] += 1
+        return self.host(network, self.networks[network])
+
+    def plan(self) -> Dict[str, Dict]:
+        """Return the address plan: subnet, gateway and number of allocated addresses of each network"""
+
+        plan = {}
+        for name in sorted(self.networks_name):
+            network = self.networks_name[name]
+            plan[name] = {"subnet": str(network),
+                          "gateway": str(self.host(network, 0)),
+                          # the cursor skipped the reservations below it
+                          "allocated": self.networks[network] + len([i for i in self.reserved[network] if i > self.networks[network]]),
+                          "capacity": network.num_addresses - 3}
+        return plan
 
 
 class CEntrypoint(object):
@@ -183,13 +290,11 @@ class CEntrypoint(object):
     def add_multiple_lines(self, lines: List[str]) -> None:
         self.entrypoint.extend(lines)
 
-    def write(self, path: str, name: str) -> None:
-        """Write the entrypoint bash script to the specified `path`"""
+    def write(self, path: str, name: str, writer, service: str = None) -> None:
+        """Queue the entrypoint bash script to the specified `path` in `writer`, `service` runs it (`name` by default)"""
 
-        path = f"{path}/{name}.sh"
-        with codecs.open(path, "w", encoding="utf-8") as entrypoint:
-            entrypoint.write(str(self))
-        os.chmod(path, 0o777)
+        writer.text(f"{path}/{name}.sh", str(self), 0o777,
+                    [service if service != None else name])
 
     def __str__(self) -> str:
         return "\n".join(self.entrypoint)
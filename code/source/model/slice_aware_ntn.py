@@ -26,7 +26,7 @@ SOFTWARE.
 import ipaddress
 from typing import List
 from ruamel import yaml
-from . import Service, Repository, CService, CEntrypoint
+from . import Service, Repository, CService, CEntrypoint, Templates
 from ..utils.utils import HexInt, representer, find_network
 import pprint
 import codecs
@@ -73,6 +73,10 @@ class Application(object):
     def get_data_rate(self):
         pass
 
+    def get_throughput(self) -> float:
+        """Return the data rate in Mbit/s"""
+        return float(self.data_rate)
+
     def get_log_server(self, server: str, sl: int):
         return f"{self.results}/{server}_{self.name.lower()}_{sl}_probes.txt"
 
@@ -103,6 +107,9 @@ class VoIP(Application):
     def get_data_rate(self):
         return f"{self.data_rate} kbit/s"
 
+    def get_throughput(self) -> float:
+        return self.data_rate / 1000
+
 
 class Streaming(Application):
 
@@ -155,6 +162,8 @@ class Web(Application):
 class Slice(object):
 
     def __init__(self, sst: str, sd: str, data_network: str, start: int, end: int):
+        # position of the slice among the slices of every link
+        self.index: int = None
         self.start = start
         self.end = end
         self.sst = sst
@@ -311,19 +320,18 @@ class UE(Service):
 
         i = 0
         for sl in slices:
-            for server in sl.servers[index]:
-                if f"{repository.containers_folder}/{self.name}-slice-{i}-app.sh:/ue/slice-{i}-app.sh" not in compose.volumes:
-                    compose.volumes.append(
-                        f"{repository.containers_folder}/{self.name}-slice-{i}-app.sh:/ue/slice-{i}-app.sh")
+            if len(sl.servers[index]) > 0:
+                compose.volumes.append(
+                    f"{repository.containers_folder}/{self.name}-slice-{i}-app.sh:/ue/slice-{i}-app.sh")
             i += 1
 
         compose.cap_add = ["NET_ADMIN"]
         compose.devices = ["/dev/net/tun"]
         compose.networks = self.networks
         depends_on: List[str] = ["gnb"]
-        index: int = int(self.name.split("-")[1])
         if index > 0:
-            depends_on.extend([f"ue-{i}" for i in range(index)])
+            # UEs start one after the other, depending on the previous UE is enough
+            depends_on.append(f"ue-{index - 1}")
         compose.depends_on = depends_on
         self.compose = compose
 
@@ -354,7 +362,7 @@ class UE(Service):
         i = 0
         for app in self.applications:
             app.write(f"{repository.containers_folder}",
-                      f"{self.name}-slice-{i}-app")
+                      f"{self.name}-slice-{i}-app", repository.writer, self.name)
             i += 1
 
 
@@ -445,14 +453,10 @@ class UPF(Service):
 
         classifier_cn = repository.get_service("classifier-cn")
         gnb = repository.get_service("gnb")
-        slices = repository.get_misc("slices")
 
-        ingress = [classifier_cn.networks.get(
-            f"classifier-cn-dp-{j}") for j in range(len(slices))]
-        ingress.append(classifier_cn.networks.get(f"sbi"))
-
-        classifier_ip = find_network(
-            self.networks.get(f"classifier-cn-dp-{index}"), ingress)
+        # the classifier ingress interface sharing the UPF network
+        classifier_ip = classifier_cn.networks.get(
+            f"classifier-cn-dp-{index}")
 
         ep = CEntrypoint.New()
 
@@ -651,10 +655,8 @@ class SMF(Service):
 
     def __init__(self, name: str, repository: Repository) -> None:
         super().__init__(name, repository)
-        path = f"{repository.configurations_folder}/{self.uerouting}"
-        with codecs.open(path, mode="r", encoding="utf8") as f:
-            self.uerouting = yaml.load(
-                f.read(), Loader=yaml.RoundTripLoader)
+        self.uerouting = Templates.load(
+            f"{repository.configurations_folder}/{self.uerouting}")
 
     def configure(self, repository: Repository) -> None:
         """Configure the SMF service"""
@@ -736,14 +738,10 @@ class SMF(Service):
             {"A": gnb.name, "B": upf.name} for upf in upfs
         ]
 
-    def write_configuration(self, folder_path: str) -> None:
-        super().write_configuration(folder_path)
-        path = f"{folder_path}/uerouting.yaml"
-        yam = yaml.YAML()
-        yam.indent(sequence=4, offset=2)
-        with codecs.open(path, "w", encoding="utf-8") as uerouting:
-            yam.representer.add_representer(HexInt, representer)
-            yam.dump(self.uerouting,  uerouting)
+    def write_configuration(self, folder_path: str, writer) -> None:
+        super().write_configuration(folder_path, writer)
+        writer.yaml(f"{folder_path}/uerouting.yaml",
+                    self.uerouting, [self.name])
 
     def configure_compose(self, repository: Repository) -> None:
         """Add a Compose configuration to the SMF"""
@@ -970,48 +968,31 @@ class TRUNKS(Service):
         classifier_cn = repository.get_service("classifier-cn")
         classifier_ran = repository.get_service("classifier-ran")
 
-        slices = repository.get_misc("slices")
         links = repository.get_misc("links")
         upfs = repository.get_misc("upfs")
         default_slice = repository.get_misc("default_slice")
         index = int(self.name.replace("trunks-", ""))
 
-        cran_ingress = [classifier_ran.networks.get("classifier-ran")]
-        cran_egress = [classifier_ran.networks.get(
-            f"st-classifier-{j}") for j in range(len(links))]
-        ccn_ingress = [classifier_cn.networks.get(
-            f"classifier-cn-dp-{j}") for j in range(len(slices))]
-        ccn_ingress.append(classifier_cn.networks.get(f"sbi"))
-        ccn_egress = [classifier_cn.networks.get(
-            f"gw-classifier-{j}") for j in range(len(links))]
+        # the classifier interfaces sharing the networks of the link
+        cn_gateway = classifier_cn.networks.get(f"gw-classifier-{index}")
+        ran_gateway = classifier_ran.networks.get(f"st-classifier-{index}")
 
         routes = []
 
         if index == default_slice:
             ip_network = ipaddress.ip_interface(
                 f"{amf.networks.get('sbi')}/24").network
-            gateway = find_network(self.networks.get(
-                f'gw-classifier-{index}'), ccn_egress)
-            routes.append((gateway, ip_network))
-        k = 0
-        if index > 0:
-            for i in range(index):
-                k += len(links[i].slices)
+            routes.append((cn_gateway, ip_network))
         for s in links[index].slices:
             # Find IP NETWORK of UPF and add Route to IP Network using the classifier CN interface
+            k = s.index
             ip_network = ipaddress.ip_interface(
                 f"{upfs[k].networks.get(f'classifier-cn-dp-{k}')}/24").network
-            gateway = find_network(self.networks.get(
-                f'gw-classifier-{index}'), ccn_egress)
-            if (gateway, ip_network) not in routes:
-                routes.append((gateway, ip_network))
-            k += 1
+            routes.append((cn_gateway, ip_network))
 
         ip_network = ipaddress.ip_interface(
             f"{gnb.networks.get('classifier-ran')}/24").network
-        gateway = find_network(self.networks.get(
-            f'st-classifier-{index}'), cran_egress)
-        routes.append((gateway, ip_network))
+        routes.append((ran_gateway, ip_network))
 
         ep = CEntrypoint.New()
         for route in routes:
@@ -1126,25 +1107,23 @@ class CLASSIFIER(Service):
                 ep.add_line(f"ip route add default via {r[2]} table link_{i}")
                 i += 1
 
+        # DSCP rewriting rules of the applications, in order of first appearance
+        q = list(dict.fromkeys(
+            [(app.terrestrial_dscp, app.ntn_dscp) for app in applications]))
+
         for interface in ingress:
-            q = []
             ep.add_line(
                 f"ETH=$(ip a | grep {interface} | awk '{{print ($7)}}')")
-            for app in applications:
-                if (app.terrestrial_dscp, app.ntn_dscp) not in q:
-                    ep.add_line(
-                        f"iptables -t mangle -A POSTROUTING -o $ETH -p udp --dport 2152 --sport 2152 -m dscp --dscp {hex(app.terrestrial_dscp)} -j DSCP --set-dscp {hex(app.ntn_dscp)}")
-                    q.append((app.terrestrial_dscp, app.ntn_dscp))
+            for terrestrial_dscp, ntn_dscp in q:
+                ep.add_line(
+                    f"iptables -t mangle -A POSTROUTING -o $ETH -p udp --dport 2152 --sport 2152 -m dscp --dscp {hex(terrestrial_dscp)} -j DSCP --set-dscp {hex(ntn_dscp)}")
 
         for interface in egress:
-            q = []
             ep.add_line(
                 f"ETH=$(ip a | grep {interface} | awk '{{print ($7)}}')")
-            for app in applications:
-                if (app.terrestrial_dscp, app.ntn_dscp) not in q:
-                    ep.add_line(
-                        f"iptables -t mangle -A POSTROUTING -o $ETH -p udp --dport 2152 --sport 2152 -m dscp --dscp {hex(app.ntn_dscp)} -j DSCP --set-dscp {hex(app.terrestrial_dscp)}")
-                    q.append((app.terrestrial_dscp, app.ntn_dscp))
+            for terrestrial_dscp, ntn_dscp in q:
+                ep.add_line(
+                    f"iptables -t mangle -A POSTROUTING -o $ETH -p udp --dport 2152 --sport 2152 -m dscp --dscp {hex(ntn_dscp)} -j DSCP --set-dscp {hex(terrestrial_dscp)}")
 
         k = 0
         for interface in ingress:
@@ -1176,7 +1155,6 @@ class NTNQOF(Service):
         applications: List[Application] = repository.get_misc("applications")
 
         links = repository.get_misc("links")
-        trunks = repository.get_misc("trunks")
         slices = repository.get_misc("slices")
 
         self.configuration['configuration']['sbi']['registerIPv4'] = str(sbi)
@@ -1203,11 +1181,10 @@ class NTNQOF(Service):
         j = 0
         k = 0
         for l in links:
+            # the classifier interfaces sharing the networks of the link trunks
+            ran_endpoint = classifier_ran.networks.get(f"st-classifier-{j}")
+            cn_endpoint = classifier_cn.networks.get(f"gw-classifier-{j}")
             for s in links[j].slices:
-                ran_endpoint = find_network(
-                    trunks[j].networks.get(f"st-classifier-{j}"), cran_egress)
-                cn_endpoint = find_network(
-                    trunks[j].networks.get(f"gw-classifier-{j}"), ccn_egress)
                 sl.append(
                     {
                         "id": k,
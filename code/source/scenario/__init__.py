@@ -24,12 +24,10 @@ SOFTWARE.
 
 import logging
 import sys
-import codecs
+from functools import partial
 from typing import Dict
-from cerberus import Validator
-from ruamel import yaml
 from ..model import Networker, Repository, Service
-from ..utils.utils import HexInt, representer
+from .graph import Graph
 
 
 class Scenario(object):
@@ -82,6 +80,34 @@ class Scenario(object):
             f"[{self.name}] generate_topology function undefined, I QUIT !")
         sys.exit(1)
 
+    def graph(self) -> Graph:
+        """
+        Return the dependency graph of the tasks configuring each service and queuing the files,
+        the topology being generated. The tasks of a service only read the topology (the networks
+        of the services and the miscs of the repository) and the state of the service itself
+        """
+
+        graph = Graph(["topology"])
+        repository = self.repository
+        for service in sorted(repository.services):
+            s: Service = repository.services.get(service)
+            graph.add(f"configure_services:{service}", "configure_services",
+                      partial(s.configure, repository), ["topology"], [f"{service}/configuration"])
+            graph.add(f"write_configuration:{service}", "write_configuration",
+                      partial(s.write_configuration, repository.output_configuration_folder, repository.writer),
+                      [f"{service}/configuration"])
+            graph.add(f"configure_compose:{service}", "configure_compose",
+                      partial(s.configure_compose, repository), ["topology"], [f"{service}/compose"])
+            graph.add(f"configure_entrypoint:{service}", "configure_entrypoint",
+                      partial(s.configure_entrypoint, repository), ["topology"], [f"{service}/entrypoint"])
+            graph.add(f"write_entrypoint:{service}", "write_entrypoint",
+                      partial(s.write_entrypoint, repository), [f"{service}/entrypoint"])
+        graph.add("write_compose", "write_compose", self.write_compose,
+                  ["topology"] + [f"{service}/compose" for service in sorted(repository.services)])
+        graph.add("write_address_plan", "write_address_plan",
+                  self.write_address_plan, ["topology"])
+        return graph
+
     def configure_services(self) -> None:
         """
         Configure all the services
@@ -110,16 +136,17 @@ class Scenario(object):
 
     def write_configuration(self) -> None:
         """
-        Write the configuration files of each service
+        Queue the configuration files of each service in the writer
         """
 
         for service in sorted(self.repository.services):
             s = self.repository.services.get(service)
-            s.write_configuration(self.repository.output_configuration_folder)
+            s.write_configuration(
+                self.repository.output_configuration_folder, self.repository.writer)
 
     def write_entrypoint(self) -> None:
         """
-        Write entrypoints for each service
+        Queue the entrypoints of each service in the writer
         """
 
         for service in sorted(self.repository.services):
@@ -128,7 +155,7 @@ class Scenario(object):
 
     def write_compose(self) -> None:
         """
-        Write docker-compose.yaml file
+        Queue the docker-compose.yaml file in the writer
         """
 
         output = {
@@ -163,13 +190,17 @@ class Scenario(object):
             }
             network_index += 1
 
-        path: str = f"{self.repository.scenario_folder}/{self.name}/docker-compose.yaml"
-        yam = yaml.YAML()
-        yam.indent(sequence=4, offset=2)
-        with codecs.open(path, "w", encoding="utf-8") as compose_file:
-            yam.dump(output,  compose_file)
-
-    def run(self) -> None:
+        # the compose file is shared, each service and network is tracked on its own
+        for service, compose in output["services"].items():
+            self.repository.writer.track(
+                f"services/{service}", compose, [service])
+        for network, compose in output["networks"].items():
+            self.repository.writer.track(f"networks/{network}", compose, [
+                s for s, c in output["services"].items() if network in c.get("networks", {})])
+        self.repository.writer.yaml(
+            f"{self.repository.scenario_folder}/{self.name}/docker-compose.yaml", output)
+
+    def run(self, abort=None) -> bool:
         logging.info(f"[{self.name}] run function undefined, I QUIT !")
         sys.exit(1)
 
@@ -181,6 +212,7 @@ class Scenario(object):
         if cls.validation_schema == None:
             definition['name'] = name
             return Scenario(definition)
+        from cerberus import Validator
         validator = Validator(cls.validation_schema)
         if not validator.validate(definition, cls.validation_schema):
             logging.error("Error in the scenario definition")
@@ -188,3 +220,19 @@ class Scenario(object):
             sys.exit(1)
         definition['name'] = name
         return scenario(definition)
+
+    def write_address_plan(self) -> None:
+        """
+        Queue address-plan.yaml: subnet, gateway, allocation count and service addresses of each network
+        """
+
+        plan = self.networker.plan()
+        for name in plan:
+            plan[name]["addresses"] = {}
+        for service in sorted(self.repository.services):
+            for name, address in self.repository.services[service].networks.items():
+                if name in plan:
+                    plan[name]["addresses"][service] = str(address)
+
+        self.repository.writer.yaml(
+            f"{self.repository.scenario_folder}/{self.name}/address-plan.yaml", plan)
@@ -0,0 +1,136 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import logging
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+
+class Task(object):
+    """Generation task of the phase `phase`, it runs once the tasks writing the state it `reads` are done"""
+
+    def __init__(self, name: str, phase: str, function: Callable, reads: List[str], writes: List[str]) -> None:
+        self.name = name
+        self.phase = phase
+        self.function = function
+        self.reads = reads
+        self.writes = writes
+        self.dependencies: List["Task"] = []
+        self.dependents: List["Task"] = []
+
+
+class Graph(object):
+    """
+    Dependency graph of the generation tasks. A task depends on the tasks added before it which
+    write the state it reads, or which read or write the state it writes, the insertion order is
+    thus a topological order and the graph cannot hold a cycle. The state `provided` is available
+    before any task runs, a task reading any other state must be added after one writing it
+    """
+
+    def __init__(self, provided: List[str] = None) -> None:
+        self.provided = set(provided if provided != None else [])
+        self.tasks: List[Task] = []
+        self.names = set()
+        self.writers: Dict[str, List[Task]] = {}
+        self.readers: Dict[str, List[Task]] = {}
+
+    def add(self, name: str, phase: str, function: Callable, reads: List[str] = None, writes: List[str] = None) -> Task:
+        """Add the task `name` running `function`, it reads the state keys `reads` and writes the keys `writes`"""
+
+        task = Task(name, phase, function, reads if reads != None else [],
+                    writes if writes != None else [])
+        if name in self.names:
+            logging.error(f"Task {name} added twice, I QUIT !")
+            sys.exit(1)
+        for key in task.reads:
+            if key not in self.provided and key not in self.writers:
+                logging.error(
+                    f"Task {name} reads {key} before any task writes it, I QUIT !")
+                sys.exit(1)
+        dependencies = {}
+        for key in task.reads:
+            for t in self.writers.get(key, []):
+                dependencies[t.name] = t
+        for key in task.writes:
+            for t in self.writers.get(key, []) + self.readers.get(key, []):
+                dependencies[t.name] = t
+        task.dependencies = list(dependencies.values())
+        for t in task.dependencies:
+            t.dependents.append(task)
+        for key in task.reads:
+            self.readers.setdefault(key, []).append(task)
+        for key in task.writes:
+            self.writers.setdefault(key, []).append(task)
+        self.tasks.append(task)
+        self.names.add(name)
+        return task
+
+    def execute(self, task: Task, phase: Callable) -> None:
+        """Run `task` through `phase`, a failure names the task"""
+
+        try:
+            phase(task.phase, task.function)
+        except SystemExit:
+            logging.error(f"Task {task.name} stopped the generation")
+            raise
+        except Exception:
+            logging.exception(f"Task {task.name} failed, I QUIT !")
+            sys.exit(1)
+
+    def run(self, jobs: int = 1, phase: Callable = None) -> None:
+        """
+        Run the tasks, each one through `phase(name, function)` when given. With `jobs` above 1,
+        the tasks whose dependencies are done run concurrently on `jobs` threads
+        """
+
+        if phase == None:
+            def phase(name: str, function: Callable):
+                return function()
+
+        if jobs <= 1:
+            for task in self.tasks:
+                self.execute(task, phase)
+            return
+
+        waiting = {task.name: len(task.dependencies) for task in self.tasks}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            running = {executor.submit(self.execute, task, phase): task
+                       for task in self.tasks if waiting[task.name] == 0}
+            while len(running) > 0:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException:
+                        # the running tasks end, no new task starts
+                        for f in running:
+                            f.cancel()
+                        raise
+                    for dependent in task.dependents:
+                        waiting[dependent.name] -= 1
+                        if waiting[dependent.name] == 0:
+                            running[executor.submit(
+                                self.execute, dependent, phase)] = dependent
@@ -0,0 +1,85 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import ipaddress
+from typing import Dict, List
+from ruamel import yaml
+from . import Scenario
+from ..model import slice_aware_ntn, non_slice_aware_ntn
+
+MODELS = {"slice-aware": slice_aware_ntn,
+          "non-slice-aware": non_slice_aware_ntn}
+
+
+class ManifestScenario(Scenario):
+    """
+    Scenario restored from the manifest written in the receipes folder by a run, it only
+    holds the slices, applications, UEs and address plan needed to evaluate the results
+    and cannot generate a testbed
+    """
+
+    def __init__(self, definition: Dict) -> None:
+        super().__init__(definition)
+        self.scenario_type = definition["type"]
+
+    @classmethod
+    def load(cls, path: str):
+        """Load the manifest `path`, the scenario definition is neither parsed nor validated"""
+
+        yam = yaml.YAML(typ="safe")
+        with codecs.open(path, "r", encoding="utf-8") as manifest_file:
+            manifest = yam.load(manifest_file)
+
+        scenario = cls(manifest)
+        model = MODELS[manifest["type"]]
+        applications = {"web": model.Web,
+                        "streaming": model.Streaming, "voip": model.VoIP}
+
+        scenario.repository.add_misc(
+            "users", [model.User() for j in range(manifest["users"])])
+        slices_misc = scenario.repository.add_misc("slices", [])
+        applications_misc = scenario.repository.add_misc("applications", [])
+        for sd in manifest["slices"]:
+            s = model.Slice(sd["sst"], sd["sd"], sd["data_network"],
+                            sd["start"], sd["end"])
+            s.set_ue_network(ipaddress.IPv4Network(sd["ue_network"]))
+            for application in sd["applications"]:
+                app = applications[application["name"]](
+                    data_rate=application["data_rate"])
+                s.applications.append(app)
+                applications_misc.append(app)
+            slices_misc.append(s)
+
+        for name, network in manifest["networks"].items():
+            scenario.networker.add_network(
+                name, ipaddress.IPv4Network(network))
+        return scenario
+
+    def get_max_duration(self, slices: List):
+        m = 0
+        for s in slices:
+            if s.end >= m:
+                m = s.end
+        return m
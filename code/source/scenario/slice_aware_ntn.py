@@ -23,23 +23,34 @@ SOFTWARE.
 """
 
 import logging
-import docker
+import sys
 import subprocess
 import time
-import schedule
 import re
 import ipaddress
 import _thread
 from typing import Dict, List
 from . import Scenario
+from ..model import Networker
 from ..model.slice_aware_ntn import User, Ntn, Slice, Theta, Web, Streaming, VoIP
 from ..model.slice_aware_ntn import MONGO, SERVER, NRF, PCF, AUSF, AMF, SMF, UPF, NSSF, UDR, UDM, GNB, UE, QOF, POPULATE, CLASSIFIER, TRUNKS, NTNQOF
 
-SLICES = [('1', "110101"), ("1", "110203"), ("1", "112233")]
-DATA_NETWORK = ["internet", "internet2", "internet3"]
+# slice differentiators of the first slices, as evaluated in the paper
+REFERENCE_SD = ["110101", "110203", "112233"]
 APPLICATIONS = [Web(), Streaming(), VoIP()]
 
 
+def slice_identifiers(index: int) -> tuple:
+    """
+    Return the SST, SD and DNN of slice `index`. The SD only holds decimal digits
+    and no leading zero as the configurations read it both as hex and as an integer
+    """
+
+    sd = REFERENCE_SD[index] if index < len(REFERENCE_SD) else f"2{index:05d}"
+    dnn = "internet" if index == 0 else f"internet{index + 1}"
+    return "1", sd, dnn
+
+
 class SliceAwareNTN(Scenario):
     """Slice Aware Non Terrestrial Networks Scenario"""
 
@@ -47,8 +58,8 @@ class SliceAwareNTN(Scenario):
     validation_schema = {
         'type': {'type': 'string', 'required': True},
         'duration': {'type': 'integer', 'required': True},
-        'user': {'type': 'integer', 'required': True, 'min': 1, 'max': 30},
-        'links': {'type': 'list', 'required': True, 'minlength': 1, 'maxlength': 2, 'schema': {
+        'user': {'type': 'integer', 'required': True, 'min': 1},
+        'links': {'type': 'list', 'required': True, 'minlength': 1, 'schema': {
             'type': 'dict', 'schema': {
                 'default': {'type': 'boolean', 'required': True, 'default': False},
                 'forward': {'type': 'integer', 'required': True, 'min': 2, 'max': 1000},
@@ -56,7 +67,7 @@ class SliceAwareNTN(Scenario):
                 'delay': {'type': 'integer', 'required': True, 'min': 20, 'max': 1000},
                 'jitter': {'type': 'integer', 'required': True, 'min': 0, 'max': 100},
                 'acm': {'type': 'boolean', 'required': True, 'default': True},
-                'slices': {'type': 'list', 'required': True, 'minlength': 1, 'maxlength': 2, 'schema': {
+                'slices': {'type': 'list', 'required': True, 'minlength': 1, 'schema': {
                     'type': 'dict', 'schema': {
                         'start': {'type': 'integer', 'required': True},
                         'end': {'type': 'integer', 'required': True},
@@ -81,6 +92,19 @@ class SliceAwareNTN(Scenario):
             }
         },
         },
+        'networks': {'type': 'dict', 'required': False, 'schema': {
+            'pools': {'type': 'list', 'required': False, 'minlength': 1, 'schema': {'type': 'string'}},
+            'ue_prefix': {'type': 'integer', 'required': False, 'min': 8, 'max': 29},
+            'data_prefix': {'type': 'integer', 'required': False, 'min': 8, 'max': 29},
+        },
+        },
+        'abort': {'type': 'dict', 'required': False, 'schema': {
+            'period': {'type': 'integer', 'required': False, 'min': 1},
+            'throughput': {'type': 'number', 'required': False, 'min': 0, 'max': 1},
+            'loss': {'type': 'number', 'required': False, 'min': 0, 'max': 100},
+            'trip_time': {'type': 'number', 'required': False, 'min': 0},
+        },
+        },
     }
 
     def prepare_scenario(self) -> None:
@@ -113,8 +137,15 @@ class SliceAwareNTN(Scenario):
                 f"NTN link {i} support {len(link['slices'])} slices")
 
             for sd in link['slices']:
-                s = Slice(SLICES[j][0], SLICES[j][1],
-                          DATA_NETWORK[j], sd['start'], sd['end'])
+                names = [application["name"]
+                         for application in sd['applications']]
+                if len(set(names)) != len(names):
+                    logging.error(
+                        f"Slice {j} runs the same application twice, I QUIT !")
+                    sys.exit(1)
+
+                s = Slice(*slice_identifiers(j), sd['start'], sd['end'])
+                s.index = j
                 s.theta(Theta(sd['theta']['lambda'],
                               sd['theta']['delta'],
                               sd['theta']['mu'],
@@ -163,26 +194,34 @@ class SliceAwareNTN(Scenario):
 
         slices = self.repository.get_misc("slices")
         links = self.repository.get_misc("links")
+        n_ue = len(self.repository.get_misc("users"))
+        networks = self.definition.get("networks", {})
+        if networks.get("pools") != None:
+            self.networker = Networker(networks["pools"])
+        fit = self.networker.fit_prefix
 
-        self.networker.new_network(name="sbi", pool=1)
+        self.networker.new_network(name="sbi")
         for i in range(len(slices)):
-            self.networker.new_network(name=f"classifier-cn-dp-{i}", pool=1)
+            self.networker.new_network(name=f"classifier-cn-dp-{i}")
+            # the UEs addresses come from the UE network, the UPF takes its host address 100
             ue_network = self.networker.new_network(
-                name=f"ue-network-slice-{i}", pool=1)
+                name=f"ue-network-slice-{i}", prefix=networks.get("ue_prefix", fit(n_ue + 101)))
+            # an application server per UE and application, and the UPF
             data_network = self.networker.new_network(
-                name=f"data-network-slice-{i}", pool=1)
+                name=f"data-network-slice-{i}", prefix=networks.get("data_prefix", fit(n_ue * len(slices[i].applications) + 1)))
             slices[i].set_ue_network(ue_network)
             slices[i].set_data_network(data_network)
 
-        self.networker.new_network(name="pfcp", pool=1)
+        self.networker.new_network(name="pfcp", prefix=fit(len(slices) + 1))
 
         for i in range(len(links)):
-            self.networker.new_network(name=f"st-classifier-{i}", pool=1)
-            self.networker.new_network(name=f"gw-classifier-{i}", pool=1)
+            self.networker.new_network(name=f"st-classifier-{i}")
+            self.networker.new_network(name=f"gw-classifier-{i}")
 
-        self.networker.new_network(name="satellite-control", pool=1)
-        self.networker.new_network(name="classifier-ran", pool=1)
-        self.networker.new_network(name="ran-link-sim", pool=1)
+        self.networker.new_network(name="satellite-control")
+        self.networker.new_network(name="classifier-ran")
+        self.networker.new_network(
+            name="ran-link-sim", prefix=fit(n_ue + 1))
 
     def generate_topology(self) -> None:
 
@@ -321,7 +360,15 @@ class SliceAwareNTN(Scenario):
                 m = s.end
         return m
 
-    def run(self) -> bool:
+    def run(self, abort=None) -> bool:
+        """
+        Run an iteration of the scenario, `abort` is polled every second and the iteration
+        is torn down as soon as it returns a reason to abort
+        """
+
+        # only needed to run a testbed, kept out of the generation path
+        import docker
+        import schedule
 
         def start_testbed(path: str) -> None:
             cmd = f"docker compose -f {path} up -d"
@@ -427,6 +474,13 @@ class SliceAwareNTN(Scenario):
             schedule.run_pending()
             time.sleep(1)
             start += 1
+            reason = abort() if abort != None else None
+            if reason != None:
+                logging.warning(
+                    f"Aborting iteration after {start} s: {reason}, retrying scenario...")
+                schedule.clear()
+                stop_testbed(compose_path)
+                return False
 
         stop_testbed(compose_path)
 
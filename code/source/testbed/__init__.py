@@ -22,19 +22,23 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from typing import Dict
+from typing import Dict, List
 from ..scenario import Scenario
-from ..scenario.non_slice_aware_ntn import NonSliceAwareNTN
-from ..scenario.slice_aware_ntn import SliceAwareNTN
 
 
 class Selector(object):
     """Scenario selector class"""
 
-    scenarios = [SliceAwareNTN, NonSliceAwareNTN]
+    @classmethod
+    def scenarios(cls) -> List:
+        # the scenarios and their schemas are only imported to select a definition, the
+        # testbeds restored from a run manifest do not need them
+        from ..scenario.non_slice_aware_ntn import NonSliceAwareNTN
+        from ..scenario.slice_aware_ntn import SliceAwareNTN
+        return [SliceAwareNTN, NonSliceAwareNTN]
 
     @classmethod
     def get_scenario(cls, definition: Dict, name: str) -> Scenario:
-        for s in cls.scenarios:
+        for s in cls.scenarios():
             if definition['type'] == s.scenario_type:
                 return s.sanitize(definition, name, s)
@@ -28,9 +28,12 @@ import logging
 import codecs
 import sys
 import _thread
+from typing import Callable, List
 from ruamel import yaml
 from ..utils.utils import start_pcap_capture, stop_pcap_capture
+from ..utils.writer import Writer
 from ..scenario import Scenario
+from ..scenario.manifest import ManifestScenario
 
 
 class Testbed(object):
@@ -41,38 +44,75 @@ class Testbed(object):
         self.receipes = None
         self.results = None
 
-    def generate(self):
-        """Generate the testbed corresponding to the embedded scenario"""
-        self.scenario.prepare_scenario()
-        self.scenario.generate_networks()
-        self.scenario.generate_topology()
-        self.scenario.configure_services()
-        self.scenario.write_configuration()
-        self.scenario.configure_compose()
-        self.scenario.configure_entrypoint()
-        self.scenario.write_entrypoint()
-        self.scenario.write_compose()
-
-    def run(self, iteration: int, pcap: bool):
-        """Run the embedded scenario on the testbed"""
+    # phases of the scenario building its topology, called in order by generate
+    PHASES = ["prepare_scenario", "generate_networks", "generate_topology"]
+
+    def generate(self, jobs: int = 1, phase: Callable = None) -> List[str]:
+        """
+        Generate the testbed corresponding to the embedded scenario. Once the topology is built, the
+        tasks of the scenario graph configuring the services run on `jobs` threads and the files are
+        written by `jobs` worker processes. The phases and tasks are run through `phase(name, function)`
+        when given, the benchmarks measure them. Return the containers affected since the previous generation
+        """
+        if phase == None:
+            def phase(name: str, function: Callable):
+                return function()
+        repository = self.scenario.repository
+        repository.writer = Writer(
+            f"{repository.scenario_folder}/{self.scenario.name}", jobs)
+        for name in self.PHASES:
+            phase(name, getattr(self.scenario, name))
+        self.scenario.graph().run(jobs, phase)
+        affected = phase("commit", repository.writer.commit)
+        logging.info(
+            f"{len(affected)} services affected: {' '.join(affected)}")
+        return affected
+
+    def run(self, iteration: int, pcap: bool, monitor=None):
+        """Run the embedded scenario on the testbed, `monitor` follows the probe files of each iteration while it runs"""
         logging.info(
             f"Scenario {self.scenario.name} runs for {iteration} iterations")
         i: int = 0
         while i < iteration:
+            self.clear_results()
             if pcap:
                 pth = f"{self.results}/capture.pcap"
                 _thread.start_new_thread(start_pcap_capture, (pth,))
             logging.info(
                 f"Running iteration {i} of scenario {self.scenario.name}")
-            result = self.scenario.run()
+            if monitor != None:
+                monitor.start(self.results)
+            try:
+                result = self.scenario.run(
+                    monitor.aborted if monitor != None else None)
+            finally:
+                if monitor != None:
+                    monitor.stop()
             if result:
+                # copy then rename so an iteration folder only appears once complete
+                iteration_path = f"{self.receipes}/iteration-{i}"
                 shutil.copytree(
-                    self.results, f"{self.receipes}/iteration-{i}", dirs_exist_ok=True)
+                    self.results, f"{iteration_path}.tmp", dirs_exist_ok=True)
+                if os.path.exists(iteration_path):
+                    shutil.rmtree(iteration_path)
+                os.replace(f"{iteration_path}.tmp", iteration_path)
                 logging.info(f"End of iteration {i}")
                 i += 1
             else:
                 stop_pcap_capture()
 
+    def clear_results(self) -> None:
+        """
+        Empty the results folder so an iteration only collects its own probes and capture, the
+        folder itself is kept as it is mounted in the containers
+        """
+
+        for entry in os.scandir(self.results):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+
     def make_receipes_folders(self, receipes_folder: str, iterations: int) -> None:
         """
         Create the receipes folders
@@ -94,25 +134,24 @@ class Testbed(object):
 
     def make_scenario_folders(self, name: str, scenario_folder: str) -> None:
         """
-        Create the scenario folders
+        Create the scenario folders, a previous testbed is kept until the
+        generated one is swapped in by the writer
         """
 
-        if os.path.exists(f"{scenario_folder}/{name}"):
-            shutil.rmtree(f"{scenario_folder}/{name}")
-        os.makedirs(f"{scenario_folder}/{name}")
+        os.makedirs(f"{scenario_folder}/{name}", exist_ok=True)
 
         results_folder = f"{scenario_folder}/{name}/results"
         containers_folder = f"{scenario_folder}/{name}/containers"
         configurations_folder = f"{scenario_folder}/{name}/configurations"
 
         logging.info(f"Creating {results_folder} folder")
-        os.makedirs(results_folder)
+        os.makedirs(results_folder, exist_ok=True)
 
         logging.info(f"Creating {containers_folder} folder")
-        os.makedirs(containers_folder)
+        os.makedirs(containers_folder, exist_ok=True)
 
         logging.info(f"Creating {configurations_folder} folder")
-        os.makedirs(configurations_folder)
+        os.makedirs(configurations_folder, exist_ok=True)
 
         self.results = results_folder
 
@@ -139,3 +178,55 @@ class Testbed(object):
 
         self.iterations = iteration_configuration['iterations']
         return self.iterations
+
+    @classmethod
+    def from_manifest(cls, receipes_folder: str, name: str):
+        """Return the testbed of scenario `name` restored from its run manifest, None if there is none"""
+
+        path = f"{receipes_folder}/{name}/manifest.yaml"
+        if not os.path.isfile(path):
+            return None
+        return cls(ManifestScenario.load(path))
+
+    def write_manifest(self) -> str:
+        """
+        Write the manifest of the generated scenario in the receipes folder: slices,
+        applications, UE count and address plan, everything needed to evaluate the
+        results without generating the testbed again
+        """
+
+        slices = self.scenario.repository.get_misc("slices")
+        manifest = {
+            "name": self.scenario.name,
+            "type": self.scenario.scenario_type,
+            "duration": self.scenario.definition["duration"],
+            "users": len(self.scenario.repository.get_misc("users")),
+            "slices": [{
+                "sst": str(sl.sst),
+                "sd": str(sl.sd),
+                "data_network": sl.data_network,
+                "start": sl.start,
+                "end": sl.end,
+                "ue_network": str(sl.ue_network),
+                "applications": [{"name": a.name.lower(), "data_rate": a.data_rate} for a in sl.applications],
+            } for sl in slices],
+            "networks": {name: str(network) for name, network in self.scenario.networker.networks_name.items()},
+        }
+
+        path = f"{self.receipes}/manifest.yaml"
+        yam = yaml.YAML()
+        yam.indent(sequence=4, offset=2)
+        with codecs.open(path, "w", encoding="utf-8") as manifest_file:
+            yam.dump(manifest, manifest_file)
+        return path
+
+    def completed_iterations(self) -> int:
+        """
+        Return the number of iterations already completed, an iteration folder is
+        only created once the iteration ends
+        """
+
+        i = 0
+        while i < self.iterations and os.path.isdir(f"{self.receipes}/iteration-{i}"):
+            i += 1
+        return i
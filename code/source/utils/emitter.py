@@ -0,0 +1,156 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import io
+import re
+from typing import Dict, List
+from ruamel import yaml
+from .utils import HexInt, representer
+
+# strings emitted as plain scalars by ruamel when they do not resolve to another type,
+# any other string is emitted the way ruamel emits it alone
+PLAIN = re.compile(r"(?!\.\.\.)[A-Za-z0-9_/.][A-Za-z0-9_/.:@+=-]*(?<!:)\Z")
+STR = "tag:yaml.org,2002:str"
+# ruamel folds the quoted scalars and the ones holding spaces beyond the column WIDTH
+# and moves the plain mapping values longer than LONG on their own line
+WIDTH = 78
+LONG = 80
+INDENT = 2
+RESOLVER = yaml.resolver.VersionedResolver()
+SCALARS: Dict[str, str] = {}
+ROUND_TRIP = None
+
+
+class Unsupported(Exception):
+    """Raised when a document holds a structure only the ruamel emitter reproduces"""
+    pass
+
+
+def round_trip() -> yaml.YAML:
+    """Return the ruamel round-trip emitter matching the plain emitter layout"""
+
+    global ROUND_TRIP
+    if ROUND_TRIP == None:
+        ROUND_TRIP = yaml.YAML()
+        ROUND_TRIP.indent(sequence=4, offset=2)
+        ROUND_TRIP.representer.add_representer(HexInt, representer)
+    return ROUND_TRIP
+
+
+def string(value: str, column: int, sequence: bool = False) -> str:
+    """Return the scalar emitted by ruamel for the string `value` starting at `column`, in a `sequence` or not"""
+
+    scalar = SCALARS.get(value)
+    if scalar == None:
+        if PLAIN.match(value):
+            resolved = RESOLVER.resolve(
+                yaml.nodes.ScalarNode, value, (True, False))
+            scalar = value if resolved == STR else f"'{value}'"
+        else:
+            stream = io.StringIO()
+            round_trip().dump({"k": value}, stream)
+            scalar = stream.getvalue()[3:-1]
+            if "\n" in scalar or scalar == "":
+                raise Unsupported(value)
+        SCALARS[value] = scalar
+    if scalar != value or " " in scalar:
+        if column + len(scalar) > WIDTH:
+            raise Unsupported(value)
+    elif len(scalar) > LONG and not sequence:
+        raise Unsupported(value)
+    return scalar
+
+
+def scalar(value: object, column: int, sequence: bool = False) -> str:
+    """Return the scalar emitted by ruamel for `value` starting at `column`, in a `sequence` or not"""
+
+    kind = type(value)
+    if kind == str:
+        return string(value, column, sequence)
+    if kind == bool:
+        return "true" if value else "false"
+    if kind == int:
+        return str(value)
+    if kind == HexInt:
+        return f"0x{value:02x}"
+    raise Unsupported(value)
+
+
+def mapping(document: dict, indent: int, lines: List[str], first: str = None) -> None:
+    """Append the lines of the block mapping `document` indented by `indent`, the first one after `first`"""
+
+    for key, value in document.items():
+        if type(key) != str:
+            raise Unsupported(key)
+        head = (first if first != None else " " * indent) + \
+            string(key, indent) + ":"
+        first = None
+        kind = type(value)
+        if kind == dict:
+            if len(value) == 0:
+                lines.append(f"{head} {{}}")
+            else:
+                lines.append(head)
+                mapping(value, indent + INDENT, lines)
+        elif kind == list:
+            if len(value) == 0:
+                lines.append(f"{head} []")
+            else:
+                lines.append(head)
+                sequence(value, indent + INDENT, lines)
+        elif value == None:
+            lines.append(head)
+        else:
+            lines.append(f"{head} {scalar(value, len(head) + 1)}")
+
+
+def sequence(document: list, indent: int, lines: List[str]) -> None:
+    """Append the lines of the block sequence `document` whose dashes are indented by `indent`"""
+
+    dash = " " * indent + "- "
+    for value in document:
+        kind = type(value)
+        if kind == dict and len(value) > 0:
+            mapping(value, indent + INDENT, lines, dash)
+        elif kind in [dict, list] or value == None:
+            raise Unsupported(value)
+        else:
+            lines.append(dash + scalar(value, len(dash), True))
+
+
+def dump(document: dict) -> str:
+    """
+    Return the YAML of the plain mapping `document` (dictionaries, lists, strings, integers,
+    booleans and None only) exactly as the ruamel round-trip emitter with a sequence indent
+    of 4 and an offset of 2 writes it, raise Unsupported for anything else
+    """
+
+    if type(document) != dict:
+        raise Unsupported(document)
+    if len(document) == 0:
+        return "{}\n"
+    lines = []
+    mapping(document, 0, lines)
+    lines.append("")
+    return "\n".join(lines)
@@ -43,6 +43,11 @@ def find_network(source: ipaddress.IPv4Address,  pool: List[ipaddress.IPv4Addres
             return ip
 
 
+def restart_services(path: str, services: List[str]):
+    cmd = f"docker compose -f {path} up -d --no-deps --force-recreate --remove-orphans {' '.join(services)}"
+    subprocess.call(cmd, shell=True)
+
+
 def start_pcap_capture(path: str):
     cmd = f"sudo tcpdump --interface any -w {path}"
     subprocess.call(cmd, shell=True)
@@ -0,0 +1,268 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import codecs
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sys
+from typing import Dict, List
+from ruamel import yaml
+from .emitter import dump, round_trip, Unsupported
+
+# name of the manifest holding the hashes of the files of the previous generation
+MANIFEST = "generation.yaml"
+
+# files of the writer being committed and hashes of the previous generation,
+# inherited by the forked workers
+PENDING: List[tuple] = []
+PREVIOUS: Dict[str, str] = {}
+
+
+def serialize(document: object) -> bytes:
+    """
+    Return the bytes of a text or of a YAML document, plain documents are emitted
+    directly while the documents parsed from the templates keep the round-trip emitter
+    """
+
+    if isinstance(document, str):
+        return document.encode("utf-8")
+    if type(document) == dict:
+        try:
+            return dump(document).encode("utf-8")
+        except Unsupported:
+            pass
+    stream = io.StringIO()
+    round_trip().dump(document, stream)
+    return stream.getvalue().encode("utf-8")
+
+
+def digest(content: bytes, mode: int = None) -> str:
+    """Return the hash of the content and permissions of a file"""
+
+    sha = hashlib.sha256(content)
+    sha.update(str(mode).encode())
+    return sha.hexdigest()
+
+
+def write_files(start: int, stop: int) -> List[str]:
+    """
+    Serialize the pending files `start` to `stop` (excluded) and write in the staging
+    folder the ones differing from the previous generation, return their hashes
+    """
+
+    hashes = []
+    for path, staged, document, mode in PENDING[start:stop]:
+        content = serialize(document)
+        h = digest(content, mode)
+        if PREVIOUS.get(path) != h or not os.path.exists(path):
+            with open(staged, "wb") as f:
+                f.write(content)
+            if mode != None:
+                os.chmod(staged, mode)
+        hashes.append(h)
+    return hashes
+
+
+class Writer(object):
+    """
+    Batched writer of the files generated in `folder`. Files are queued, then serialized
+    and hashed by a pool of `jobs` worker processes. Only the files whose bytes differ from
+    the previous generation, recorded in the MANIFEST of `folder`, are written to a staging
+    folder and moved in place once every file is serialized. Without a previous generation
+    the staging folder is swapped with `folder`, so a failed generation never leaves a
+    half-written folder
+    """
+
+    def __init__(self, folder: str, jobs: int = 1) -> None:
+        self.folder = os.path.abspath(folder)
+        self.jobs = jobs
+        parent, name = os.path.split(self.folder)
+        self.staging = os.path.join(parent, f".{name}.staging")
+        self.old = os.path.join(parent, f".{name}.old")
+        self.files: List[tuple] = []
+        self.units: Dict[str, tuple] = {}
+        self.affected: List[str] = []
+
+    def relative(self, path: str) -> str:
+        """Return the path of the file `path` relative to the folder"""
+
+        path = os.path.abspath(path)
+        if os.path.commonpath([path, self.folder]) != self.folder:
+            logging.error(
+                f"Cannot write {path} outside of {self.folder}, I QUIT !")
+            sys.exit(1)
+        return os.path.relpath(path, self.folder)
+
+    def yaml(self, path: str, document: object, services: List[str] = None) -> None:
+        """Queue the YAML document `document` to be written to `path`, used by the containers `services`"""
+        self.files.append((self.relative(path), document,
+                          None, services if services != None else []))
+
+    def text(self, path: str, content: str, mode: int = None, services: List[str] = None) -> None:
+        """Queue the text `content` to be written to `path` with the permissions `mode`, used by the containers `services`"""
+        self.files.append((self.relative(path), content,
+                          mode, services if services != None else []))
+
+    def track(self, key: str, document: object, services: List[str]) -> None:
+        """Track the part `key` of a file, the containers `services` are affected when it changes"""
+        self.units[key] = (hashlib.sha256(
+            repr(document).encode("utf-8")).hexdigest(), services)
+
+    def read_manifest(self) -> Dict:
+        """Return the manifest of the previous generation, None when there is none"""
+
+        path = os.path.join(self.folder, MANIFEST)
+        if not os.path.isfile(path):
+            return None
+        with codecs.open(path, "r", encoding="utf-8") as manifest_file:
+            return yaml.YAML(typ="safe").load(manifest_file)
+
+    def changes(self, previous: Dict, hashes: List[str]) -> tuple:
+        """Return the files written, the files removed and the containers affected since the previous generation"""
+
+        written, removed, affected = [], [], set()
+        paths = set()
+        for (path, _, _, services), h in zip(self.files, hashes):
+            paths.add(path)
+            entry = previous["files"].get(path)
+            if entry == None or entry["hash"] != h or not os.path.exists(os.path.join(self.folder, path)):
+                written.append(path)
+                affected.update(services)
+                if entry != None:
+                    affected.update(entry["services"])
+        for path, entry in previous["files"].items():
+            if path not in paths:
+                removed.append(path)
+                affected.update(entry["services"])
+        for key, (h, services) in self.units.items():
+            entry = previous["units"].get(key)
+            if entry == None or entry["hash"] != h:
+                affected.update(services)
+                if entry != None:
+                    affected.update(entry["services"])
+        for key, entry in previous["units"].items():
+            if key not in self.units:
+                affected.update(entry["services"])
+        return written, removed, sorted(affected)
+
+    def commit(self) -> List[str]:
+        """
+        Write the queued files changed since the previous generation and return
+        the sorted names of the containers affected by the changes
+        """
+
+        global PENDING, PREVIOUS
+
+        # the files are queued by concurrent tasks, their order is restored
+        self.files.sort(key=lambda f: f[0])
+        for i in range(1, len(self.files)):
+            if self.files[i][0] == self.files[i - 1][0]:
+                logging.error(
+                    f"{self.files[i][0]} is generated twice in {self.folder}, I QUIT !")
+                sys.exit(1)
+        self.units = {key: self.units[key] for key in sorted(self.units)}
+
+        previous = self.read_manifest()
+        for pth in [self.staging, self.old]:
+            if os.path.exists(pth):
+                shutil.rmtree(pth)
+        if previous == None:
+            # the staging folder keeps the layout of the folder, empty folders included
+            for root, _, _ in os.walk(self.folder):
+                os.makedirs(os.path.join(
+                    self.staging, self.relative(root)), exist_ok=True)
+            PREVIOUS = {}
+        else:
+            PREVIOUS = {os.path.join(self.folder, path): entry["hash"]
+                        for path, entry in previous["files"].items()}
+        for folder in set([os.path.dirname(f[0]) for f in self.files]):
+            os.makedirs(os.path.join(self.staging, folder), exist_ok=True)
+
+        PENDING = [(os.path.join(self.folder, path), os.path.join(self.staging, path), document, mode)
+                   for path, document, mode, _ in self.files]
+        try:
+            if self.jobs > 1 and len(PENDING) > self.jobs:
+                # only needed by parallel writes, kept out of the startup of the subcommands
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                chunk = -(-len(PENDING) // (self.jobs * 4))
+                # forked workers inherit the pending documents, only their bounds are sent
+                with ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+                    futures = [executor.submit(write_files, start, min(start + chunk, len(PENDING)))
+                               for start in range(0, len(PENDING), chunk)]
+                    hashes = [h for future in futures for h in future.result()]
+            else:
+                hashes = write_files(0, len(PENDING))
+        except BaseException:
+            shutil.rmtree(self.staging, ignore_errors=True)
+            raise
+        finally:
+            PENDING = []
+            PREVIOUS = {}
+
+        manifest = {"files": {}, "units": {}}
+        for (path, _, _, services), h in zip(self.files, hashes):
+            manifest["files"][path] = {"hash": h, "services": services}
+        for key, (h, services) in self.units.items():
+            manifest["units"][key] = {"hash": h, "services": services}
+
+        if previous == None:
+            self.write_manifest(self.staging, manifest)
+            if os.path.exists(self.folder):
+                os.rename(self.folder, self.old)
+            os.rename(self.staging, self.folder)
+            if os.path.exists(self.old):
+                shutil.rmtree(self.old)
+            self.affected = sorted(set(
+                [s for f in self.files for s in f[3]] + [s for u in self.units.values() for s in u[1]]))
+            logging.info(f"{len(self.files)} files written in {self.folder}")
+        else:
+            written, removed, self.affected = self.changes(previous, hashes)
+            for path in written:
+                target = os.path.join(self.folder, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(os.path.join(self.staging, path), target)
+            for path in removed:
+                if os.path.exists(os.path.join(self.folder, path)):
+                    os.remove(os.path.join(self.folder, path))
+            shutil.rmtree(self.staging)
+            # written last, an interrupted commit rewrites its files on the next generation
+            self.write_manifest(self.folder, manifest)
+            logging.info(
+                f"{len(written)} files written, {len(removed)} removed and {len(self.files) - len(written)} unchanged in {self.folder}")
+
+        self.files = []
+        self.units = {}
+        return self.affected
+
+    def write_manifest(self, folder: str, manifest: Dict) -> None:
+        """Write the manifest of the generation in `folder`"""
+
+        path = os.path.join(folder, MANIFEST)
+        with open(f"{path}.tmp", "wb") as manifest_file:
+            manifest_file.write(serialize(manifest))
+        os.replace(f"{path}.tmp", path)
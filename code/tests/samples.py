@@ -0,0 +1,47 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+
+# iperf2 report of a UE client, as written in the probe files
+HEADER = """------------------------------------------------------------
+Client connecting to 10.0.0.1, UDP port 5060 with pid 42 (1 flows)
+Sending 1400 byte datagrams, IPG target: 87.50 us (kalman adjust)
+UDP buffer size:  208 KByte (default)
+------------------------------------------------------------
+[  1] local 10.60.0.1 port 5060 connected with 10.0.0.1 port 5060 (reverse) (trip-times)
+[ ID] Interval            Transfer     Bandwidth        Jitter   Lost/Total  Latency avg/min/max/stdev PPS  NetPwr
+[  1] 0.0000-0.0000 sec  0 Bytes  0 bits/sec
+"""
+
+SAMPLE = "[  1] {0}.0000-{1}.0000 sec  142141 Bytes  1137128 bits/sec   0.847 ms 4/100 (4%) 467.714/1.255/649.544/0.449 ms 100 pps  12.3\n"
+
+
+def probe_file(folder, name: str, samples: int) -> str:
+    path = os.path.join(str(folder), name)
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for second in range(samples):
+            f.write(SAMPLE.format(second, second + 1))
+    return path
@@ -0,0 +1,66 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import random
+import numpy as np
+from benchmark import write_receipes
+from source.evaluator.saw_suaw_evaluator import SSEvaluator
+from source.evaluator.store import METRICS
+from source.testbed import testbed as testbeds
+
+SCENARIO = "synthetic"
+
+
+def evaluate(folder: str, incremental: bool):
+    testbed = testbeds.Testbed.from_manifest(folder, SCENARIO)
+    testbed.read_iterations(folder)
+    evaluator = SSEvaluator([testbed], [(0, 0)], cache=False,
+                            incremental=incremental)
+    slices, statistics, _ = evaluator.evaluate_scenario(testbed)
+    return [pdu for s in slices for pdu in s.pdu], statistics
+
+
+def test_incremental_aggregate_matches_full_evaluation(tmp_path):
+    folder = str(tmp_path)
+    write_receipes(folder, SCENARIO, "slice-aware", 3, 2, 2, 20, 4,
+                   random.Random(5))
+    receipes = os.path.join(folder, SCENARIO)
+
+    # the last iteration completes after a first incremental evaluation
+    os.rename(f"{receipes}/iteration-3", f"{receipes}/pending")
+    evaluate(folder, True)
+    os.rename(f"{receipes}/pending", f"{receipes}/iteration-3")
+    incremental, running = evaluate(folder, True)
+    full, statistics = evaluate(folder, False)
+
+    assert running.count == statistics.count == 4
+    assert [pdu.legend for pdu in incremental] == [pdu.legend for pdu in full]
+    for p in range(len(full)):
+        for name in METRICS:
+            assert np.allclose(incremental[p].columns[name], full[p].columns[name])
+    for name in METRICS:
+        for key in ["mean", "std", "ci95"]:
+            assert np.allclose(running.second[name][key], statistics.second[name][key])
+            assert np.allclose(running.run[name][key], statistics.run[name][key])
@@ -0,0 +1,79 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import numpy as np
+from source.evaluator.cache import ProbeCache, file_digest
+from source.evaluator.parser import Parser, parse_probes
+from .samples import probe_file
+
+
+def test_parse_probes_digest(tmp_path):
+    path = probe_file(tmp_path, "ue-0_voip_0_probes.txt", 12)
+    probes, digest = parse_probes(path, 10)
+    columns = Parser.allocate(10)
+    assert Parser.parse_file(path, 10, columns) == 10
+    assert digest == file_digest(path)
+    assert probes.shape == (4, 10)
+    assert np.array_equal(probes[0], columns["throughput"])
+
+
+def test_cache_round_trip(tmp_path):
+    folder = tmp_path / "iteration-0"
+    folder.mkdir()
+    path = probe_file(folder, "ue-0_voip_0_probes.txt", 5)
+    probes, digest = parse_probes(path, 5)
+    cache = ProbeCache(str(tmp_path / "cache" / "iteration-0.npz"), str(folder))
+    cache.put(path, os.stat(path), 5, probes, digest)
+    cache.save()
+
+    cache = ProbeCache(str(tmp_path / "cache" / "iteration-0.npz"), str(folder))
+    assert np.array_equal(cache.get(path, os.stat(path), 5), probes)
+    assert cache.get(path, os.stat(path), 6) is None
+    # a touched file with the same content stays valid
+    os.utime(path, ns=(0, 0))
+    assert np.array_equal(cache.get(path, os.stat(path), 5), probes)
+    # a rewritten file of the same size is detected by its digest
+    with open(path, "r+") as f:
+        f.seek(os.path.getsize(path) - 10)
+        f.write("9")
+    os.utime(path, ns=(1, 1))
+    assert cache.get(path, os.stat(path), 5) is None
+
+
+def test_cache_evicts_missing_files(tmp_path):
+    folder = tmp_path / "iteration-0"
+    folder.mkdir()
+    cache_path = str(tmp_path / "cache" / "iteration-0.npz")
+    cache = ProbeCache(cache_path, str(folder))
+    for name in ["ue-0_voip_0_probes.txt", "ue-1_voip_0_probes.txt"]:
+        path = probe_file(folder, name, 3)
+        cache.put(path, os.stat(path), 3, *parse_probes(path, 3))
+    cache.save()
+
+    os.rename(folder / "ue-1_voip_0_probes.txt", folder / "ue-2_voip_0_probes.txt")
+    cache = ProbeCache(cache_path, str(folder))
+    cache.save()
+    assert sorted(ProbeCache(cache_path, str(folder)).entries) == [
+        "ue-0_voip_0_probes.txt"]
@@ -0,0 +1,74 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+from source.evaluator.downsample import downsample, lttb, minmax
+
+
+def series(n: int):
+    rng = np.random.default_rng(10)
+    x = np.arange(n, dtype=np.float64)
+    return x, np.sin(x / 40) * 50 + rng.normal(0, 5, n)
+
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x, y = series(1000)
+    indexes = lttb(x, y, 50)
+    assert len(indexes) == 50
+    assert indexes[0] == 0 and indexes[-1] == 999
+    # one point in each of the 48 buckets of the 998 inner points
+    edges = (np.arange(49) * 998 / 48).astype(np.int64) + 1
+    edges[-1] = 999
+    assert (np.searchsorted(edges, indexes[1:-1], side="right") - 1 == np.arange(48)).all()
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(100, dtype=np.float64)
+    y = np.zeros(100)
+    y[37], y[71] = 10, -10
+    indexes = lttb(x, y, 10)
+    assert 37 in indexes and 71 in indexes
+
+
+def test_minmax_keeps_bucket_extrema():
+    x, y = series(1000)
+    indexes = minmax(x, y, 40)
+    assert len(indexes) == 40
+    assert indexes[0] == 0 and indexes[-1] == 999
+    assert (np.diff(indexes) > 0).all()
+    edges = np.linspace(1, 999, 20).astype(np.int64)
+    for start, end in zip(edges[:-1], edges[1:]):
+        kept = indexes[(indexes >= start) & (indexes < end)]
+        assert len(kept) == 2
+        assert sorted(y[kept]) == [y[start:end].min(), y[start:end].max()]
+
+
+def test_short_series_are_kept():
+    x, y = series(30)
+    for method in ["lttb", "minmax"]:
+        assert (downsample(method, x, y, 30) == np.arange(30)).all()
+        assert (downsample(method, x, y, 100) == np.arange(30)).all()
+    assert (downsample("lttb", x, y, 2) == np.arange(30)).all()
+    assert (downsample("lttb", x, y, 10) == lttb(x, y, 10)).all()
+    assert (downsample("minmax", x, y, 10) == minmax(x, y, 10)).all()
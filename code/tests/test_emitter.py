@@ -0,0 +1,117 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import copy
+import glob
+import io
+import logging
+import os
+import random
+from ruamel import yaml
+from source.testbed import Selector
+from source.testbed import testbed as testbeds
+from source.utils.emitter import Unsupported, dump, round_trip
+from source.utils.utils import HexInt
+from source.utils.writer import serialize
+from . import CODE
+
+
+def ruamel(document) -> str:
+    stream = io.StringIO()
+    round_trip().dump(document, stream)
+    return stream.getvalue()
+
+
+def check(paths: list) -> list:
+    """Compare both emitters on the content of the YAML files `paths`, return the ones emitted plainly"""
+
+    plain = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            document = yaml.YAML(typ="safe").load(f)
+        try:
+            emitted = dump(document)
+        except Unsupported:
+            continue
+        assert emitted == ruamel(document), path
+        assert serialize(document) == emitted.encode("utf-8")
+        plain.append(path)
+    return plain
+
+
+def test_shipped_templates():
+    paths = sorted(glob.glob(f"{CODE}/config/services/*.yaml"))
+    assert len(check(paths)) > len(paths) // 2
+
+
+def test_generated_files(tmp_path):
+    with open(f"{CODE}/template/scenario.yaml") as f:
+        scenarios = yaml.YAML(typ="safe").load(f)
+    logging.disable(logging.INFO)
+    try:
+        for name in ["custom-scenario-aware", "custom-scenario-non-aware"]:
+            scenario = Selector.get_scenario(copy.deepcopy(scenarios[name]), name)
+            testbed = testbeds.Testbed(scenario)
+            r, cont, conf = testbed.make_scenario_folders(name, str(tmp_path))
+            scenario.set_path(r, cont, f"{CODE}/config/services", conf, str(tmp_path))
+            testbed.generate()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    paths = sorted(glob.glob(f"{tmp_path}/*/*.yaml") +
+                   glob.glob(f"{tmp_path}/*/configurations/*.yaml"))
+    plain = check(paths)
+    assert f"{tmp_path}/custom-scenario-aware/docker-compose.yaml" in plain
+    assert f"{tmp_path}/custom-scenario-non-aware/docker-compose.yaml" in plain
+
+
+def test_random_documents():
+    rng = random.Random(23)
+    words = ["true", "3.9", "1e3", "0x1f", "null", "x" * 90 + " y", "x y" * 30, "abc", "/a/b:/c",
+             "a b" * 12, "...", "..a", "---", "-", "a-", "a.", "0o17", "+1", "=", "<<", "_", "a: b", "#a", ""]
+    chars = "ab09 :-#'\"./_@,[]{}!&*?|>%`=+~"
+
+    def string() -> str:
+        if rng.random() < 0.5:
+            return "".join([rng.choice(chars) for _ in range(rng.randint(0, rng.choice([12, 90])))])
+        return rng.choice(words)
+
+    def value(depth: int):
+        r = rng.random()
+        if depth < 4 and r < 0.25:
+            return {string()[:20] or "k": value(depth + 1) for _ in range(rng.randint(0, 3))}
+        if depth < 4 and r < 0.45:
+            return [value(depth + 1) for _ in range(rng.randint(0, 3))]
+        return rng.choice([string(), rng.randint(-5, 10 ** 6), HexInt(rng.randint(0, 300)), True, False, None])
+
+    plain = 0
+    for _ in range(3000):
+        document = {string()[:30] or "k": value(0) for _ in range(rng.randint(1, 4))}
+        try:
+            emitted = dump(document)
+        except Unsupported:
+            continue
+        assert emitted == ruamel(document), repr(document)
+        plain += 1
+    assert plain > 1000
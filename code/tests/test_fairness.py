@@ -0,0 +1,88 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import types
+import numpy as np
+from source.evaluator.fairness import Fairness, jain
+from source.evaluator.store import ProbeStore
+
+
+def test_jain():
+    assert np.isclose(jain(np.full(4, 2.5), 0), 1)
+    assert np.isclose(jain(np.array([0, 0, 7.0, 0]), 0), 1 / 4)
+    assert np.isclose(jain(np.array([1.0, 3.0]), 0), 16 / 20)
+    # nobody received anything
+    assert jain(np.zeros(3), 0) == 1
+    # NaN UEs are left out
+    x = np.array([[5, 5, np.nan], [0, 6, np.nan], [np.nan] * 3])
+    result = jain(x, 1)
+    assert np.allclose(result[:2], [1, 1 / 2])
+    assert np.isnan(result[2])
+    assert np.allclose(jain(x.T, 0)[:2], [1, 1 / 2])
+
+
+def fairness_store() -> tuple:
+    """Return a store of 3 UEs and 2 iterations with one slice of one application active from second 2 to 6"""
+
+    window = types.SimpleNamespace(
+        start=2, end=6, applications=[types.SimpleNamespace(code=0)])
+    store = ProbeStore(2, [window], 3, 8)
+    # iteration 0 shares the throughput equally, iteration 1 gives everything to UE 2
+    store.throughput[0, 0, :, 0, 2:6] = 4
+    store.throughput[1, 0, 2, 0, 2:6] = 12
+    store.trip_time[:, 0, :, 0, 2:6] = np.array([10, 20, 30])[:, np.newaxis]
+    pdu = types.SimpleNamespace(legend="pdu", slice=0, apps=[0])
+    return store, [types.SimpleNamespace(s=window, pdu=[pdu])]
+
+
+def test_from_store():
+    store, slices = fairness_store()
+    fairness = Fairness.from_store(store, slices)
+
+    assert fairness.windows == [(2, 6)]
+    assert np.allclose(fairness.jain[0, 2:6], (1 + 1 / 3) / 2)
+    assert np.isnan(fairness.jain[0, :2]).all() and np.isnan(fairness.jain[0, 6:]).all()
+    assert np.allclose(fairness.minimum["throughput"][0, 2:6], 2)
+    assert np.allclose(fairness.maximum["throughput"][0, 2:6], 8)
+    assert np.allclose(fairness.ue["throughput"][0, :, 3], [2, 2, 8])
+    assert np.isnan(fairness.ue["throughput"][0, :, 7]).all()
+    seconds, spread = fairness.series("trip_time", 0)
+    assert list(seconds) == [2, 3, 4, 5] and np.allclose(spread, 20)
+
+    throughput = fairness.run["pdu"]["throughput"]
+    assert throughput["worst_ue"] == 0 and throughput["worst"] == 2
+    assert throughput["best"] == 8 and throughput["spread"] == 6
+    assert np.isclose(throughput["jain"], 144 / (3 * 72))
+    trip_time = fairness.run["pdu"]["trip_time"]
+    assert trip_time["worst_ue"] == 2 and trip_time["worst"] == 30
+    assert "jain" not in trip_time
+
+
+def test_write(tmp_path):
+    store, slices = fairness_store()
+    Fairness.from_store(store, slices).write(str(tmp_path / "fairness"))
+    assert sorted(os.listdir(tmp_path)) == ["fairness.npz", "fairness.yaml"]
+    arrays = np.load(tmp_path / "fairness.npz")
+    assert arrays["throughput_ue"].shape == (1, 3, 8)
@@ -0,0 +1,165 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import random
+import threading
+import time
+import pytest
+from source.scenario.graph import Graph
+
+
+class Recorder(object):
+    """Record the start and end order of the tasks run by a graph"""
+
+    def __init__(self, seed: int) -> None:
+        self.lock = threading.Lock()
+        self.events = []
+        self.rng = random.Random(seed)
+
+    def task(self, name: str):
+        delay = self.rng.random() / 500
+
+        def function():
+            with self.lock:
+                self.events.append(("start", name))
+            time.sleep(delay)
+            with self.lock:
+                self.events.append(("end", name))
+        return function
+
+
+def service_graph(recorder: Recorder, services: int) -> Graph:
+    """Return a graph shaped like the generation one: per service configure and write tasks, then a global writer"""
+
+    graph = Graph(["topology"])
+    for s in range(services):
+        graph.add(f"configure:{s}", "configure", recorder.task(f"configure:{s}"),
+                  ["topology"], [f"{s}/configuration"])
+        graph.add(f"write:{s}", "write", recorder.task(f"write:{s}"), [f"{s}/configuration"])
+        graph.add(f"compose:{s}", "compose", recorder.task(f"compose:{s}"),
+                  ["topology"], [f"{s}/compose"])
+    graph.add("write_compose", "write_compose", recorder.task("write_compose"),
+              ["topology"] + [f"{s}/compose" for s in range(services)])
+    return graph
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_dependencies_end_before_their_dependents_start(jobs):
+    recorder = Recorder(jobs)
+    graph = service_graph(recorder, 12)
+    graph.run(jobs)
+
+    assert sorted([name for event, name in recorder.events if event == "end"]) == \
+        sorted([task.name for task in graph.tasks])
+    for task in graph.tasks:
+        start = recorder.events.index(("start", task.name))
+        for dependency in task.dependencies:
+            assert recorder.events.index(("end", dependency.name)) < start
+    if jobs == 1:
+        assert [name for event, name in recorder.events if event == "start"] == \
+            [task.name for task in graph.tasks]
+
+
+def test_dependencies():
+    graph = Graph(["topology"])
+    noop = lambda: None
+    a = graph.add("a", "p", noop, ["topology"], ["x"])
+    b = graph.add("b", "p", noop, ["x"])
+    c = graph.add("c", "p", noop, ["topology"], ["y"])
+    d = graph.add("d", "p", noop, [], ["x"])
+    e = graph.add("e", "p", noop, ["x", "y"], ["y"])
+    assert a.dependencies == [] and b.dependencies == [a] and c.dependencies == []
+    # writing a state waits for its previous writers and readers
+    assert sorted([t.name for t in d.dependencies]) == ["a", "b"]
+    assert sorted([t.name for t in e.dependencies]) == ["a", "c", "d"]
+    assert [t.name for t in a.dependents] == ["b", "d", "e"]
+
+
+def test_mutual_reads_follow_the_insertion_order():
+    order = []
+    graph = Graph(["x"])
+    graph.add("a", "p", lambda: order.append("a"), ["x"], ["y"])
+    graph.add("b", "p", lambda: order.append("b"), ["y"], ["x"])
+    graph.run(4)
+    assert order == ["a", "b"]
+
+
+def test_missing_and_duplicate_tasks():
+    graph = Graph(["topology"])
+    graph.add("a", "p", lambda: None, ["topology"], ["x"])
+    with pytest.raises(SystemExit):
+        graph.add("b", "p", lambda: None, ["y"])
+    with pytest.raises(SystemExit):
+        graph.add("a", "p", lambda: None, ["x"])
+    with pytest.raises(SystemExit):
+        Graph().add("c", "p", lambda: None, ["topology"])
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = Graph()
+    graph.add("a", "p", barrier.wait, [], ["x"])
+    graph.add("b", "p", barrier.wait, [], ["y"])
+    graph.run(2)
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_failures_stop_the_graph(jobs):
+    ran = []
+
+    def fail():
+        raise ValueError("broken template")
+
+    graph = Graph()
+    graph.add("fail", "p", fail, [], ["x"])
+    graph.add("after", "p", lambda: ran.append("after"), ["x"])
+    with pytest.raises(SystemExit) as error:
+        graph.run(jobs)
+    assert error.value.code == 1
+    assert ran == []
+
+    def stop():
+        raise SystemExit(3)
+
+    graph = Graph()
+    graph.add("stop", "p", stop, [], ["x"])
+    graph.add("after", "p", lambda: ran.append("after"), ["x"])
+    with pytest.raises(SystemExit) as error:
+        graph.run(jobs)
+    assert error.value.code == 3
+    assert ran == []
+
+
+def test_phases():
+    phases = []
+
+    def phase(name, function):
+        phases.append(name)
+        return function()
+
+    graph = Graph()
+    graph.add("a", "configure", lambda: None, [], ["x"])
+    graph.add("b", "write", lambda: None, ["x"])
+    graph.run(1, phase)
+    assert phases == ["configure", "write"]
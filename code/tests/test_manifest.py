@@ -0,0 +1,112 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import copy
+import logging
+import os
+from ruamel import yaml
+from source.evaluator.saw_suaw_evaluator import SSEvaluator
+from source.evaluator.store import ProbeStore
+from source.scenario.manifest import ManifestScenario
+from source.testbed import Selector
+from source.testbed import testbed as testbeds
+from . import CODE
+
+SCENARIO = "custom-scenario-aware"
+
+
+def generated_testbed(folder: str):
+    with open(f"{CODE}/template/scenario.yaml") as f:
+        definition = yaml.YAML(typ="safe").load(f)[SCENARIO]
+    logging.disable(logging.INFO)
+    try:
+        scenario = Selector.get_scenario(copy.deepcopy(definition), SCENARIO)
+        testbed = testbeds.Testbed(scenario)
+        r, cont, conf = testbed.make_scenario_folders(SCENARIO, f"{folder}/testbeds")
+        scenario.set_path(r, cont, f"{CODE}/config/services", conf, f"{folder}/testbeds")
+        testbed.generate()
+    finally:
+        logging.disable(logging.NOTSET)
+    return testbed
+
+
+def legends(testbed) -> list:
+    scenario = testbed.scenario
+    slices = scenario.repository.get_misc("slices")
+    store = ProbeStore(0, slices, len(scenario.repository.get_misc(
+        "users")), scenario.get_max_duration(slices))
+    evaluator = SSEvaluator([testbed], [(0, 0)])
+    return [[pdu.legend for s in evaluator.build_slices(store, aware) for pdu in s.pdu]
+            for aware in [True, False]]
+
+
+def test_manifest_round_trip(tmp_path):
+    folder = str(tmp_path)
+    testbed = generated_testbed(folder)
+    testbed.make_receipes_folders(f"{folder}/receipes", 4)
+    assert testbed.write_manifest() == f"{folder}/receipes/{SCENARIO}/manifest.yaml"
+
+    restored = testbeds.Testbed.from_manifest(f"{folder}/receipes", SCENARIO)
+    assert isinstance(restored.scenario, ManifestScenario)
+    assert testbeds.Testbed.from_manifest(f"{folder}/receipes", "unknown") == None
+
+    scenario, manifest = testbed.scenario, restored.scenario
+    assert manifest.name == SCENARIO
+    assert manifest.scenario_type == scenario.scenario_type
+    assert len(manifest.repository.get_misc("users")) == len(
+        scenario.repository.get_misc("users"))
+    slices = scenario.repository.get_misc("slices")
+    restored_slices = manifest.repository.get_misc("slices")
+    assert len(restored_slices) == len(slices)
+    for s, r in zip(slices, restored_slices):
+        assert (str(r.sst), str(r.sd), r.data_network, r.start, r.end, r.ue_network) == \
+            (str(s.sst), str(s.sd), s.data_network, s.start, s.end, s.ue_network)
+        assert [(a.name, a.code, a.qi, a.pdb, a.get_data_rate()) for a in r.applications] == \
+            [(a.name, a.code, a.qi, a.pdb, a.get_data_rate()) for a in s.applications]
+    assert manifest.get_max_duration(restored_slices) == scenario.get_max_duration(slices)
+    assert manifest.networker.networks_name == scenario.networker.networks_name
+    assert legends(restored) == legends(testbed)
+
+
+def test_completed_iterations(tmp_path):
+    folder = str(tmp_path)
+    testbed = generated_testbed(folder)
+    receipes = testbed.make_receipes_folders(f"{folder}/receipes", 4)
+    testbed.write_manifest()
+
+    restored = testbeds.Testbed.from_manifest(f"{folder}/receipes", SCENARIO)
+    assert restored.read_iterations(f"{folder}/receipes") == 4
+    assert restored.completed_iterations() == 0
+
+    os.makedirs(f"{receipes}/iteration-0")
+    os.makedirs(f"{receipes}/iteration-1")
+    # iteration 2 is still being copied, iteration 3 is left from a previous run
+    os.makedirs(f"{receipes}/iteration-2.tmp")
+    os.makedirs(f"{receipes}/iteration-3")
+    assert restored.completed_iterations() == 2
+
+    os.replace(f"{receipes}/iteration-2.tmp", f"{receipes}/iteration-2")
+    assert restored.completed_iterations() == 4
+    os.makedirs(f"{receipes}/iteration-4")
+    assert restored.completed_iterations() == 4
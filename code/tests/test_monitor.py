@@ -0,0 +1,108 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import types
+from source.evaluator import monitor
+from source.evaluator.monitor import AbortRules, ProbeMonitor
+from source.evaluator.parser import Parser
+from .samples import HEADER, SAMPLE
+
+
+class Clock(object):
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+def application():
+    return types.SimpleNamespace(name="VoIP", qi=7, pdb=100, get_throughput=lambda: 1.0)
+
+
+def monitored(tmp_path, monkeypatch, n_ue: int):
+    clock = Clock()
+    monkeypatch.setattr(monitor, "time", clock)
+    slices = [types.SimpleNamespace(
+        start=0, end=60, applications=[application()])]
+    rules = AbortRules(period=5, throughput=0.1, loss=99)
+    probes = ProbeMonitor(slices, n_ue, None, window=5, rules=rules)
+    # the probes are polled by hand instead of by the monitoring thread
+    monkeypatch.setattr(probes, "loop", lambda: None)
+    probes.start(str(tmp_path))
+    paths = [Parser.probe_path(slices[0].applications[0], j, 0, str(tmp_path))
+             for j in range(n_ue)]
+    return clock, probes, rules, paths
+
+
+def advance(clock, probes, rules, paths, seconds: int, writing: list) -> str:
+    reason = None
+    for second in range(seconds):
+        clock.now += 1
+        for j in writing:
+            with open(paths[j], "a") as f:
+                f.write(SAMPLE.format(second, second + 1))
+        probes.poll()
+        reason = rules.check(probes.groups(), probes.applications)
+        if reason != None:
+            return reason
+    return reason
+
+
+def test_silent_probe_aborts(tmp_path, monkeypatch):
+    clock, probes, rules, paths = monitored(tmp_path, monkeypatch, 1)
+    # the application starts but never gets past the header
+    with open(paths[0], "w") as f:
+        f.write(HEADER)
+    assert advance(clock, probes, rules, paths, 4, []) == None
+    reason = advance(clock, probes, rules, paths, 3, [])
+    assert reason != None and "VoIP" in reason
+    probes.stop()
+
+
+def test_one_silent_probe_among_healthy_ones(tmp_path, monkeypatch):
+    clock, probes, rules, paths = monitored(tmp_path, monkeypatch, 2)
+    for path in paths:
+        with open(path, "w") as f:
+            f.write(HEADER)
+    assert advance(clock, probes, rules, paths, 20, [0]) == None
+    assert list(probes.windows[(0, "VoIP", 7, 1)])[-1] == monitor.SILENT
+    # the first UE goes silent as well
+    assert advance(clock, probes, rules, paths, 6, []) != None
+    probes.stop()
+
+
+def test_probe_not_started_is_not_silent(tmp_path, monkeypatch):
+    clock, probes, rules, paths = monitored(tmp_path, monkeypatch, 1)
+    assert advance(clock, probes, rules, paths, 20, []) == None
+    assert len(probes.windows[(0, "VoIP", 7, 0)]) == 0
+    probes.stop()
+
+
+def test_silence_after_the_application_end(tmp_path, monkeypatch):
+    clock, probes, rules, paths = monitored(tmp_path, monkeypatch, 1)
+    with open(paths[0], "w") as f:
+        f.write(HEADER)
+    assert advance(clock, probes, rules, paths, 60, [0]) == None
+    assert advance(clock, probes, rules, paths, 20, []) == None
@@ -0,0 +1,133 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import ipaddress
+import logging
+import random
+import pytest
+from benchmark import synthetic_definition
+from source.model import Networker
+from source.testbed import Selector
+from source.testbed import testbed as testbeds
+from . import CODE
+
+
+def assert_disjoint(networks: list) -> None:
+    ordered = sorted(networks, key=lambda n: int(n.network_address))
+    for first, second in zip(ordered, ordered[1:]):
+        assert first.broadcast_address < second.network_address, f"{first} overlaps {second}"
+
+
+def test_new_networks_never_overlap():
+    rng = random.Random(7)
+    networker = Networker(["10.64.0.0/12", "192.168.0.0/16"])
+    networks = []
+    for n in range(300):
+        pool = rng.randrange(2)
+        prefix = rng.choice([22, 24, 26, 28, 30])
+        network = networker.new_network(f"n{n}", pool, prefix)
+        assert network.prefixlen == prefix
+        assert network.subnet_of(networker.pools[pool])
+        networks.append(network)
+    assert_disjoint(networks)
+
+
+def test_reservations_are_skipped_by_the_cursor():
+    rng = random.Random(11)
+    networker = Networker()
+    network = networker.new_network("data", prefix=26)
+    reserved = set(rng.sample(range(1, 61), 15))
+    for index in sorted(reserved, reverse=True):
+        networker.reserve("data", index, f"r{index}")
+    allocated = [networker.get_address("data") for _ in range(61 - len(reserved))]
+
+    addresses = allocated + [networker.host(network, i) for i in reserved]
+    assert len(set(addresses)) == len(addresses) == 61
+    assert all([a in network for a in addresses])
+    assert networker.host(network, 0) not in addresses
+    assert network.broadcast_address not in addresses
+    assert networker.plan()["data"]["allocated"] == 61
+    with pytest.raises(SystemExit):
+        networker.get_address("data")
+
+
+def test_reserving_an_allocated_address_fails():
+    networker = Networker()
+    networker.new_network("data")
+    networker.get_address("data")
+    networker.get_address("data")
+    with pytest.raises(SystemExit):
+        networker.reserve("data", 2)
+    with pytest.raises(SystemExit):
+        networker.reserve("data", 0)
+    networker.reserve("data", 5)
+    with pytest.raises(SystemExit):
+        networker.reserve("data", 5)
+
+
+def test_overlapping_network_fails():
+    networker = Networker()
+    networker.add_network("a", ipaddress.IPv4Network("172.16.0.0/24"))
+    with pytest.raises(SystemExit):
+        networker.add_network("b", ipaddress.IPv4Network("172.16.0.128/25"))
+
+
+def test_fit_prefix_holds_the_hosts():
+    networker = Networker()
+    for hosts in range(1, 5000, 37):
+        prefix = networker.fit_prefix(hosts)
+        assert prefix <= 24
+        assert 2 ** (32 - prefix) >= hosts + 3
+        assert prefix == 24 or 2 ** (32 - prefix - 1) < hosts + 3
+
+
+@pytest.mark.parametrize("networks", [None, {"pools": ["10.128.0.0/9"], "ue_prefix": 23, "data_prefix": 22}])
+def test_scenario_address_plan(tmp_path, networks):
+    logging.disable(logging.INFO)
+    try:
+        definition = synthetic_definition(
+            f"{CODE}/template/scenario.yaml", "custom-scenario-aware", 300, 2, 3)
+        if networks != None:
+            definition["networks"] = networks
+        scenario = Selector.get_scenario(definition, "plan")
+        scenario.set_path(str(tmp_path / "results"), str(tmp_path / "containers"),
+                          f"{CODE}/config/services", str(tmp_path / "configurations"), str(tmp_path))
+        for phase in testbeds.Testbed.PHASES:
+            getattr(scenario, phase)()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    known = scenario.networker.networks_name
+    assert_disjoint(list(known.values()))
+    addresses = {}
+    for service in scenario.repository.services.values():
+        for name, address in service.networks.items():
+            if name not in known:
+                continue
+            assert address in known[name], f"{service.name} {address} outside {name}"
+            assert address != scenario.networker.host(known[name], 0)
+            addresses.setdefault(name, []).append(address)
+    assert len(addresses) == len(known)
+    for name, allocated in addresses.items():
+        assert len(set(allocated)) == len(allocated), f"duplicate address in {name}"
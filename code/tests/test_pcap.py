@@ -0,0 +1,122 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import struct
+import numpy as np
+from scapy.layers.inet import IP, UDP
+from scapy.layers.l2 import Ether
+from scapy.packet import Raw
+from scapy.utils import PcapWriter
+from source.evaluator.pcap import analyze_capture, chunk_offsets, gtpu_payload
+
+UE_NETWORK = "10.60.0.0/16"
+QFI = 9
+N3_DSCP = 46
+UE_DSCP = 10
+
+
+def gtpu(inner: bytes, qfi: int) -> bytes:
+    """Return a G-PDU carrying `inner` with a PDU session container holding `qfi`"""
+
+    extension = bytes([1, 0x10, qfi, 0])
+    header = struct.pack("!BBHIHBB", 0x34, 0xff, 4 + len(extension) +
+                         len(inner), 1, 0, 0, 0x85)
+    return header + extension + inner
+
+
+def write_capture(path: str, seconds: int, rate: int) -> None:
+    """
+    Write a capture of an uplink UDP flow seen in the N3 tunnel and 2 ms later decapsulated on N6,
+    every fifth packet being lost between both points
+    """
+
+    writer = PcapWriter(path, linktype=1, sync=True)
+    for i in range(seconds * rate):
+        inner = IP(src="10.60.0.1", dst="10.45.0.1", id=i, tos=UE_DSCP << 2, ttl=64) / \
+            UDP(sport=5001, dport=5201) / Raw(b"x" * 100)
+        t = 1000 + i / rate
+        n3 = Ether() / IP(src="192.168.1.2", dst="192.168.1.1", tos=N3_DSCP << 2, ttl=64) / \
+            UDP(sport=2152, dport=2152) / Raw(gtpu(bytes(inner), QFI))
+        n3.time = t
+        writer.write(n3)
+        if i % 5 != 4:
+            n6 = Ether() / IP(bytes(inner))
+            n6[IP].ttl = 63
+            n6.time = t + 0.002
+            writer.write(n6)
+    writer.close()
+
+
+def test_gtpu_payload():
+    inner = bytes(IP(src="10.60.0.1", dst="10.45.0.1") / UDP())
+    assert gtpu_payload(gtpu(inner, QFI)) == (QFI, inner)
+    # no extension header
+    assert gtpu_payload(struct.pack("!BBHI", 0x30, 0xff, len(inner), 1) + inner) == (-1, inner)
+    # truncated header and extension, and other messages
+    assert gtpu_payload(gtpu(inner, QFI)[:7]) == (-1, None)
+    assert gtpu_payload(gtpu(inner, QFI)[:14]) == (-1, None)
+    assert gtpu_payload(b"\x32\x01\x00\x04\x00\x00\x00\x00\x00\x01\x00\x00") == (-1, None)
+
+
+def test_analyze_capture(tmp_path):
+    path = str(tmp_path / "capture.pcap")
+    write_capture(path, 6, 40)
+    summary, arrays = analyze_capture(path, [UE_NETWORK], window=1.0).report()
+
+    assert summary["duration"] == 6
+    assert len(summary["flows"]) == 1
+    flow = summary["flows"][0]
+    assert flow["slice"] == 0
+    assert flow["flow"] == "10.60.0.1:5001 > 10.45.0.1:5201 UDP"
+    assert flow["qfi"] == [QFI]
+    n3, n6 = flow["points"]
+    assert n3["point"] == "192.168.1.2>192.168.1.1 ttl 64"
+    assert n6["point"] == "- ttl 63"
+    assert (n3["dscp"], n6["dscp"]) == ([N3_DSCP], [UE_DSCP])
+    assert (n3["packets"], n6["packets"]) == (240, 192)
+    # inner packets of 128 bytes
+    assert np.allclose(arrays["flow0_throughput_0"], 40 * 128 * 8 / 1e6)
+    assert np.allclose(arrays["flow0_throughput_1"], 32 * 128 * 8 / 1e6)
+
+    hop = flow["hops"][0]
+    assert (hop["from"], hop["to"]) == (n3["point"], n6["point"])
+    assert abs(hop["delay"] - 2) < 1e-3
+    assert abs(hop["loss"] - 20) < 1e-9
+    assert np.allclose(arrays["flow0_delay_0"], 2, atol=1e-3)
+    assert np.allclose(arrays["flow0_loss_0"], 20)
+
+
+def test_chunked_analysis(tmp_path):
+    path = str(tmp_path / "capture.pcap")
+    write_capture(path, 6, 40)
+    # two workers analyze eight chunks, packets seen on both sides of a chunk edge are joined
+    assert len(chunk_offsets(path, 8)) == 8
+    summary, arrays = analyze_capture(path, [UE_NETWORK], window=1.0).report()
+    chunked_summary, chunked_arrays = analyze_capture(
+        path, [UE_NETWORK], window=1.0, jobs=2).report()
+
+    assert chunked_summary == summary
+    assert sorted(chunked_arrays) == sorted(arrays)
+    for key in arrays:
+        np.testing.assert_array_equal(chunked_arrays[key], arrays[key])
@@ -0,0 +1,87 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import types
+import numpy as np
+from source.evaluator.statistics import Statistics, t_critical
+from source.evaluator.store import METRICS
+
+
+def slices(values: np.ndarray, windows: list) -> list:
+    """Return slices with one PDU per (iteration, second) series of `values`, shaped (PDU, iteration, second)"""
+
+    return [types.SimpleNamespace(s=types.SimpleNamespace(start=start, end=end),
+                                  pdu=[types.SimpleNamespace(legend=f"pdu {p}",
+                                                             columns={name: values[p] * (m + 1) for m, name in enumerate(METRICS)})])
+            for p, (start, end) in enumerate(windows)]
+
+
+def test_from_slices():
+    rng = np.random.default_rng(7)
+    values = rng.exponential(10, (2, 4, 12))
+    windows = [(0, 12), (3, 9)]
+    statistics = Statistics.from_slices(slices(values, windows))
+
+    assert statistics.legends == ["pdu 0", "pdu 1"] and statistics.count == 4
+    for m, name in enumerate(METRICS):
+        series = values * (m + 1)
+        second = statistics.second[name]
+        std = series.std(axis=1, ddof=1)
+        assert np.allclose(second["mean"], series.mean(axis=1))
+        assert np.allclose(second["std"], std)
+        assert np.allclose(second["ci95"], t_critical(3) * std / 2)
+        assert np.allclose(second["p95"], np.percentile(series, 95, axis=1))
+
+        run = statistics.run[name]
+        for p, (start, end) in enumerate(windows):
+            active = series[p, :, start:end]
+            runs = active.mean(axis=1)
+            assert np.isclose(run["mean"][p], runs.mean())
+            assert np.isclose(run["std"][p], runs.std(ddof=1))
+            assert np.isclose(run["ci95"][p], t_critical(3) * runs.std(ddof=1) / 2)
+            # the whole-run percentiles pool the samples of every iteration over the window
+            for q in [50, 95, 99]:
+                assert np.isclose(run[f"p{q}"][p], np.percentile(active, q))
+            assert not np.isclose(run["p95"][p], np.percentile(runs, 95))
+
+
+def test_single_iteration():
+    values = np.arange(24, dtype=np.float64).reshape(2, 1, 12)
+    statistics = Statistics.from_slices(slices(values, [(0, 12), (2, 6)]))
+    run = statistics.run["throughput"]
+    assert np.allclose(run["mean"], [5.5, 15.5])
+    assert np.isnan(run["std"]).all() and np.isnan(run["ci95"]).all()
+    assert np.allclose(run["p50"], [5.5, 15.5])
+    assert statistics.summary()["pdu"]["pdu 1"]["throughput"]["std"] == None
+
+
+def test_write(tmp_path):
+    values = np.ones((1, 3, 5))
+    statistics = Statistics.from_slices(slices(values, [(0, 5)]))
+    statistics.write(str(tmp_path / "statistics"))
+    assert sorted(os.listdir(tmp_path)) == ["statistics.npz", "statistics.yaml"]
+    arrays = np.load(tmp_path / "statistics.npz")
+    assert list(arrays["legends"]) == ["pdu 0"]
+    assert np.allclose(arrays["loss_mean"], 3)
@@ -0,0 +1,116 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import random
+import re
+import types
+import numpy as np
+from benchmark import IPERF_HEADER, write_probe_file
+from source.evaluator.parser import Parser
+from source.evaluator.saw_suaw_evaluator import Slice, APPLICATION_STREAMING, APPLICATION_VOIP, APPLICATION_WEB
+from source.evaluator.store import METRICS, ProbeStore
+
+VOIP = types.SimpleNamespace(name="VoIP", code=APPLICATION_VOIP)
+STREAMING = types.SimpleNamespace(name="Streaming", code=APPLICATION_STREAMING)
+WEB = types.SimpleNamespace(name="Web", code=APPLICATION_WEB)
+
+SLICES = [types.SimpleNamespace(start=0, end=6, applications=[VOIP, WEB]),
+          types.SimpleNamespace(start=3, end=8, applications=[STREAMING, VOIP, WEB])]
+N_UE = 3
+DURATION = 8
+
+
+def legacy_parse(path: str, duration: int) -> list:
+    """Samples of a probe file as the evaluator read them before the probe store"""
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()[8:]
+    samples = []
+    for line in lines:
+        if "received" not in line and len(samples) < duration:
+            l = line.strip().split()
+            samples.append((float(l[6]) / 1000 / 1000, float(l[12].split("/")[0]),
+                            float(re.findall(r"([0-9]+)", l[11])[0]), float(l[8])))
+    return samples
+
+
+def legacy_order(samples: list, start: int, end: int, duration: int) -> list:
+    if len(samples) == 0:
+        return [(0, 100, 100, 0)] * duration
+    ordered = [0] * duration
+    for i in range(start, end):
+        ordered[i] = samples[i - start]
+    return ordered
+
+
+def legacy_aggregate(pdus: list, duration: int) -> dict:
+    """Per second sum of the throughput and mean of the other metrics of the PDUs of each application"""
+
+    aggregates = {}
+    for code, probes in pdus:
+        total, count = aggregates.get(code, ([[0, 0, 0, 0] for _ in range(duration)], 0))
+        for second in range(duration):
+            if probes[second] != 0:
+                for m in range(len(METRICS)):
+                    total[second][m] += probes[second][m]
+        aggregates[code] = (total, count + 1)
+    columns = {}
+    for code, (total, count) in aggregates.items():
+        values = np.array(total, dtype=np.float64)
+        values[:, 1:] /= count
+        columns[code] = {METRICS[m]: values[:, m] for m in range(len(METRICS))}
+    return columns
+
+
+def test_store_aggregate_matches_legacy(tmp_path):
+    rng = random.Random(3)
+    store = ProbeStore(1, SLICES, N_UE, DURATION)
+    legacy = []
+    for k in range(len(SLICES)):
+        pdus = []
+        for j in range(N_UE):
+            for a in range(len(SLICES[k].applications)):
+                application = SLICES[k].applications[a]
+                path = Parser.probe_path(application, j, k, str(tmp_path))
+                duration = SLICES[k].end - SLICES[k].start
+                if (k, j, a) == (1, 2, 2):
+                    # a PDU that never sent any sample
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write("\n".join(IPERF_HEADER) + "\n")
+                else:
+                    write_probe_file(path, duration, 1e6, rng)
+                n = Parser.parse_file(path, duration, store.view(0, k, j, a))
+                store.fill(0, k, j, a, n)
+                pdus.append((application.code, legacy_order(legacy_parse(
+                    path, duration), SLICES[k].start, SLICES[k].end, DURATION)))
+        legacy.append(legacy_aggregate(pdus, DURATION))
+
+    for k in range(len(SLICES)):
+        s = Slice(k, SLICES[k], True)
+        s.aggregate(store)
+        assert len(s.pdu) == len(legacy[k])
+        for pdu in s.pdu:
+            code = SLICES[k].applications[pdu.apps[0]].code
+            for name in METRICS:
+                assert np.allclose(pdu.columns[name][0], legacy[k][code][name])
@@ -0,0 +1,72 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import glob
+import io
+import os
+from ruamel import yaml
+from source.model import Templates
+from . import CODE
+
+
+def round_trip(document) -> str:
+    stream = io.StringIO()
+    yaml.round_trip_dump(document, stream)
+    return stream.getvalue()
+
+
+def test_templates_match_a_fresh_parse():
+    paths = sorted(glob.glob(f"{CODE}/config/services/*.yaml"))
+    assert len(paths) > 0
+    for path in paths:
+        with open(path, "r", encoding="utf8") as f:
+            expected = round_trip(yaml.load(f.read(), Loader=yaml.RoundTripLoader))
+        assert round_trip(Templates.load(path)) == expected
+        # the cached copy is handed out again unchanged
+        assert round_trip(Templates.load(path)) == expected
+
+
+def test_templates_are_copied(tmp_path):
+    path = str(tmp_path / "service.yaml")
+    with open(path, "w") as f:
+        f.write("# comment\nservice:\n    port: 80\n    hosts:\n      - a\n")
+    first = Templates.load(path)
+    first["service"]["port"] = 8080
+    first["service"]["hosts"].append("b")
+    second = Templates.load(path)
+    assert second["service"]["port"] == 80
+    assert list(second["service"]["hosts"]) == ["a"]
+    assert round_trip(second).startswith("# comment")
+
+
+def test_templates_are_parsed_again_when_changed(tmp_path):
+    path = str(tmp_path / "service.yaml")
+    with open(path, "w") as f:
+        f.write("port: 80\n")
+    assert Templates.load(path)["port"] == 80
+    with open(path, "w") as f:
+        f.write("port: 81\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert Templates.load(path)["port"] == 81
@@ -0,0 +1,159 @@
+"""
+MIT License
+
+Copyright (c) 2021 Youssouf Drif
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import copy
+import logging
+import os
+import pytest
+from ruamel import yaml
+from source.testbed import Selector
+from source.testbed import testbed as testbeds
+from source.utils.writer import MANIFEST, Writer
+from . import CODE
+
+
+def snapshot(folder: str) -> dict:
+    """Return the inode, modification time, permissions and content of every file of `folder`"""
+
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, folder)] = (
+                    stat.st_ino, stat.st_mtime_ns, stat.st_mode, f.read())
+    return files
+
+
+def queue(writer: Writer, folder: str, port: int = 80, script: bool = True) -> None:
+    writer.yaml(f"{folder}/configurations/a.yaml",
+                {"port": port, "hosts": ["a", "b"]}, ["a"])
+    writer.yaml(f"{folder}/configurations/b.yaml", {"port": 81}, ["b"])
+    if script:
+        writer.text(f"{folder}/containers/c.sh", "#!/bin/bash\necho c", 0o777, ["c"])
+    writer.track("services/a", {"image": "a"}, ["a"])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_first_commit_writes_every_file(tmp_path, jobs):
+    folder = str(tmp_path / "testbed")
+    writer = Writer(folder, jobs)
+    queue(writer, folder)
+    assert writer.commit() == ["a", "b", "c"]
+
+    with open(f"{folder}/configurations/a.yaml") as f:
+        assert yaml.YAML(typ="safe").load(f) == {"port": 80, "hosts": ["a", "b"]}
+    assert os.stat(f"{folder}/containers/c.sh").st_mode & 0o777 == 0o777
+    assert not os.path.exists(writer.staging)
+    with open(f"{folder}/{MANIFEST}") as f:
+        manifest = yaml.YAML(typ="safe").load(f)
+    assert sorted(manifest["files"]) == [
+        "configurations/a.yaml", "configurations/b.yaml", "containers/c.sh"]
+
+
+def test_unchanged_commit_writes_nothing(tmp_path):
+    folder = str(tmp_path / "testbed")
+    writer = Writer(folder)
+    queue(writer, folder)
+    writer.commit()
+    before = snapshot(folder)
+
+    queue(writer, folder)
+    assert writer.commit() == []
+    after = snapshot(folder)
+    del before[MANIFEST], after[MANIFEST]
+    assert after == before
+
+
+def test_changed_and_removed_files(tmp_path):
+    folder = str(tmp_path / "testbed")
+    writer = Writer(folder)
+    queue(writer, folder)
+    writer.commit()
+    before = snapshot(folder)
+
+    queue(writer, folder, port=8080, script=False)
+    assert writer.commit() == ["a", "c"]
+    after = snapshot(folder)
+    assert not os.path.exists(f"{folder}/containers/c.sh")
+    assert after["configurations/b.yaml"] == before["configurations/b.yaml"]
+    assert after["configurations/a.yaml"] != before["configurations/a.yaml"]
+
+    # a tracked unit changing affects its services without any file change
+    queue(writer, folder, port=8080, script=False)
+    writer.track("services/a", {"image": "a2"}, ["a"])
+    assert writer.commit() == ["a"]
+
+
+def test_deleted_file_is_written_again(tmp_path):
+    folder = str(tmp_path / "testbed")
+    writer = Writer(folder)
+    queue(writer, folder)
+    writer.commit()
+    os.remove(f"{folder}/configurations/b.yaml")
+    queue(writer, folder)
+    assert writer.commit() == ["b"]
+    assert os.path.exists(f"{folder}/configurations/b.yaml")
+
+
+def test_invalid_paths(tmp_path):
+    folder = str(tmp_path / "testbed")
+    writer = Writer(folder)
+    with pytest.raises(SystemExit):
+        writer.yaml(str(tmp_path / "outside.yaml"), {})
+    writer.yaml(f"{folder}/a.yaml", {})
+    writer.yaml(f"{folder}/a.yaml", {})
+    with pytest.raises(SystemExit):
+        writer.commit()
+
+
+def generate(definition: dict, scenario_folder: str, jobs: int) -> list:
+    scenario = Selector.get_scenario(copy.deepcopy(definition), "writer")
+    testbed = testbeds.Testbed(scenario)
+    r, cont, conf = testbed.make_scenario_folders("writer", scenario_folder)
+    scenario.set_path(r, cont, f"{CODE}/config/services", conf, scenario_folder)
+    return testbed.generate(jobs)
+
+
+def test_second_generation_writes_nothing(tmp_path):
+    with open(f"{CODE}/template/scenario.yaml") as f:
+        definition = yaml.YAML(typ="safe").load(f)["custom-scenario-aware"]
+    logging.disable(logging.INFO)
+    try:
+        assert len(generate(definition, str(tmp_path / "j1"), 1)) > 0
+        before = snapshot(str(tmp_path / "j1" / "writer"))
+        assert generate(definition, str(tmp_path / "j1"), 2) == []
+        after = snapshot(str(tmp_path / "j1" / "writer"))
+        generate(definition, str(tmp_path / "j2"), 2)
+        parallel = snapshot(str(tmp_path / "j2" / "writer"))
+    finally:
+        logging.disable(logging.NOTSET)
+
+    del before[MANIFEST], after[MANIFEST]
+    assert after == before
+    # the compose file holds absolute paths, every other file is generated identically in parallel
+    del before["docker-compose.yaml"], parallel["docker-compose.yaml"]
+    assert {p: f[2:] for p, f in parallel.items() if p != MANIFEST} == {
+        p: f[2:] for p, f in before.items()}